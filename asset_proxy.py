@@ -0,0 +1,452 @@
+"""
+Local proxy for the browser: cached static assets, blocked third parties, byte counts
+
+The browser is pointed at an AssetProxy listening on 127.0.0.1. For each
+request it:
+
+    app host, static asset    serves it from the on-disk cache; the first
+                              request of a run revalidates the cached copy
+                              with its ETag / Last-Modified (a 304 keeps it,
+                              a new build's file replaces it)
+    app host, anything else   forwards it to the application unchanged
+                              (pages, form posts, redirects, cookies)
+    any other host            blocks it: plain HTTP gets an empty stand-in of
+                              the right content type, HTTPS tunnels are refused
+
+so CDN, font and analytics requests never leave the machine and no case
+waits on them. Requests to the application reuse the proxy's keep-alive
+connections (UpstreamPool) instead of connecting once per request. Bytes
+sent to the browser are counted per case (start_case / end_case) and per
+asset, to show which assets dominate the page weight.
+
+With recording on, every exchange forwarded to the application (pages,
+form posts and their redirects, not cached assets) is also kept for the
+current case; take_exchanges() hands them to record_replay.Recording.
+
+Usage from the command line (e.g. to browse the app through it):
+    python asset_proxy.py --base-url http://localhost:5183 --port 8899
+"""
+
+import argparse
+import hashlib
+import http.client
+import http.server
+import json
+import logging
+import mimetypes
+import os
+import select
+import socket
+import sys
+import threading
+import urllib.parse
+
+from log_config import configure_logging
+
+ASSET_CACHE_DIR = '.asset_cache'
+STATIC_EXTENSIONS = {'.css', '.js', '.map', '.woff', '.woff2', '.ttf', '.eot', '.otf',
+                     '.svg', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.webp'}
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+              'te', 'trailers', 'transfer-encoding', 'upgrade'}
+UPSTREAM_TIMEOUT = 30
+# Requests re-sent on a new connection when a reused one fails; a POST may already have been handled
+RETRY_METHODS = {'GET', 'HEAD'}
+
+
+def is_static(path):
+    return os.path.splitext(urllib.parse.urlparse(path).path)[1].lower() in STATIC_EXTENSIONS
+
+
+class AssetCache:
+    """Static asset bodies on disk, keyed by URL, with the validators to revalidate them"""
+
+    def __init__(self, directory=ASSET_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # URLs revalidated (or fetched) during this run, served without asking the application again
+        self.fresh = set()
+
+    def paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def get(self, url):
+        """(content_type, body) or None"""
+        body_path, meta_path = self.paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(body_path, 'rb') as file:
+                return meta['content_type'], file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def validators(self, url):
+        """Conditional request headers for the cached copy of url ({} without ETag or Last-Modified)"""
+        try:
+            with open(self.paths(url)[1], 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def put(self, url, content_type, body, etag=None, last_modified=None):
+        body_path, meta_path = self.paths(url)
+        with open(body_path + '.tmp', 'wb') as file:
+            file.write(body)
+        os.replace(body_path + '.tmp', body_path)
+        with open(meta_path, 'w', encoding='utf-8') as file:
+            json.dump({'url': url, 'content_type': content_type, 'size': len(body),
+                       'etag': etag, 'last_modified': last_modified}, file)
+        self.mark_fresh(url)
+
+    def is_fresh(self, url):
+        with self.lock:
+            return url in self.fresh
+
+    def mark_fresh(self, url):
+        with self.lock:
+            self.fresh.add(url)
+
+
+def is_open(connection):
+    """False if the application has closed an idle connection (its socket reads as ready: EOF)"""
+    if connection.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+class UpstreamPool:
+    """
+    Idle keep-alive connections to the application, reused by the proxy's handler threads
+    Idle connections the application closed are dropped before use. If a reused connection
+    still fails, only RETRY_METHODS are sent again; anything else reports the error.
+    """
+
+    def __init__(self, timeout=UPSTREAM_TIMEOUT):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def request(self, scheme, host, port, method, target, body, headers):
+        """(response, payload) over an idle connection if there is one, else a new one"""
+        key = (scheme, host, port)
+        while True:
+            with self.lock:
+                idle = self.idle.get(key)
+                connection = idle.pop() if idle else None
+            if connection is not None and not is_open(connection):
+                connection.close()
+                continue
+            reused = connection is not None
+            if connection is None:
+                connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+                connection = connection_class(host, port, timeout=self.timeout)
+            try:
+                connection.request(method, target, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused and method in RETRY_METHODS and not isinstance(e, TimeoutError):
+                    # The application closed the idle connection; try the next one
+                    continue
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                with self.lock:
+                    self.idle.setdefault(key, []).append(connection)
+            return response, payload
+
+    def close(self):
+        with self.lock:
+            connections = [connection for idle in self.idle.values() for connection in idle]
+            self.idle = {}
+        for connection in connections:
+            connection.close()
+
+
+class TransferStats:
+    """Bytes and requests per asset for the whole run, shared by the proxies of parallel workers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.assets = {}
+
+    def add(self, url, size, source):
+        with self.lock:
+            entry = self.assets.setdefault(url, {'bytes': 0, 'requests': 0})
+            entry['bytes'] += size
+            entry['requests'] += 1
+            entry['source'] = source
+
+    def top(self, count=10):
+        with self.lock:
+            return sorted(self.assets.items(), key=lambda item: -item[1]['bytes'])[:count]
+
+
+class ProxyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logging.debug("proxy: " + format, *args)
+
+    @property
+    def proxy(self):
+        return self.server.asset_proxy
+
+    def do_CONNECT(self):
+        host, _, port = self.path.partition(':')
+        if not self.proxy.is_app_host(host):
+            self.proxy.count(f"https://{host}", 0, 'blocked')
+            self.send_response(403, 'Blocked by asset proxy')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=UPSTREAM_TIMEOUT)
+        except OSError:
+            self.send_error(502)
+            return
+        self.send_response(200, 'Connection established')
+        self.end_headers()
+        sent = 0
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, broken = select.select(sockets, [], sockets, UPSTREAM_TIMEOUT)
+                if broken or not readable:
+                    break
+                for source in readable:
+                    data = source.recv(65536)
+                    if not data:
+                        raise ConnectionError
+                    if source is upstream:
+                        self.connection.sendall(data)
+                        sent += len(data)
+                    else:
+                        upstream.sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.proxy.count(f"https://{self.path}", sent, 'tunnel')
+            self.close_connection = True
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_HEAD(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def do_PUT(self):
+        self.handle_request()
+
+    def do_DELETE(self):
+        self.handle_request()
+
+    def reply(self, status, headers, body, url, source):
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() not in HOP_BY_HOP and name.lower() != 'content-length':
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.proxy.count(url, len(body), source)
+
+    def reply_cached(self, cached, url):
+        content_type, payload = cached
+        self.reply(200, [('Content-Type', content_type), ('Cache-Control', 'max-age=86400')],
+                   payload, url, 'cache')
+
+    def handle_request(self):
+        url = self.path if '://' in self.path else f"{self.proxy.base_url}{self.path}"
+        parsed = urllib.parse.urlsplit(url)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+
+        if not self.proxy.is_app_host(parsed.hostname):
+            content_type = mimetypes.guess_type(parsed.path)[0] or 'text/plain'
+            self.reply(200, [('Content-Type', content_type), ('Cache-Control', 'max-age=86400')],
+                       b'', url, 'blocked')
+            return
+
+        static = self.command == 'GET' and is_static(url)
+        cached = self.proxy.cache.get(url) if static else None
+        if cached is not None and self.proxy.cache.is_fresh(url):
+            self.reply_cached(cached, url)
+            return
+
+        target = parsed.path + (f"?{parsed.query}" if parsed.query else '')
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP and name.lower() != 'host'}
+        if static or self.proxy.recording:
+            # Cached and recorded bodies are kept without Content-Encoding, so fetch them uncompressed
+            headers = {name: value for name, value in headers.items() if name.lower() != 'accept-encoding'}
+        if cached is not None:
+            # Revalidate our copy, not the browser's
+            headers = {name: value for name, value in headers.items()
+                       if name.lower() not in ('if-none-match', 'if-modified-since')}
+            headers.update(self.proxy.cache.validators(url))
+        try:
+            response, payload = self.proxy.upstream.request(parsed.scheme, parsed.hostname, parsed.port,
+                                                            self.command, target, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            logging.warning(f"Asset proxy could not reach {url}: {str(e)}")
+            self.send_error(502)
+            return
+        response_headers = response.getheaders()
+        status = response.status
+
+        if cached is not None and status == 304:
+            self.proxy.cache.mark_fresh(url)
+            self.reply_cached(cached, url)
+            return
+        if static and status == 200:
+            self.proxy.cache.put(url, response.getheader('Content-Type') or 'application/octet-stream', payload,
+                                 response.getheader('ETag'), response.getheader('Last-Modified'))
+        elif self.proxy.recording:
+            self.proxy.record({
+                'method': self.command,
+                'path': target,
+                'content_type': self.headers.get('Content-Type'),
+                'body': body.decode('utf-8', errors='replace') if body else None,
+                'status': status,
+                'location': response.getheader('Location'),
+                'response_type': response.getheader('Content-Type'),
+                'response_body': payload.decode('utf-8', errors='replace'),
+            })
+        self.reply(status, response_headers, payload, url, 'upstream')
+
+
+class AssetProxy:
+    """One proxy per browser, so bytes can be attributed to the case that browser is running"""
+
+    def __init__(self, base_url, cache_dir=ASSET_CACHE_DIR, port=0, stats=None, allowed_hosts=()):
+        self.base_url = base_url.rstrip('/')
+        self.cache_dir = cache_dir
+        self.cache = AssetCache(cache_dir)
+        self.upstream = UpstreamPool()
+        self.stats = stats if stats is not None else TransferStats()
+        self.app_hosts = {urllib.parse.urlsplit(self.base_url).hostname, *allowed_hosts}
+        if self.app_hosts & {'localhost', '127.0.0.1'}:
+            self.app_hosts |= {'localhost', '127.0.0.1'}
+        self.port = port
+        self.server = None
+        self.lock = threading.Lock()
+        self.case_counters = self.new_counters()
+        self.recording = False
+        self.exchanges = []
+
+    @staticmethod
+    def new_counters():
+        return {'bytes': 0, 'requests': 0, 'cached': 0, 'blocked': 0}
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    def is_app_host(self, host):
+        return host in self.app_hosts
+
+    def start(self):
+        if self.server is None:
+            self.server = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), ProxyHandler)
+            self.server.daemon_threads = True
+            self.server.asset_proxy = self
+            threading.Thread(target=self.server.serve_forever, name='asset-proxy', daemon=True).start()
+            logging.info(f"Asset proxy listening on {self.address} (cache: {self.cache_dir})")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.upstream.close()
+
+    def spawn(self):
+        """Another proxy with the same cache and run totals, for a parallel worker's browser"""
+        proxy = AssetProxy(self.base_url, self.cache_dir, stats=self.stats)
+        proxy.app_hosts = self.app_hosts
+        proxy.cache = self.cache
+        proxy.recording = self.recording
+        return proxy.start()
+
+    def count(self, url, size, source):
+        self.stats.add(url, size, source)
+        with self.lock:
+            self.case_counters['bytes'] += size
+            self.case_counters['requests'] += 1
+            if source == 'cache':
+                self.case_counters['cached'] += 1
+            elif source == 'blocked':
+                self.case_counters['blocked'] += 1
+
+    def record(self, exchange):
+        with self.lock:
+            self.exchanges.append(exchange)
+
+    def take_exchanges(self):
+        """Exchanges recorded since start_case()"""
+        with self.lock:
+            exchanges, self.exchanges = self.exchanges, []
+        return exchanges
+
+    def start_case(self):
+        with self.lock:
+            self.case_counters = self.new_counters()
+            self.exchanges = []
+
+    def end_case(self):
+        """Counters since start_case()"""
+        with self.lock:
+            counters, self.case_counters = self.case_counters, self.new_counters()
+        return counters
+
+    def log_summary(self, cases, count=10):
+        top = self.stats.top(count)
+        if not top:
+            return
+        total = sum(entry['bytes'] for entry in self.stats.assets.values())
+        logging.info(f"\nTRANSFER: {total / 1024:.1f} KiB to the browser"
+                     + (f", {total / cases / 1024:.1f} KiB per case" if cases else ""))
+        for url, entry in top:
+            logging.info(f"  {entry['bytes'] / 1024:9.1f} KiB {entry['requests']:>5}x {entry['source']:<8} {url}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caching, third-party blocking proxy for the browser")
+    parser.add_argument('-u', '--base-url', default="http://localhost:5183")
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--cache-dir', default=ASSET_CACHE_DIR)
+    args = parser.parse_args(argv)
+    configure_logging()
+    proxy = AssetProxy(args.base_url, args.cache_dir, port=args.port).start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        proxy.log_summary(0)
+        proxy.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
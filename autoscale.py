@@ -0,0 +1,261 @@
+"""
+Worker autoscaling from host CPU and browser memory
+
+Each parallel worker drives its own browser, and each browser costs
+hundreds of MB, so a fixed -w either leaves cores idle or runs the box out
+of memory. With --autoscale the run starts with one worker and every
+INTERVAL seconds the AutoScaler samples:
+
+    cpu       busy fraction of the host since the last sample (/proc/stat)
+    browsers  RSS of each worker's driver process and all its children
+              (geckodriver/chromedriver plus the browser's processes)
+    memory    MemAvailable of the host (/proc/meminfo)
+    rate      cases finished per second, measured over the second half of
+              SETTLE seconds after each change (the first half covers the
+              new browser's startup)
+
+and then decides:
+
+    retire a worker  at once, when the browsers exceed the memory budget or
+                     the host is short of memory
+    retire a worker  when the last added worker did not raise the rate by
+                     IMPROVEMENT (the count before it becomes the ceiling
+                     for the rest of the suite)
+    add a worker     when cases are waiting, the CPU is below CPU_TARGET and
+                     one more browser of the current average size fits in
+                     the budget, up to the -w maximum
+    hold             otherwise
+
+Decisions other than the memory ones wait until the last change has had
+SETTLE seconds to show its effect.
+
+A retired worker finishes its current case, then closes its browser. Every
+decision is logged with the figures behind it. Sampling needs /proc
+(Linux); elsewhere the run uses a fixed pool of -w workers.
+"""
+
+import logging
+import os
+import threading
+import time
+
+INTERVAL = 10.0
+SETTLE = 30.0
+CPU_TARGET = 0.80
+IMPROVEMENT = 0.05
+DEFAULT_BROWSER_MB = 400
+MIN_AVAILABLE_MB = 512
+
+MB = 1024 * 1024
+
+
+def read_cpu_times():
+    """(busy, total) jiffies of the host, or None without /proc"""
+    try:
+        with open('/proc/stat', 'r') as file:
+            values = [int(value) for value in file.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    return sum(values) - idle, sum(values)
+
+
+def read_meminfo():
+    """/proc/meminfo values in bytes, {} without /proc"""
+    info = {}
+    try:
+        with open('/proc/meminfo', 'r') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                info[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return info
+
+
+def process_tree():
+    """pid -> (parent pid, rss bytes) of every process on the host"""
+    page = os.sysconf('SC_PAGE_SIZE')
+    processes = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'r') as file:
+                stat = file.read()
+            with open(f'/proc/{name}/statm', 'r') as file:
+                rss_pages = int(file.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        # the command name may contain spaces; the fields after it are fixed
+        parent = int(stat.rpartition(')')[2].split()[1])
+        processes[int(name)] = (parent, rss_pages * page)
+    return processes
+
+
+def tree_rss(processes, root):
+    """RSS of root and all its descendants"""
+    children = {}
+    for pid, (parent, _) in processes.items():
+        children.setdefault(parent, []).append(pid)
+    total, pending = 0, [root]
+    while pending:
+        pid = pending.pop()
+        if pid in processes:
+            total += processes[pid][1]
+        pending.extend(children.get(pid, ()))
+    return total
+
+
+def driver_pid(runner):
+    """pid of the local driver process behind runner's browser, or None"""
+    process = getattr(getattr(runner.driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+class ResourceSampler:
+    """Host CPU, host memory and per-worker browser memory"""
+
+    def __init__(self):
+        self.available = os.path.exists('/proc/stat')
+        self.last_cpu = read_cpu_times()
+
+    def cpu(self):
+        """Busy fraction since the previous call"""
+        current = read_cpu_times()
+        previous, self.last_cpu = self.last_cpu, current
+        if current is None or previous is None or current[1] == previous[1]:
+            return 0.0
+        return (current[0] - previous[0]) / (current[1] - previous[1])
+
+    def browsers(self, runners):
+        """RSS of each runner's driver process tree (runners without a browser yet are left out)"""
+        pids = {runner: driver_pid(runner) for runner in runners}
+        if not any(pids.values()):
+            return {}
+        processes = process_tree()
+        return {runner: tree_rss(processes, pid) for runner, pid in pids.items() if pid}
+
+    def memory_available(self):
+        return read_meminfo().get('MemAvailable')
+
+
+def default_memory_budget():
+    """Half the memory available now, in bytes (None without /proc)"""
+    available = read_meminfo().get('MemAvailable')
+    return available // 2 if available else None
+
+
+class AutoScaler:
+    """Runs a suite's work queue with a varying number of workers"""
+
+    def __init__(self, max_workers, memory_budget=None, min_workers=1, interval=INTERVAL, settle=SETTLE):
+        self.max_workers = max_workers
+        self.min_workers = min(min_workers, max_workers)
+        self.memory_budget = memory_budget if memory_budget is not None else default_memory_budget()
+        self.interval = interval
+        self.settle = settle
+        self.sampler = ResourceSampler()
+        self.decisions = []
+
+    def run(self, runner, work, total, stop, executed):
+        """Replaces the fixed pool of worker threads in run_all_tests"""
+        if not self.sampler.available:
+            logging.warning("Autoscaling needs /proc; running with a fixed pool of "
+                            f"{self.max_workers} workers instead")
+            self.min_workers = self.max_workers
+        self.workers = []
+        self.spawned = 0
+        for _ in range(min(self.min_workers, total)):
+            self.add_worker(runner, work, total, stop, executed)
+        logging.info(f"Autoscale: starting with {len(self.workers)} workers "
+                     f"(max {self.max_workers}, browser memory budget {self.format_mb(self.memory_budget)})")
+
+        self.ceiling = self.max_workers
+        self.changed_at = time.monotonic()
+        self.baseline = None
+        self.rate_before = None
+        self.last_change = None
+        self.sampler.cpu()
+        while True:
+            self.workers = [entry for entry in self.workers if entry[1].is_alive()]
+            if not self.workers:
+                break
+            self.workers[0][1].join(self.interval)
+            if not stop.is_set() and self.sampler.available:
+                self.decide(runner, work, total, stop, executed)
+        for worker, thread, _ in self.workers:
+            thread.join()
+
+    def add_worker(self, runner, work, total, stop, executed):
+        worker = runner.spawn_worker()
+        self.spawned += 1
+        thread = threading.Thread(target=worker.run_worker, args=(work, total, stop, executed),
+                                  name=f"{runner.ENTITY}-worker-{self.spawned}")
+        self.workers.append((worker, thread, worker.retire))
+        thread.start()
+
+    @staticmethod
+    def format_mb(value):
+        return f"{value / MB:.0f} MiB" if value is not None else 'unknown'
+
+    def decide(self, runner, work, total, stop, executed):
+        now = time.monotonic()
+        cpu = self.sampler.cpu()
+        active = [entry for entry in self.workers if not entry[2].is_set()]
+        browsers = self.sampler.browsers([worker for worker, _, _ in active])
+        used = sum(browsers.values())
+        per_browser = used / len(browsers) if browsers else DEFAULT_BROWSER_MB * MB
+        available = self.sampler.memory_available()
+        count = len(active)
+
+        # Memory pressure is acted on at once, without waiting for the last change to settle
+        over_budget = self.memory_budget is not None and used > self.memory_budget
+        short = available is not None and available < MIN_AVAILABLE_MB * MB
+        if (over_budget or short) and count > 1:
+            self.retire(active, count, now, None, 'over the memory budget' if over_budget else 'host short of memory',
+                        f"browsers {self.format_mb(used)} of {self.format_mb(self.memory_budget)}, "
+                        f"available {self.format_mb(available)}")
+            return
+
+        # The first half of the settle time covers browser startup; throughput is measured over the second half
+        if self.baseline is None and now - self.changed_at >= self.settle / 2:
+            self.baseline = (now, len(executed))
+        if self.baseline is None or now - self.baseline[0] < self.settle / 2:
+            logging.debug("Autoscale: settling at %s workers (cpu %.0f%%, browsers %s)",
+                          count, cpu * 100, self.format_mb(used))
+            return
+        rate = (len(executed) - self.baseline[1]) / (now - self.baseline[0])
+        figures = (f"cpu {cpu:.0%}, browsers {self.format_mb(used)} of {self.format_mb(self.memory_budget)}, "
+                   f"available {self.format_mb(available)}, {rate:.2f} cases/s, {work.qsize()} queued")
+
+        if self.last_change == 'add' and self.rate_before is not None \
+                and rate < self.rate_before * (1 + IMPROVEMENT) and count > 1:
+            self.ceiling = count - 1
+            self.retire(active, count, now, rate,
+                        f"worker {count} did not raise throughput ({self.rate_before:.2f} -> {rate:.2f} cases/s)",
+                        figures)
+            return
+
+        fits = self.memory_budget is None or used + per_browser <= self.memory_budget
+        if (work.qsize() > count and count < min(self.ceiling, self.max_workers)
+                and cpu < CPU_TARGET and fits):
+            self.record(count, count + 1, now, rate, 'add', 'CPU and memory headroom', figures)
+            self.add_worker(runner, work, total, stop, executed)
+            return
+
+        logging.debug("Autoscale: holding at %s workers (%s)", count, figures)
+        self.last_change = None
+        self.baseline = (now, len(executed))
+
+    def retire(self, active, count, now, rate, reason, figures):
+        self.record(count, count - 1, now, rate, 'retire', reason, figures)
+        active[-1][2].set()
+
+    def record(self, before, after, now, rate, change, reason, figures):
+        logging.info(f"Autoscale: {before} -> {after} workers, {reason} ({figures})")
+        self.decisions.append({'at': time.time(), 'from': before, 'to': after, 'reason': reason, 'rate': rate})
+        self.rate_before = rate
+        self.last_change = change
+        self.changed_at = now
+        self.baseline = None
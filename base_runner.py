@@ -0,0 +1,668 @@
+"""
+Shared test runner for the Libro, Ejemplar and Lector black box suites
+
+Each entity module subclasses BaseTestRunner and provides its controller
+name, CSV column names, error fields and fill_form(); navigation, submission,
+result checking, retries and reporting live here.
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+import logging
+
+from browsers import create_driver
+from case_plan import PLAN_EXTENSION, Expanded, load_plan
+from crud_flows import CrudFlows
+from error_matcher import compile_matcher, error_testid, parse_date
+from flaky import HISTORY_FILE as FLAKE_HISTORY_FILE, FlakeTracker, RetryPolicy
+from history_store import HISTORY_DB, HistoryReporter
+from latency_profile import PROFILE_FILE, LatencyProfile
+from lazy_imports import LazyImport
+from log_config import CASE, configure_logging, is_configured
+from reporters import REPORT_FORMATS, open_reporters, run_metadata
+from results import CaseResult, ResultStore
+from scheduler import STATE_FILE, CaseScheduler
+from warm_page import WarmPage
+
+BASE_URL = "http://localhost:5183"
+WAIT_TIMEOUT = 10
+
+# The browser stack is imported only once a browser is started or driven
+By = LazyImport('selenium.webdriver.common.by', 'By')
+WebDriverWait = LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+
+POLL_INTERVAL = 0.1
+# Seconds a click may take to either submit the form or show client-side errors
+CLIENT_VALIDATION_GRACE = 0.5
+
+# Notes whether the next form submission really goes to the server (not cancelled by client validation)
+ARM_SUBMIT_SCRIPT = """
+window.__blackboxSubmitting = false;
+window.addEventListener('submit', e => { window.__blackboxSubmitting = !e.defaultPrevented; }, {once: true});
+"""
+SUBMIT_STATE_SCRIPT = """
+const errors = Array.from(document.querySelectorAll("[data-testid$='-error']"));
+return [window.__blackboxSubmitting === true, errors.some(e => e.textContent.trim() !== '')];
+"""
+
+
+class BaseTestRunner:
+    """Common flow for Create-page black box tests"""
+
+    ENTITY = ''
+    CONTROLLER = ''
+    EXPECTED_COLUMN = 'Resultado Esperado'
+    RESULTS_FILE = 'test_results.csv'
+    LOG_FILE = 'tests.log'
+    DEFAULT_CSV = ''
+    ERROR_FIELDS = []
+    VALIDATIONS = {}
+    # VALIDATIONS field -> CSV column holding its input value
+    FIELD_COLUMNS = {}
+    # Fields used to find a created record on the Index page, most selective first
+    KEY_FIELDS = []
+    # (VALIDATIONS field, data-testid, new valid value) changed by the Edit flow
+    EDIT_FIELD = None
+
+    def __init__(self, base_url=BASE_URL, retry_policy=None, flake_tracker=None,
+                 fail_fast=False, prioritize=True, results_file=None, engine='firefox',
+                 driver=None, report_formats=REPORT_FORMATS, history_db=HISTORY_DB, build=None,
+                 check_messages=True, crud_flows=False, warm_reset=False, asset_proxy=None,
+                 adaptive_timeouts=False, latency_profile=None, metrics=None, autoscaler=None, recording=None,
+                 javascript=True, state_dir=None, cleanup=False):
+        self.base_url = base_url.rstrip('/')
+        self.driver = driver
+        self.owns_driver = driver is None
+        self.engine = engine
+        # False: the browser runs with scripts disabled, so the runner drives the page without execute_script
+        self.javascript = javascript
+        self.results_file = results_file or self.RESULTS_FILE
+        self.report_formats = report_formats
+        self.history_db = history_db
+        self.build = build or os.environ.get('BUILD_ID') or os.environ.get('GITHUB_SHA')
+        # Directory for the state kept between runs (row fingerprints, flake history, latency profile)
+        self.state_dir = state_dir
+        self.reporters = []
+        self.run_metadata = {}
+        self.wait = None
+        self.results = ResultStore(f"{self.results_file}.part")
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        if flake_tracker is None:
+            flake_tracker = FlakeTracker(self.ENTITY, history_file=self.state_path(FLAKE_HISTORY_FILE))
+        self.flake_tracker = flake_tracker
+        self.fail_fast = fail_fast
+        self.check_messages = check_messages
+        self.error_matcher = compile_matcher(self.VALIDATIONS)
+        # cleanup: without crud_flows, still delete the records accepted cases created once the suite has run
+        self.crud = CrudFlows(self) if crud_flows else CrudFlows(self, cleanup_only=True) if cleanup else None
+        self.warm_page = WarmPage(self) if warm_reset else None
+        self.asset_proxy = asset_proxy
+        if latency_profile is None and adaptive_timeouts:
+            latency_profile = LatencyProfile(self.state_path(PROFILE_FILE), default=WAIT_TIMEOUT)
+        self.latency_profile = latency_profile
+        self.metrics = metrics
+        self.autoscaler = autoscaler
+        self.recording = recording
+        self.retire = threading.Event()
+        self.prioritize = prioritize
+
+    def state_path(self, name):
+        return os.path.join(self.state_dir, name) if self.state_dir else name
+
+    @property
+    def create_url(self):
+        return f"{self.base_url}/{self.CONTROLLER}/Create"
+
+    @property
+    def index_url(self):
+        return f"{self.base_url}/{self.CONTROLLER}/Index"
+
+    def setup(self):
+        """Initialize WebDriver (a driver handed in by the caller is reused as is)"""
+        if self.driver is not None and not self.owns_driver:
+            self.wait = WebDriverWait(self.driver, WAIT_TIMEOUT)
+            return
+        logging.info("Setting up WebDriver...")
+        self.driver = create_driver(self.engine, proxy=self.asset_proxy.address if self.asset_proxy else None,
+                                    javascript=self.javascript)
+        self.owns_driver = True
+        self.wait = WebDriverWait(self.driver, WAIT_TIMEOUT)
+        logging.info("WebDriver initialized successfully")
+
+    def teardown(self):
+        """Close WebDriver (drivers owned by the caller are left open)"""
+        if self.driver and self.owns_driver:
+            logging.info("Closing WebDriver...")
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+
+    def recover(self):
+        """Restart the browser if the WebDriver session no longer responds"""
+        try:
+            self.driver.current_url
+        except Exception:
+            logging.warning("WebDriver session lost, restarting browser...")
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+            self.owns_driver = True
+            self.setup()
+
+    def parse_test_value(self, value):
+        """
+        Parse test values from CSV format
+        Examples:
+        - "A" x 50 -> "AAAA..." (50 times)
+        - "Cien años de Soledad" -> "Cien años de Soledad"
+        - "" -> ""
+        Cells of a compiled plan are already expanded and returned as they are.
+        """
+        if type(value) is Expanded:
+            return value
+        if not value or value.strip() == '""':
+            return ""
+
+        value = value.strip().strip('"')
+
+        if ' x ' in value:
+            parts = value.split(' x ')
+            if len(parts) == 2:
+                char = parts[0].strip().strip('"')
+                try:
+                    count = int(parts[1].strip())
+                    return char * count
+                except ValueError:
+                    pass
+
+        return value
+
+    def navigate_to_create_page(self):
+        """
+        Navigate to the Create page, or reset it in place if warm_reset is on and the browser is still there
+        Returns: seconds from the GET to the page being ready (fixed settle sleep excluded), None after a warm reset
+        """
+        if self.warm_page is not None and self.warm_page.reset():
+            return None
+        logging.debug("Navigating to %s", self.create_url)
+        started = time.perf_counter()
+        if self.latency_profile is not None:
+            deadline = self.latency_profile.deadline(self.latency_key('navigate'))
+            self.driver.set_page_load_timeout(deadline)
+            self.driver.get(self.create_url)
+            WebDriverWait(self.driver, deadline, poll_frequency=POLL_INTERVAL).until(
+                lambda driver: driver.find_elements(By.CSS_SELECTOR, "[data-testid='submit-button']"))
+            loaded = time.perf_counter() - started
+            self.latency_profile.record(self.latency_key('navigate'), loaded)
+        else:
+            # get() returns once the page has loaded
+            self.driver.get(self.create_url)
+            loaded = time.perf_counter() - started
+            time.sleep(1)
+        if self.warm_page is not None:
+            self.warm_page.stats.record('full', time.perf_counter() - started)
+        return loaded
+
+    def fill_form(self, test_data):
+        """Fill the form with test data"""
+        raise NotImplementedError
+
+    def submit_form(self):
+        """
+        Submit the form
+        Returns: seconds from the click to the response page being loaded (fixed settle sleep excluded),
+        None when the adaptive wait saw client-side validation keep the form
+        """
+        logging.debug("Submitting form...")
+        submit_button = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='submit-button']")
+        if self.latency_profile is None:
+            started = time.perf_counter()
+            # click() returns once a navigation it starts has loaded
+            submit_button.click()
+            posted = time.perf_counter() - started
+            time.sleep(2)
+            return posted
+        self.driver.execute_script(ARM_SUBMIT_SCRIPT)
+        started = time.perf_counter()
+        submit_button.click()
+        deadline = max(self.latency_profile.deadline(self.latency_key('submit')),
+                       self.latency_profile.deadline(self.latency_key('redirect')))
+        reloaded = WebDriverWait(self.driver, deadline, poll_frequency=POLL_INTERVAL).until(
+            self.submission_settled(submit_button, started))
+        settled = time.perf_counter() - started
+        phase = 'redirect' if self.is_on_index_page() else 'submit'
+        self.latency_profile.record(self.latency_key(phase), settled)
+        return settled if reloaded == 'reloaded' else None
+
+    def latency_key(self, phase):
+        return f"{self.CONTROLLER}/Create:{phase}"
+
+    def submission_settled(self, submit_button, started):
+        """
+        Wait condition after clicking submit: 'reloaded' once the server's response page has loaded,
+        'client' if client-side validation kept the form; a pending post past the deadline times out
+        """
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        def settled(driver):
+            try:
+                submit_button.is_enabled()
+            except StaleElementReferenceException:
+                return driver.execute_script("return document.readyState") == 'complete' and 'reloaded'
+            submitting, errors_shown = driver.execute_script(SUBMIT_STATE_SCRIPT)
+            if submitting:
+                return False
+            if errors_shown or time.perf_counter() - started >= CLIENT_VALIDATION_GRACE:
+                return 'client'
+            return False
+        return settled
+
+    def check_validation_errors(self):
+        """
+        Check for validation error messages
+        Returns: dict with field names as keys and error messages as values
+        """
+        from selenium.common.exceptions import NoSuchElementException
+
+        errors = {}
+
+        for field in self.ERROR_FIELDS:
+            try:
+                error_element = self.driver.find_element(
+                    By.CSS_SELECTOR,
+                    f"[data-testid='{field}-error']"
+                )
+                error_text = error_element.text.strip()
+                if error_text:
+                    errors[field] = error_text
+                    logging.debug("Error found in %s: %s", field, error_text)
+            except NoSuchElementException:
+                continue
+
+        return errors
+
+    def is_on_index_page(self):
+        """Check if redirected to Index page (success)"""
+        try:
+            current_url = self.driver.current_url
+            is_index = f'/{self.CONTROLLER}/Index' in current_url or current_url.endswith(f'/{self.CONTROLLER}')
+            return is_index
+        except:
+            return False
+
+    def field_values(self, test_case):
+        """Parsed input value of each VALIDATIONS field present in the CSV row"""
+        return {field: self.parse_test_value(test_case.get(column, ''))
+                for field, column in self.FIELD_COLUMNS.items()}
+
+    def form_values(self, test_case, form=None):
+        """
+        Values of a CSV row keyed by data-testid, as the HTTP engine posts them
+        form is the parsed Create form, for runners that map CSV values to its options
+        """
+        values = {}
+        for field, value in self.field_values(test_case).items():
+            if field.startswith('fecha') and value:
+                parsed = parse_date(value)
+                value = parsed.isoformat() if parsed else value
+            values[error_testid(field)] = value
+        return values
+
+    def seed_case(self, n):
+        """A valid, unique CSV row for bulk seeding (record number n)"""
+        raise NotImplementedError
+
+    def determine_actual_result(self, has_errors, on_index):
+        """Determine if test should pass or fail"""
+        if on_index and not has_errors:
+            return "Aceptado"
+        else:
+            return "Rechazado"
+
+    def execute_case(self, test_case, result):
+        """Drive the browser through one attempt of a test case, filling in result"""
+        phases = result['phases'] = {}
+        if self.asset_proxy is not None:
+            self.asset_proxy.start_case()
+
+        loaded = error = None
+        try:
+            mark = time.perf_counter()
+            loaded = self.navigate_to_create_page()
+            phases['navigate'], mark = time.perf_counter() - mark, time.perf_counter()
+
+            self.fill_form(test_case)
+            phases['fill'], mark = time.perf_counter() - mark, time.perf_counter()
+
+            posted = self.submit_form()
+            phases['submit'], mark = time.perf_counter() - mark, time.perf_counter()
+
+            errors = self.check_validation_errors()
+
+            on_index = self.is_on_index_page()
+            phases['check'] = time.perf_counter() - mark
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            if self.recording is not None:
+                # A warm reset's background fetch of the Create page is part of this case's exchanges
+                navigation = None if 'navigate' not in phases else 'warm' if loaded is None else 'full'
+                self.recording.add(test_case['CASO'], self.asset_proxy.take_exchanges(), sum(phases.values()),
+                                   navigation=navigation, error=error)
+        # Request times alone (GET and POST Create), for the history store's slowdown test
+        if loaded is not None:
+            phases['load'] = loaded
+        if posted is not None:
+            phases['post'] = posted
+
+        actual = self.determine_actual_result(len(errors) > 0, on_index)
+
+        result['actual'] = actual
+        result['errors'] = errors
+        result['passed'] = (actual == result['expected'])
+
+        mismatches = {}
+        if self.check_messages and errors:
+            mismatches = self.error_matcher.check(self.field_values(test_case), errors)
+            if mismatches:
+                result['passed'] = False
+        result['message_mismatches'] = mismatches
+
+        if on_index:
+            result['notes'] = 'Redirected to Index page (creation successful)'
+        elif errors:
+            error_summary = ', '.join([f"{field}: {msg}" for field, msg in errors.items()])
+            result['notes'] = f'Validation errors: {error_summary}'
+        else:
+            result['notes'] = 'Stayed on Create page, but no errors detected'
+        if mismatches:
+            mismatch_summary = '; '.join(f"{field}: {msg}" for field, msg in mismatches.items())
+            result['notes'] += f' | Message mismatches: {mismatch_summary}'
+
+        if self.asset_proxy is not None:
+            result['transfer'] = self.asset_proxy.end_case()
+            logging.debug("Transferred %s bytes in %s requests (%s cached, %s blocked)",
+                          result['transfer']['bytes'], result['transfer']['requests'],
+                          result['transfer']['cached'], result['transfer']['blocked'])
+
+    def new_result(self, caso, expected, lane='fast'):
+        """Empty result record for a case"""
+        return CaseResult(caso, expected, lane)
+
+    def record_result(self, result):
+        """Hand a finished result to the reporters and add it to the summary"""
+        for reporter in self.reporters:
+            reporter.case(result)
+        self.results.add(result, self.flake_tracker.score(result['caso']))
+
+    def run_test_case(self, test_case, lane='fast'):
+        """
+        Run a single test case, retrying infrastructure errors
+        Returns: dict with test results
+        """
+        caso = test_case.get('CASO', 'Unknown')
+        expected = test_case.get(self.EXPECTED_COLUMN, '').strip()
+
+        logging.debug("Running Test Case: %s (expected %s)", caso, expected)
+
+        result = self.new_result(caso, expected, lane)
+        started = time.perf_counter()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            result['attempts'] = attempt
+            try:
+                self.execute_case(test_case, result)
+                break
+            except Exception as e:
+                if not self.retry_policy.should_retry(e, attempt):
+                    logging.error(f"Exception in test {caso}: {str(e)}")
+                    result['actual'] = 'Error'
+                    result['passed'] = False
+                    result['notes'] = f'Exception: {str(e)}'
+                    break
+                logging.warning(f"Infrastructure error in test {caso} "
+                                f"(attempt {attempt}/{self.retry_policy.max_attempts}): {str(e)}")
+                self.retry_policy.wait(attempt)
+                self.recover()
+
+        # Only the final attempt's record becomes a fixture; the browser is still on its Index page
+        if self.crud is not None and result['actual'] == 'Aceptado':
+            self.crud.capture(test_case)
+        result['duration'] = time.perf_counter() - started
+        if result['passed'] and attempt > 1:
+            result['notes'] += f' (passed after {attempt} attempts)'
+        if lane == 'quarantine':
+            result['notes'] = f"[quarantined] {result['notes']}"
+
+        logging.log(CASE, "%s: %s - Expected: %s, Actual: %s - %s", caso,
+                    "✓ PASSED" if result['passed'] else "✗ FAILED", expected, result['actual'], result['notes'],
+                    extra={'event': 'case', 'entity': self.ENTITY, 'caso': caso, 'expected': expected,
+                           'actual': result['actual'], 'passed': result['passed'], 'lane': lane,
+                           'attempts': attempt, 'duration': round(result['duration'], 4)})
+
+        self.flake_tracker.record(caso, result['passed'], attempt)
+        self.record_result(result)
+        return result
+
+    def load_test_cases(self, csv_file_path, only=None):
+        """
+        Read test cases from CSV or a compiled plan, skipping rows without CASO
+        only: CASO values to keep (all cases if None)
+        """
+        if csv_file_path.endswith(PLAN_EXTENSION):
+            plan = load_plan(csv_file_path)
+            return plan.select(only) if only is not None else list(plan)
+        with open(csv_file_path, 'r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            if only is not None:
+                only = set(only)
+                return [tc for tc in reader if tc.get('CASO') and tc['CASO'] in only]
+            return [tc for tc in reader if tc.get('CASO')]
+
+    def spawn_worker(self):
+        """Create another runner of the same type and settings, sharing this runner's results"""
+        worker = type(self)(base_url=self.base_url, retry_policy=self.retry_policy,
+                            flake_tracker=self.flake_tracker, fail_fast=self.fail_fast,
+                            prioritize=self.prioritize, results_file=self.results_file,
+                            engine=self.engine, report_formats=self.report_formats,
+                            history_db=self.history_db, build=self.build,
+                            check_messages=self.check_messages, javascript=self.javascript,
+                            state_dir=self.state_dir)
+        if self.warm_page is not None:
+            worker.warm_page = WarmPage(worker, self.warm_page.stats)
+        worker.latency_profile = self.latency_profile
+        worker.metrics = self.metrics
+        worker.recording = self.recording
+        if self.asset_proxy is not None:
+            worker.asset_proxy = self.asset_proxy.spawn()
+        if self.crud is not None:
+            worker.crud = CrudFlows(worker, self.crud.cleanup_only)
+            worker.crud.fixtures = self.crud.fixtures
+        worker.results = self.results
+        worker.reporters = self.reporters
+        worker.run_metadata = self.run_metadata
+        return worker
+
+    def run_queue(self, work, total, stop, executed):
+        """Run (index, test_case, lane) items from work until it is empty or stop is set"""
+        name = threading.current_thread().name
+        if self.metrics is not None:
+            self.metrics.worker_started(name)
+        try:
+            self._run_queue(work, total, stop, executed, name)
+        finally:
+            if self.metrics is not None:
+                self.metrics.worker_stopped(name)
+
+    def _run_queue(self, work, total, stop, executed, name):
+        while not stop.is_set() and not self.retire.is_set():
+            try:
+                i, test_case, lane = work.get_nowait()
+            except queue.Empty:
+                return
+            logging.debug("Test %s/%s [%s lane]", i, total, lane)
+            if self.metrics is not None:
+                self.metrics.case_started(name, test_case['CASO'])
+            result = self.run_test_case(test_case, lane=lane)
+            if self.metrics is not None:
+                self.metrics.case_finished(name, result)
+            executed.append(test_case)
+            if self.fail_fast and lane == 'fast' and not result['passed']:
+                logging.info(f"Fail-fast: stopping after {result['caso']}")
+                stop.set()
+                return
+            time.sleep(1)
+
+    def run_worker(self, work, total, stop, executed):
+        """Thread body for one parallel worker with its own browser"""
+        try:
+            self.setup()
+            self.run_queue(work, total, stop, executed)
+        except Exception as e:
+            logging.error(f"Worker failed: {str(e)}")
+        finally:
+            self.teardown()
+            if self.asset_proxy is not None:
+                self.asset_proxy.stop()
+
+    def run_all_tests(self, csv_file_path, workers=1, only=None):
+        """
+        Run all test cases from CSV file
+        Previously failing and new/changed cases run first (unless prioritize is off),
+        quarantined cases run after the others in their own lane, and with fail_fast
+        the run stops at the first blocking failure. With workers > 1 the cases are
+        shared among that many browsers, or with an autoscaler, among as many as
+        it decides at run time. only limits the run to the listed CASO values.
+        """
+        if not is_configured():
+            configure_logging(self.LOG_FILE)
+        logging.info(f"Loading test cases from: {csv_file_path}")
+
+        scheduler = CaseScheduler(self.ENTITY, self.results_file, self.state_path(STATE_FILE),
+                                  normalize=self.parse_test_value)
+        executed = []
+        try:
+            test_cases = self.load_test_cases(csv_file_path, only)
+            if only is not None:
+                missing = set(only) - {tc['CASO'] for tc in test_cases}
+                if missing:
+                    logging.info(f"Not in {csv_file_path}: {', '.join(sorted(missing))}")
+            if self.prioritize:
+                test_cases = scheduler.order(test_cases)
+
+            fast_lane = [tc for tc in test_cases if not self.flake_tracker.is_quarantined(tc['CASO'])]
+            quarantine_lane = [tc for tc in test_cases if self.flake_tracker.is_quarantined(tc['CASO'])]
+
+            logging.info(f"Loaded {len(test_cases)} test cases "
+                         f"({len(quarantine_lane)} quarantined)")
+
+            self.run_metadata = run_metadata(self.ENTITY, base_url=self.base_url, engine=self.engine,
+                                             workers=workers, csv_file=csv_file_path,
+                                             total_cases=len(test_cases))
+            if self.build:
+                self.run_metadata['build'] = self.build
+            self.reporters = open_reporters(self.results_file, self.report_formats, self.run_metadata)
+            if self.history_db:
+                self.reporters.append(HistoryReporter(self.history_db, self.run_metadata))
+
+            work = queue.Queue()
+            for i, test_case in enumerate(fast_lane + quarantine_lane, 1):
+                work.put((i, test_case, 'fast' if i <= len(fast_lane) else 'quarantine'))
+            stop = threading.Event()
+            total = len(test_cases)
+            if self.metrics is not None:
+                self.metrics.start_suite(self.ENTITY, total, work)
+
+            if self.autoscaler is not None:
+                self.autoscaler.run(self, work, total, stop, executed)
+            elif workers > 1:
+                threads = [threading.Thread(target=self.spawn_worker().run_worker,
+                                            args=(work, total, stop, executed),
+                                            name=f"{self.ENTITY}-worker-{n}")
+                           for n in range(1, min(workers, total) + 1)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            else:
+                self.setup()
+                self.run_queue(work, total, stop, executed)
+
+            if stop.is_set():
+                logging.info(f"Fail-fast: {work.qsize()} test cases not run")
+            if self.crud is not None and self.crud.fixtures and (not stop.is_set() or self.crud.cleanup_only):
+                if self.driver is None:
+                    self.setup()
+                self.crud.run()
+
+        except FileNotFoundError:
+            logging.error(f"CSV file not found: {csv_file_path}")
+            raise
+        except Exception as e:
+            logging.error(f"Error running tests: {str(e)}")
+            raise
+        finally:
+            self.teardown()
+            for reporter in self.reporters:
+                reporter.close()
+            self.flake_tracker.save()
+            scheduler.save(executed)
+            if self.latency_profile is not None:
+                self.latency_profile.save()
+
+    def generate_report(self, output_file=None):
+        """Generate test results report"""
+        output_file = output_file or self.results_file
+        logging.info(f"\nGenerating report: {output_file}")
+
+        stats = self.results.stats()
+        total, passed, failed = stats['total'], stats['passed'], stats['failed']
+        blocking_failed, pass_rate = stats['blocking_failed'], stats['pass_rate']
+        self.results.save(output_file)
+
+        logging.info("\n" + "="*60)
+        logging.info("TEST EXECUTION SUMMARY")
+        logging.info("="*60)
+        logging.info(f"Total Tests: {total}")
+        logging.info(f"Passed: {passed} ({pass_rate:.1f}%)")
+        logging.info(f"Failed: {failed} ({100-pass_rate:.1f}%)")
+        if failed != blocking_failed:
+            logging.info(f"  of which quarantined (non-blocking): {failed - blocking_failed}")
+        logging.info("="*60)
+
+        if failed > 0:
+            logging.info("\nFAILED TESTS:")
+            for caso, expected, actual, notes in self.results.failures:
+                logging.info(f"  - {caso}: Expected '{expected}', Got '{actual}'")
+                logging.info(f"    Notes: {notes}")
+            if self.results.failures_omitted:
+                logging.info(f"  ... and {self.results.failures_omitted} more (see {output_file})")
+
+        flaky = self.results.flaky
+        if flaky:
+            logging.info("\nFLAKINESS SCORES:")
+            for caso, score in flaky:
+                logging.info(f"  - {caso}: {score:.2f}")
+
+        if self.warm_page is not None:
+            stats['navigation'] = self.warm_page.log_summary()
+        if self.asset_proxy is not None:
+            self.asset_proxy.log_summary(total)
+        if self.latency_profile is not None:
+            logging.info("\nLEARNED DEADLINES:")
+            for key, (samples, p50, deadline) in self.latency_profile.summary().items():
+                if key.startswith(f"{self.CONTROLLER}/"):
+                    logging.info(f"  - {key}: p50 {p50:.2f}s over {samples} samples -> wait up to {deadline:.1f}s")
+
+        logging.info(f"\nDetailed results saved to: {output_file}")
+
+        return stats
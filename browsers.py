@@ -0,0 +1,101 @@
+"""
+Browser backends for the runners
+
+Every engine name maps to a function that starts a WebDriver session, so the
+runners only ever see a driver:
+
+    firefox, firefox-headless     geckodriver (GeckoDriverManager)
+    chromium, chromium-headless   chromedriver for Chromium (ChromeDriverManager)
+
+Driver binaries are resolved once per process and shared by every runner and
+worker. Nothing from selenium is imported until a browser is started.
+"""
+
+import threading
+
+from lazy_imports import LazyImport
+
+WINDOW_SIZE = (1920, 1080)
+
+webdriver = LazyImport('selenium.webdriver')
+FirefoxService = LazyImport('selenium.webdriver.firefox.service', 'Service')
+ChromeService = LazyImport('selenium.webdriver.chrome.service', 'Service')
+
+_driver_paths_lock = threading.Lock()
+_driver_paths = {}
+
+
+def driver_path(browser):
+    """Resolve the driver binary for browser ('firefox' or 'chromium') once per process"""
+    with _driver_paths_lock:
+        if browser not in _driver_paths:
+            if browser == 'firefox':
+                from webdriver_manager.firefox import GeckoDriverManager
+                _driver_paths[browser] = GeckoDriverManager().install()
+            else:
+                from webdriver_manager.chrome import ChromeDriverManager
+                from webdriver_manager.core.os_manager import ChromeType
+                _driver_paths[browser] = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+        return _driver_paths[browser]
+
+
+def start_firefox(headless, proxy=None, javascript=True):
+    options = webdriver.FirefoxOptions()
+
+    options.add_argument(f'--width={WINDOW_SIZE[0]}')
+    options.add_argument(f'--height={WINDOW_SIZE[1]}')
+    if headless:
+        options.add_argument('--headless')
+    if proxy:
+        host, port = proxy.rsplit(':', 1)
+        options.set_preference('network.proxy.type', 1)
+        for scheme in ('http', 'ssl'):
+            options.set_preference(f'network.proxy.{scheme}', host)
+            options.set_preference(f'network.proxy.{scheme}_port', int(port))
+        # Firefox bypasses proxies for localhost unless told otherwise
+        options.set_preference('network.proxy.no_proxies_on', '')
+        options.set_preference('network.proxy.allow_hijacking_localhost', True)
+    if not javascript:
+        options.set_preference('javascript.enabled', False)
+
+    service = FirefoxService(driver_path('firefox'))
+    return webdriver.Firefox(service=service, options=options)
+
+
+def start_chromium(headless, proxy=None, javascript=True):
+    options = webdriver.ChromeOptions()
+
+    options.add_argument(f'--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--no-first-run')
+    if headless:
+        options.add_argument('--headless=new')
+    if proxy:
+        options.add_argument(f'--proxy-server=http://{proxy}')
+        # Chromium bypasses proxies for loopback addresses unless told otherwise
+        options.add_argument('--proxy-bypass-list=<-loopback>')
+    if not javascript:
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.javascript': 2})
+
+    service = ChromeService(driver_path('chromium'))
+    return webdriver.Chrome(service=service, options=options)
+
+
+BROWSERS = {
+    'firefox': lambda proxy, javascript: start_firefox(False, proxy, javascript),
+    'firefox-headless': lambda proxy, javascript: start_firefox(True, proxy, javascript),
+    'chromium': lambda proxy, javascript: start_chromium(False, proxy, javascript),
+    'chromium-headless': lambda proxy, javascript: start_chromium(True, proxy, javascript),
+}
+
+ENGINES = list(BROWSERS)
+
+
+def create_driver(engine='firefox', proxy=None, javascript=True):
+    """
+    Start a browser for the given engine, optionally sending all traffic through proxy (host:port)
+    javascript=False starts it with page scripts disabled
+    """
+    if engine not in BROWSERS:
+        raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+    return BROWSERS[engine](proxy, javascript)
@@ -0,0 +1,289 @@
+"""
+Compiled test plans: a CSV suite in a memory-mapped binary file
+
+compile_plan() reads a test CSV once and writes <csv>.plan with every cell
+already expanded by parse_test_value ('"A" x 201' stored as 201 A's), the
+columns mapped to normalized keys (TITULO -> titulo, Primer Nombre ->
+primer_nombre, the expected-result column -> expected) and two indexes:
+the byte offset of each row, and the rows sorted by CASO. Each row's
+scheduler fingerprint (scheduler.row_hash) is stored too. At run time
+CasePlan maps the file instead of parsing it, decodes a row only when the
+case is used, and finds the rows for --only LIB7,LIB23 by binary search.
+Reading a row's CASO or fingerprint, as the scheduler does for every row
+before the first case runs, decodes nothing else.
+
+A PlannedCase reads like the DictReader row it replaces, by original
+column name or by normalized key. Expanded cells are Expanded strings,
+which parse_test_value returns unchanged.
+
+File layout (little endian):
+    header   magic, row count, metadata length, index offset, sorted offset,
+             hashes offset
+    metadata JSON: entity, source CSV size and mtime, [column, key, expanded]
+    rows     per row one uint32 byte length per column, then the UTF-8 cells;
+             CASO is always the first column
+    index    uint64 offset of each row, in CSV order
+    sorted   uint32 row numbers ordered by CASO
+    hashes   20-byte SHA-1 fingerprint of each row, in CSV order
+
+Usage:
+    python case_plan.py -e libro
+    python case_plan.py -e lector --csv big_lector.csv -o big_lector.plan
+    python run_tests.py -e libro --csv "BLACKBOX_BIBLIOTECA - LIBRO_TESTS.csv.plan" --only LIB7,LIB23
+"""
+
+import argparse
+import array
+import csv
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Mapping, Sequence
+
+from scheduler import row_hash
+
+PLAN_EXTENSION = '.plan'
+MAGIC = b'BBPLAN02'
+HEADER = struct.Struct('<8sIIQQQ')
+HASH_SIZE = 20
+OFFSET = struct.Struct('<Q')
+ROW_NUMBER = struct.Struct('<I')
+
+CASO_COLUMN = 'CASO'
+
+
+class Expanded(str):
+    """A cell parse_test_value has already expanded"""
+
+
+def column_key(runner, column):
+    """Normalized key of a CSV column: the VALIDATIONS field it feeds, or its name in snake case"""
+    if column == CASO_COLUMN:
+        return 'caso'
+    if column == runner.EXPECTED_COLUMN:
+        return 'expected'
+    for field, field_column in runner.FIELD_COLUMNS.items():
+        if field_column == column:
+            return field
+    return '_'.join(column.strip().lower().split())
+
+
+def source_stamp(csv_file):
+    stat = os.stat(csv_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def default_plan_file(csv_file):
+    return f"{csv_file}{PLAN_EXTENSION}"
+
+
+def compile_plan(runner, csv_file, plan_file=None):
+    """Write the plan for csv_file; returns (plan_file, rows)"""
+    plan_file = plan_file or default_plan_file(csv_file)
+    with open(csv_file, 'r', encoding='utf-8', newline='') as source:
+        reader = csv.DictReader(source)
+        if CASO_COLUMN not in (reader.fieldnames or []):
+            raise ValueError(f"{csv_file} has no {CASO_COLUMN} column")
+        columns = [CASO_COLUMN] + [column for column in reader.fieldnames if column and column != CASO_COLUMN]
+        expanded = [column not in (CASO_COLUMN, runner.EXPECTED_COLUMN) for column in columns]
+        meta = json.dumps({
+            'entity': runner.ENTITY,
+            'source': os.path.basename(csv_file),
+            'stamp': source_stamp(csv_file),
+            'columns': [[column, column_key(runner, column), flag] for column, flag in zip(columns, expanded)],
+        }).encode('utf-8')
+        lengths = struct.Struct(f'<{len(columns)}I')
+
+        offsets = array.array('Q')
+        casos = []
+        hashes = []
+        with open(plan_file + '.tmp', 'wb') as plan:
+            plan.write(HEADER.pack(MAGIC, 0, len(meta), 0, 0, 0))
+            plan.write(meta)
+            position = HEADER.size + len(meta)
+            for row in reader:
+                if not row.get(CASO_COLUMN):
+                    continue
+                cells = [(runner.parse_test_value(row.get(column) or '') if flag else row.get(column) or '')
+                         .encode('utf-8') for column, flag in zip(columns, expanded)]
+                offsets.append(position)
+                casos.append(cells[0])
+                hashes.append(bytes.fromhex(row_hash(row, runner.parse_test_value)))
+                record = lengths.pack(*map(len, cells)) + b''.join(cells)
+                plan.write(record)
+                position += len(record)
+
+            index_offset = position
+            by_caso = array.array('I', sorted(range(len(casos)), key=casos.__getitem__))
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+                by_caso.byteswap()
+            plan.write(offsets.tobytes())
+            sorted_offset = index_offset + OFFSET.size * len(offsets)
+            plan.write(by_caso.tobytes())
+            hashes_offset = sorted_offset + ROW_NUMBER.size * len(by_caso)
+            plan.write(b''.join(hashes))
+            plan.seek(0)
+            plan.write(HEADER.pack(MAGIC, len(casos), len(meta), index_offset, sorted_offset, hashes_offset))
+    os.replace(plan_file + '.tmp', plan_file)
+    return plan_file, len(casos)
+
+
+class PlannedCase(Mapping):
+    """One row of a plan, decoded on first access"""
+
+    __slots__ = ('plan', 'number', '_cells')
+
+    def __init__(self, plan, number):
+        self.plan = plan
+        self.number = number
+        self._cells = None
+
+    def __getitem__(self, key):
+        position = self.plan.positions[key]
+        if self._cells is None:
+            if position == 0:
+                return self.plan.caso(self.number).decode('utf-8')
+            self._cells = self.plan.cells(self.number)
+        value = self._cells[position]
+        return Expanded(value) if self.plan.expanded[position] else value
+
+    def __iter__(self):
+        return iter(self.plan.columns)
+
+    def __len__(self):
+        return len(self.plan.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def fingerprint(self):
+        """scheduler.row_hash of the CSV row, stored when the plan was compiled"""
+        return self.plan.row_hash(self.number)
+
+
+class CasePlan(Sequence):
+    """Read-only view of a compiled plan; plan[i] is the PlannedCase of row i"""
+
+    def __init__(self, plan_file):
+        self.plan_file = plan_file
+        with open(plan_file, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, meta_length, self.index_offset, self.sorted_offset, self.hashes_offset = \
+            HEADER.unpack_from(self.buffer)
+        if magic[:6] == MAGIC[:6] and magic != MAGIC:
+            raise ValueError(f"{plan_file} was compiled by another version; recompile it with case_plan.py")
+        if magic != MAGIC:
+            raise ValueError(f"{plan_file} is not a compiled test plan")
+        self.meta = json.loads(self.buffer[HEADER.size:HEADER.size + meta_length])
+        self.columns = [column for column, _, _ in self.meta['columns']]
+        self.expanded = [flag for _, _, flag in self.meta['columns']]
+        self.positions = {}
+        for position, (column, key, _) in enumerate(self.meta['columns']):
+            self.positions[column] = position
+            self.positions.setdefault(key, position)
+        self.lengths = struct.Struct(f'<{len(self.columns)}I')
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, number):
+        if isinstance(number, slice):
+            return [PlannedCase(self, n) for n in range(*number.indices(self.rows))]
+        if number < 0:
+            number += self.rows
+        if not 0 <= number < self.rows:
+            raise IndexError(number)
+        return PlannedCase(self, number)
+
+    def __iter__(self):
+        return (PlannedCase(self, number) for number in range(self.rows))
+
+    def cells(self, number):
+        offset = OFFSET.unpack_from(self.buffer, self.index_offset + OFFSET.size * number)[0]
+        lengths = self.lengths.unpack_from(self.buffer, offset)
+        position = offset + self.lengths.size
+        cells = []
+        for length in lengths:
+            cells.append(self.buffer[position:position + length].decode('utf-8'))
+            position += length
+        return cells
+
+    def caso(self, number):
+        """CASO of row number, read without decoding the rest of the row"""
+        offset = OFFSET.unpack_from(self.buffer, self.index_offset + OFFSET.size * number)[0]
+        start = offset + self.lengths.size
+        return self.buffer[start:start + self.lengths.unpack_from(self.buffer, offset)[0]]
+
+    def row_hash(self, number):
+        start = self.hashes_offset + HASH_SIZE * number
+        return self.buffer[start:start + HASH_SIZE].hex()
+
+    def find(self, caso):
+        """Row number of caso, or None"""
+        target = caso.encode('utf-8')
+        low, high = 0, self.rows
+        while low < high:
+            middle = (low + high) // 2
+            number = ROW_NUMBER.unpack_from(self.buffer, self.sorted_offset + ROW_NUMBER.size * middle)[0]
+            if self.caso(number) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.rows:
+            return None
+        number = ROW_NUMBER.unpack_from(self.buffer, self.sorted_offset + ROW_NUMBER.size * low)[0]
+        return number if self.caso(number) == target else None
+
+    def select(self, casos):
+        """PlannedCase of each listed CASO found, in plan order"""
+        numbers = {self.find(caso) for caso in casos} - {None}
+        return [PlannedCase(self, number) for number in sorted(numbers)]
+
+    def is_stale(self, csv_file):
+        """True if csv_file changed since the plan was compiled from it"""
+        try:
+            return source_stamp(csv_file) != self.meta['stamp']
+        except OSError:
+            return False
+
+
+def load_plan(plan_file):
+    """Open a plan, warning if the CSV next to it was edited after compiling"""
+    plan = CasePlan(plan_file)
+    source = os.path.join(os.path.dirname(plan_file), plan.meta['source'])
+    if plan.is_stale(source):
+        logging.warning(f"{plan_file} is older than {source}; recompile it with case_plan.py")
+    return plan
+
+
+def main(argv=None):
+    from run_tests import SUITES, load_runner_class
+
+    parser = argparse.ArgumentParser(description="Compile a test CSV into a memory-mapped binary plan")
+    parser.add_argument('-e', '--entity', required=True, choices=sorted(SUITES))
+    parser.add_argument('--csv', help="test case CSV (default: the entity's CSV)")
+    parser.add_argument('-o', '--output', help=f"plan file (default: <csv>{PLAN_EXTENSION})")
+    args = parser.parse_args(argv)
+
+    runner = load_runner_class(args.entity)(report_formats=[], history_db=None)
+    csv_file = args.csv or runner.DEFAULT_CSV
+    started = time.perf_counter()
+    plan_file, rows = compile_plan(runner, csv_file, args.output)
+    compiled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plan = CasePlan(plan_file)
+    opened = time.perf_counter() - started
+    print(f"Compiled {rows} cases from {csv_file} in {compiled:.3f}s")
+    print(f"Plan saved to: {plan_file} ({os.path.getsize(plan_file) / 1024:.1f} KiB, opens in {opened * 1000:.2f} ms)")
+    print(f"Columns: {', '.join(f'{column} -> {key}' for column, key, _ in plan.meta['columns'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
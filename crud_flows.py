@@ -0,0 +1,230 @@
+"""
+Index, Details, Edit and Delete coverage built on the Create suite
+
+Every case accepted by the Create page leaves a record behind. Right after
+the redirect, while the browser is already on the Index page, CrudFlows
+looks up that record's ID and keeps it as a fixture. Once the Create cases
+have run, each fixture is exercised through the other operations in one
+pass, so every row is inserted only once:
+
+    Index    the record is listed
+    Details  the Details page shows the record's key value
+    Edit     the form is prefilled, an edit of one field is saved
+    Delete   the record is deleted and no longer listed
+
+Results are reported like Create cases, named <CASO>/<Operation>.
+
+With cleanup_only the fixtures are only deleted, without reporting, so a
+later run against the same database (another engine in --compare-engines)
+can create the same unique keys again.
+"""
+
+import logging
+import time
+
+from lazy_imports import LazyImport
+from log_config import CASE
+
+By = LazyImport('selenium.webdriver.common.by', 'By')
+
+OPERATIONS = ['Index', 'Details', 'Edit', 'Delete']
+
+# Returns the highest record ID linked from a table row containing arguments[0]
+FIND_RECORD_SCRIPT = """
+const key = arguments[0];
+const link = new RegExp('/' + arguments[1] + '/(?:Edit|Details|Delete)(?:/|\\\\?id=)(\\\\d+)', 'i');
+let best = null;
+for (const row of document.querySelectorAll('tr')) {
+    if (!row.textContent.includes(key)) { continue; }
+    for (const a of row.querySelectorAll('a[href]')) {
+        const match = a.getAttribute('href').match(link);
+        if (match && (best === null || Number(match[1]) > best)) { best = Number(match[1]); }
+    }
+}
+return best;
+"""
+
+# True if a table row containing arguments[0] links to record arguments[2]
+LISTED_SCRIPT = """
+const key = arguments[0];
+const link = new RegExp('/' + arguments[1] + '/(?:Edit|Details|Delete)(?:/|\\\\?id=)' + arguments[2]
+                        + '(?:$|[^\\\\d])', 'i');
+for (const row of document.querySelectorAll('tr')) {
+    if (!row.textContent.includes(key)) { continue; }
+    for (const a of row.querySelectorAll('a[href]')) {
+        if (link.test(a.getAttribute('href'))) { return true; }
+    }
+}
+return false;
+"""
+
+
+class Fixture:
+    """A record created by an accepted Create case"""
+
+    def __init__(self, caso, record_id, key, values):
+        self.caso = caso
+        self.record_id = record_id
+        self.key = key
+        self.values = values
+
+
+class CrudFlows:
+    """Collects fixtures during the Create run and exercises the other operations on them"""
+
+    def __init__(self, runner, cleanup_only=False):
+        self.runner = runner
+        self.cleanup_only = cleanup_only
+        self.fixtures = []
+
+    @property
+    def driver(self):
+        return self.runner.driver
+
+    def url(self, operation, record_id=None):
+        url = f"{self.runner.base_url}/{self.runner.CONTROLLER}/{operation}"
+        return f"{url}/{record_id}" if record_id is not None else url
+
+    def find_record_id(self, values):
+        """ID of the record listed on the current Index page, tried by each KEY_FIELDS value"""
+        for field in self.runner.KEY_FIELDS:
+            key = values.get(field)
+            if not key:
+                continue
+            record_id = self.driver.execute_script(FIND_RECORD_SCRIPT, key, self.runner.CONTROLLER)
+            if record_id is not None:
+                return record_id, key
+        return None, None
+
+    def is_listed(self, fixture):
+        """True if the current Index page lists fixture's record on a row showing its key"""
+        return bool(self.driver.execute_script(LISTED_SCRIPT, fixture.key, self.runner.CONTROLLER,
+                                               str(fixture.record_id)))
+
+    def capture(self, test_case):
+        """Called on the Index page right after an accepted Create"""
+        values = self.runner.field_values(test_case)
+        try:
+            record_id, key = self.find_record_id(values)
+        except Exception as e:
+            logging.warning(f"Could not look up record for {test_case.get('CASO')}: {str(e)}")
+            return
+        if record_id is None:
+            logging.warning(f"Created record for {test_case.get('CASO')} not found on Index page")
+            return
+        self.fixtures.append(Fixture(test_case.get('CASO'), record_id, key, values))
+        logging.debug("Fixture %s: %s #%s", test_case.get('CASO'), self.runner.CONTROLLER, record_id)
+
+    def click_submit(self):
+        """Submit the current form; Delete pages may lack the submit-button test id"""
+        from selenium.common.exceptions import NoSuchElementException
+
+        try:
+            self.runner.submit_form()
+        except NoSuchElementException:
+            self.driver.find_element(By.CSS_SELECTOR, "form [type='submit']").click()
+            time.sleep(2)
+
+    def page_text(self):
+        return self.driver.find_element(By.TAG_NAME, 'body').text
+
+    def check_index(self, fixture, result):
+        # Other cases may have created records with the same key; look for this one's ID
+        self.driver.get(self.url('Index'))
+        listed = self.is_listed(fixture)
+        result['notes'] = (f'Listed on Index page (#{fixture.record_id})' if listed
+                           else f'#{fixture.record_id} not listed on Index page')
+        return listed
+
+    def check_details(self, fixture, result):
+        self.driver.get(self.url('Details', fixture.record_id))
+        shown = fixture.key in self.page_text()
+        result['notes'] = 'Details page shows the record' if shown else f"Details page lacks '{fixture.key}'"
+        return shown
+
+    def check_edit(self, fixture, result):
+        self.driver.get(self.url('Edit', fixture.record_id))
+        field, testid, new_value = self.runner.EDIT_FIELD
+        for key_field in self.runner.KEY_FIELDS:
+            expected = fixture.values.get(key_field)
+            if not expected:
+                continue
+            element = self.driver.find_element(By.CSS_SELECTOR, f"[data-testid='{key_field.replace('_', '')}']")
+            if element.get_attribute('value') != expected:
+                result['notes'] = f"Edit form not prefilled: {key_field} is '{element.get_attribute('value')}'"
+                return False
+            break
+        element = self.driver.find_element(By.CSS_SELECTOR, f"[data-testid='{testid}']")
+        element.clear()
+        element.send_keys(new_value)
+        self.click_submit()
+        errors = self.runner.check_validation_errors()
+        if errors or not self.runner.is_on_index_page():
+            result['errors'] = errors
+            result['notes'] = f'Edit rejected: {errors}' if errors else 'Edit did not redirect to Index page'
+            return False
+        self.driver.get(self.url('Details', fixture.record_id))
+        saved = new_value in self.page_text()
+        fixture.values[field] = new_value
+        result['notes'] = f'Edited {field}' if saved else f'Edit of {field} not shown on Details page'
+        return saved
+
+    def check_delete(self, fixture, result):
+        self.driver.get(self.url('Delete', fixture.record_id))
+        self.click_submit()
+        if not self.runner.is_on_index_page():
+            result['notes'] = 'Delete did not redirect to Index page'
+            return False
+        listed = self.is_listed(fixture)
+        result['notes'] = 'Still listed after Delete' if listed else 'Deleted'
+        return not listed
+
+    def cleanup(self):
+        """Delete every fixture, logging the ones that could not be deleted"""
+        logging.info(f"\nDeleting the {len(self.fixtures)} records created by accepted cases")
+        for fixture in self.fixtures:
+            result = self.runner.new_result(f"{fixture.caso}/Delete", 'Aceptado')
+            try:
+                deleted = self.check_delete(fixture, result)
+            except Exception as e:
+                deleted = False
+                result['notes'] = f'Exception: {str(e)}'
+            if not deleted:
+                logging.warning(f"Could not delete the record created by {fixture.caso}: {result['notes']}")
+
+    def run(self):
+        """Exercise every fixture through Index, Details, Edit and Delete (only Delete with cleanup_only)"""
+        if self.cleanup_only:
+            self.cleanup()
+            return
+        checks = {
+            'Index': self.check_index,
+            'Details': self.check_details,
+            'Edit': self.check_edit,
+            'Delete': self.check_delete,
+        }
+        logging.info(f"\nRunning {len(OPERATIONS)} operations on {len(self.fixtures)} created records")
+        for fixture in self.fixtures:
+            skip = False
+            for operation in OPERATIONS:
+                if skip and operation != 'Delete':
+                    # Depends on the failed operation; still try to clean up
+                    continue
+                result = self.runner.new_result(f"{fixture.caso}/{operation}", 'Aceptado')
+                started = time.perf_counter()
+                try:
+                    passed = checks[operation](fixture, result)
+                    result['actual'] = 'Aceptado' if passed else 'Rechazado'
+                    result['passed'] = passed
+                except Exception as e:
+                    logging.error(f"Exception in {result['caso']}: {str(e)}")
+                    result['actual'] = 'Error'
+                    result['notes'] = f'Exception: {str(e)}'
+                result['attempts'] = 1
+                result['duration'] = time.perf_counter() - started
+                logging.log(CASE, "%s: %s - %s", result['caso'],
+                            "✓ PASSED" if result['passed'] else "✗ FAILED", result['notes'],
+                            extra={'event': 'case', 'entity': self.runner.ENTITY, 'caso': result['caso'],
+                                   'passed': result['passed'], 'duration': round(result['duration'], 4)})
+                self.runner.record_result(result)
+                skip = skip or not result['passed']
@@ -4,35 +4,43 @@ Using Selenium WebDriver with Python
 
 Test Cases: 21 tests based on pairwise equivalence class partitioning
 Date: October 20, 2025
+
+An optional 'Libro' CSV column selects a specific book by option value or title;
+when it is empty the first book in the dropdown is used.
 """
 
-import csv
-import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import Select
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ejemplar_tests.log'),
-        logging.StreamHandler()
-    ]
-)
+from base_runner import BaseTestRunner, BASE_URL, By
+from lazy_imports import LazyImport
+from log_config import configure_logging
 
-BASE_URL = "http://localhost:5183"  
 CREATE_URL = f"{BASE_URL}/Ejemplar/Create"
 INDEX_URL = f"{BASE_URL}/Ejemplar/Index"
-WAIT_TIMEOUT = 10
+
+Select = LazyImport('selenium.webdriver.support.ui', 'Select')
+
+# Reads every option of the idlibro dropdown in one WebDriver round trip
+LIBRO_OPTIONS_SCRIPT = """
+const select = document.querySelector("[data-testid='idlibro']");
+if (!select) { return []; }
+return Array.from(select.options, o => [o.value, o.text]);
+"""
+
+SELECT_VALUE_SCRIPT = """
+arguments[0].value = arguments[1];
+arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
+"""
+
+
+def libro_lookup(options):
+    """Option value -> value and lowercased book title -> value, for (value, text) options"""
+    lookup = {}
+    for value, text in options:
+        lookup.setdefault(value, value)
+        lookup.setdefault(text.strip().lower(), value)
+    return lookup
+
 
 VALIDATIONS = {
     'idlibro': {
@@ -76,76 +84,115 @@ VALIDATIONS = {
 }
 
 
-class EjemplarTestRunner:
+class EjemplarTestRunner(BaseTestRunner):
     """Test runner for Ejemplar CRUD automated tests"""
     
-    def __init__(self, base_url=BASE_URL):
-        self.base_url = base_url
-        self.driver = None
-        self.wait = None
-        self.test_results = []
-        
-    def setup(self):
-        """Initialize WebDriver"""
-        logging.info("Setting up WebDriver...")
-        options = webdriver.FirefoxOptions()
-        options.add_argument('--width=1920')
-        options.add_argument('--height=1080')
-        
-        service = FirefoxService(GeckoDriverManager().install())
-        self.driver = webdriver.Firefox(service=service, options=options)
-        self.wait = WebDriverWait(self.driver, WAIT_TIMEOUT)
-        logging.info("WebDriver initialized successfully")
+    ENTITY = 'Ejemplar'
+    CONTROLLER = 'Ejemplar'
+    EXPECTED_COLUMN = 'Resultado Esperado'
+    RESULTS_FILE = 'ejemplar_test_results.csv'
+    LOG_FILE = 'ejemplar_tests.log'
+    DEFAULT_CSV = 'BLACKBOX_BIBLIOTECA - EJEMPLAR_TESTS.csv'
+    ERROR_FIELDS = ['idlibro', 'descripcion', 'observaciones', 'fechaadquisicion', 'disponible']
+    VALIDATIONS = VALIDATIONS
+    FIELD_COLUMNS = {
+        'descripcion': 'Descripcion',
+        'observaciones': 'Observaciones',
+        'fecha_adquisicion': 'Fecha de adquisicion',
+        'disponible': 'Disponible'
+    }
+    KEY_FIELDS = ['descripcion', 'observaciones']
+    EDIT_FIELD = ('observaciones', 'observaciones', 'Revisado en prueba de edición')
+    
+    def __init__(self, base_url=BASE_URL, **kwargs):
+        super().__init__(base_url=base_url, **kwargs)
+        self.libro_options = None
+        self.libro_lookup = {}
         
-    def teardown(self):
-        """Close WebDriver"""
-        if self.driver:
-            logging.info("Closing WebDriver...")
-            self.driver.quit()
-            
-    def parse_test_value(self, value):
+    def load_libro_options(self):
+        """
+        Read the idlibro dropdown in a single script call (option by option without scripts) and cache it
+        Returns: list of (value, text) tuples, placeholder excluded
         """
-        Parse test values from CSV format
-        Examples:
-        - "A" x 200 -> "AAAA..." (200 times)
-        - "Ejemplar en buen estado" -> "Ejemplar en buen estado"
-        - "" -> ""
+        if self.javascript:
+            options = self.driver.execute_script(LIBRO_OPTIONS_SCRIPT)
+        else:
+            select = self.driver.find_elements(By.CSS_SELECTOR, "[data-testid='idlibro']")
+            options = [(option.get_attribute('value') or '', option.text)
+                       for option in (Select(select[0]).options if select else [])]
+        self.libro_options = [(value, text) for value, text in options if value]
+        self.libro_lookup = libro_lookup(self.libro_options)
+        logging.debug("Cached %s book options", len(self.libro_options))
+        return self.libro_options
+    
+    def resolve_libro_value(self, libro):
+        """
+        Resolve a CSV libro reference (option value or book title) to an option value
+        An empty reference resolves to the first book in the dropdown
         """
-        if not value or value.strip() == '""':
-            return ""
+        if self.libro_options is None:
+            self.load_libro_options()
             
-        value = value.strip().strip('"')
+        if not libro:
+            return self.libro_options[0][0] if self.libro_options else None
         
-        if ' x ' in value:
-            parts = value.split(' x ')
-            if len(parts) == 2:
-                char = parts[0].strip().strip('"')
-                try:
-                    count = int(parts[1].strip())
-                    return char * count
-                except ValueError:
-                    pass
-                    
+        key = libro.strip().lower()
+        value = self.libro_lookup.get(key)
+        if value is None:
+            # The book list may have changed since it was cached
+            self.load_libro_options()
+            value = self.libro_lookup.get(key)
         return value
     
-    def navigate_to_create_page(self):
-        """Navigate to the Create Ejemplar page"""
-        logging.info(f"Navigating to {CREATE_URL}")
-        self.driver.get(CREATE_URL)
-        time.sleep(1) 
-        
+    def select_libro(self, libro=''):
+        """Select a book in the idlibro dropdown by value, without scanning its options"""
         try:
-            select = Select(self.driver.find_element(By.CSS_SELECTOR, "[data-testid='idlibro']"))
-            options = select.options
-            if len(options) > 1: 
-                select.select_by_index(1)
-                logging.debug("Selected first book from dropdown")
+            value = self.resolve_libro_value(libro)
+            if value is None:
+                logging.error(f"Book not found in dropdown: {libro or '(first book)'}")
+                return
+            element = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='idlibro']")
+            if self.javascript:
+                self.driver.execute_script(SELECT_VALUE_SCRIPT, element, value)
+            else:
+                Select(element).select_by_value(value)
+            logging.debug("Selected book from dropdown (value: %s)", value)
         except Exception as e:
             logging.error(f"Error selecting book: {str(e)}")
         
+    def form_values(self, test_case, form=None):
+        """
+        Values keyed by data-testid; Disponible and Libro mapped like fill_form does
+        Libro is resolved against the form's idlibro options (value or title); when it is
+        empty the form posts the first book
+        """
+        values = super().form_values(test_case, form)
+        values['disponible'] = 'false' if values.get('disponible') == 'No Disponible' else 'true'
+        libro = self.parse_test_value(test_case.get('Libro', ''))
+        if libro and form is not None:
+            value = libro_lookup(form.choices('idlibro')).get(libro.strip().lower())
+            if value is None:
+                logging.error(f"Book not found in dropdown: {libro}")
+            libro = value or libro
+        values['idlibro'] = libro
+        return values
+    
+    def seed_case(self, n):
+        """A valid, unique CSV row for bulk seeding (record number n)"""
+        return {
+            'CASO': f'SEED{n}',
+            'Descripcion': f'Ejemplar de carga {n}',
+            'Observaciones': '',
+            'Fecha de adquisicion': '2023-01-15',
+            'Disponible': 'Disponible',
+            'Resultado Esperado': 'Aceptado'
+        }
+    
     def fill_form(self, test_data):
         """Fill the form with test data"""
-        logging.info(f"Filling form with data: {test_data}")
+        logging.debug("Filling form with data: %s", test_data)
+        
+        self.select_libro(self.parse_test_value(test_data.get('Libro', '')))
         
         descripcion = self.parse_test_value(test_data.get('Descripcion', ''))
         observaciones = self.parse_test_value(test_data.get('Observaciones', ''))
@@ -156,217 +203,30 @@ class EjemplarTestRunner:
             field = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='descripcion']")
             field.clear()
             field.send_keys(descripcion)
-            logging.debug(f"Descripcion: {descripcion}")
+            logging.debug("Descripcion: %s", descripcion)
             
         if observaciones:
             field = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='observaciones']")
             field.clear()
             field.send_keys(observaciones)
-            logging.debug(f"Observaciones: {observaciones}")
+            logging.debug("Observaciones: %s", observaciones)
             
         if fecha_adquisicion:
             field = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='fechaadquisicion']")
             field.clear()
             field.send_keys(fecha_adquisicion)
-            logging.debug(f"Fecha de Adquisicion: {fecha_adquisicion}")
+            logging.debug("Fecha de Adquisicion: %s", fecha_adquisicion)
             
         if disponible:
             select = Select(self.driver.find_element(By.CSS_SELECTOR, "[data-testid='disponible']"))
             value = 'false' if disponible == 'No Disponible' else 'true'
             select.select_by_value(value)
-            logging.debug(f"Disponible: {disponible} (value: {value})")
-    
-    def submit_form(self):
-        """Submit the form"""
-        logging.info("Submitting form...")
-        submit_button = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='submit-button']")
-        submit_button.click()
-        time.sleep(2)  
-        
-    def check_validation_errors(self):
-        """
-        Check for validation error messages
-        Returns: dict with field names as keys and error messages as values
-        """
-        errors = {}
-        
-        error_fields = ['idlibro', 'descripcion', 'observaciones', 'fechaadquisicion', 'disponible']
-        
-        for field in error_fields:
-            try:
-                error_element = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    f"[data-testid='{field}-error']"
-                )
-                error_text = error_element.text.strip()
-                if error_text:
-                    errors[field] = error_text
-                    logging.debug(f"Error found in {field}: {error_text}")
-            except NoSuchElementException:
-                continue
-                
-        return errors
-    
-    def is_on_index_page(self):
-        """Check if redirected to Index page (success)"""
-        try:
-            current_url = self.driver.current_url
-            is_index = '/Ejemplar/Index' in current_url or current_url.endswith('/Ejemplar')
-            return is_index
-        except:
-            return False
-    
-    def determine_actual_result(self, has_errors, on_index):
-        """Determine if test should pass or fail"""
-        if on_index and not has_errors:
-            return "Aceptado"
-        else:
-            return "Rechazado"
-    
-    def run_test_case(self, test_case):
-        """
-        Run a single test case
-        Returns: dict with test results
-        """
-        caso = test_case.get('CASO', 'Unknown')
-        expected = test_case.get('Resultado Esperado', '').strip()
-        
-        logging.info(f"\n{'='*60}")
-        logging.info(f"Running Test Case: {caso}")
-        logging.info(f"Expected Result: {expected}")
-        logging.info(f"{'='*60}")
-        
-        result = {
-            'caso': caso,
-            'expected': expected,
-            'actual': '',
-            'passed': False,
-            'errors': [],
-            'notes': ''
-        }
-        
-        try:
-            self.navigate_to_create_page()
-            
-            self.fill_form(test_case)
-            
-            self.submit_form()
+            logging.debug("Disponible: %s (value: %s)", disponible, value)
 
-            errors = self.check_validation_errors()
-            
-            on_index = self.is_on_index_page()
-            
 
-            actual = self.determine_actual_result(len(errors) > 0, on_index)
-            
-            result['actual'] = actual
-            result['errors'] = errors
-            result['passed'] = (actual == expected)
-            
-            if on_index:
-                result['notes'] = 'Redirected to Index page (creation successful)'
-            elif errors:
-                error_summary = ', '.join([f"{field}: {msg}" for field, msg in errors.items()])
-                result['notes'] = f'Validation errors: {error_summary}'
-            else:
-                result['notes'] = 'Stayed on Create page, but no errors detected'
-            
-            status = "✓ PASSED" if result['passed'] else "✗ FAILED"
-            logging.info(f"Result: {status}")
-            logging.info(f"Expected: {expected}, Actual: {actual}")
-            if errors:
-                logging.info(f"Errors: {errors}")
-            logging.info(f"Notes: {result['notes']}")
-            
-        except Exception as e:
-            logging.error(f"Exception in test {caso}: {str(e)}")
-            result['actual'] = 'Error'
-            result['passed'] = False
-            result['notes'] = f'Exception: {str(e)}'
-            
-        self.test_results.append(result)
-        return result
-    
-    def run_all_tests(self, csv_file_path):
-        """
-        Run all test cases from CSV file
-        """
-        logging.info(f"Loading test cases from: {csv_file_path}")
-        
-        try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                test_cases = list(reader)
-            
-                test_cases = [tc for tc in test_cases if tc.get('CASO')]
-                
-            logging.info(f"Loaded {len(test_cases)} test cases")
-            
-            self.setup()
-
-            for i, test_case in enumerate(test_cases, 1):
-                logging.info(f"\nTest {i}/{len(test_cases)}")
-                self.run_test_case(test_case)
-                time.sleep(1)  
-                
-        except FileNotFoundError:
-            logging.error(f"CSV file not found: {csv_file_path}")
-            raise
-        except Exception as e:
-            logging.error(f"Error running tests: {str(e)}")
-            raise
-        finally:
-            self.teardown()
-            
-    def generate_report(self, output_file='ejemplar_test_results.csv'):
-        """Generate test results report"""
-        logging.info(f"\nGenerating report: {output_file}")
-        
-        total = len(self.test_results)
-        passed = sum(1 for r in self.test_results if r['passed'])
-        failed = total - passed
-        pass_rate = (passed / total * 100) if total > 0 else 0
-        
-        with open(output_file, 'w', newline='', encoding='utf-8') as file:
-            fieldnames = ['caso', 'expected', 'actual', 'passed', 'notes']
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for result in self.test_results:
-                writer.writerow({
-                    'caso': result['caso'],
-                    'expected': result['expected'],
-                    'actual': result['actual'],
-                    'passed': 'PASS' if result['passed'] else 'FAIL',
-                    'notes': result['notes']
-                })
-        logging.info("\n" + "="*60)
-        logging.info("TEST EXECUTION SUMMARY")
-        logging.info("="*60)
-        logging.info(f"Total Tests: {total}")
-        logging.info(f"Passed: {passed} ({pass_rate:.1f}%)")
-        logging.info(f"Failed: {failed} ({100-pass_rate:.1f}%)")
-        logging.info("="*60)
-        
-        if failed > 0:
-            logging.info("\nFAILED TESTS:")
-            for result in self.test_results:
-                if not result['passed']:
-                    logging.info(f"  - {result['caso']}: Expected '{result['expected']}', Got '{result['actual']}'")
-                    logging.info(f"    Notes: {result['notes']}")
-        
-        logging.info(f"\nDetailed results saved to: {output_file}")
-        
-        return {
-            'total': total,
-            'passed': passed,
-            'failed': failed,
-            'pass_rate': pass_rate
-        }
-
-
-def main():
+def main(fail_fast=False):
     """Main function to run the test suite"""
+    configure_logging(EjemplarTestRunner.LOG_FILE)
     print("="*60)
     print("EJEMPLAR CRUD - AUTOMATED BLACK BOX TESTING")
     print("Selenium WebDriver + Python")
@@ -375,28 +235,28 @@ def main():
     
     csv_file = 'BLACKBOX_BIBLIOTECA - EJEMPLAR_TESTS.csv'
     
-    # Ask user for CSV file path
     user_input = input(f"Enter CSV file path (default: {csv_file}): ").strip()
     if user_input:
         csv_file = user_input
-
+    
     url_input = input(f"Enter application URL (default: {BASE_URL}): ").strip()
     base_url = url_input if url_input else BASE_URL
     
     print(f"\nTest Configuration:")
     print(f"  - CSV File: {csv_file}")
     print(f"  - Base URL: {base_url}")
+    print(f"  - Fail fast: {'yes' if fail_fast else 'no'}")
     print(f"  - Create URL: {base_url}/Ejemplar/Create")
     print()
     
     input("Press Enter to start testing...")
     
-    runner = EjemplarTestRunner(base_url=base_url)
+    runner = EjemplarTestRunner(base_url=base_url, fail_fast=fail_fast)
     
     try:
         runner.run_all_tests(csv_file)
         
-        stats = runner.generate_report('ejemplar_test_results.csv')
+        stats = runner.generate_report()
         
         print("\n" + "="*60)
         print("TESTING COMPLETED!")
@@ -405,7 +265,7 @@ def main():
         print(f"Logs saved to: ejemplar_tests.log")
         print()
         
-        return stats['passed'] == stats['total'] 
+        return stats['blocking_failed'] == 0
         
     except Exception as e:
         logging.error(f"Test execution failed: {str(e)}")
@@ -414,5 +274,5 @@ def main():
 
 if __name__ == "__main__":
     import sys
-    success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    success = main(fail_fast='--fail-fast' in sys.argv[1:])
+    sys.exit(0 if success else 1)
@@ -0,0 +1,166 @@
+"""
+Expected-error assertions against the VALIDATIONS model
+
+compile_matcher() turns an entity's VALIDATIONS dict into an ErrorMatcher
+once: patterns are compiled and every error_messages entry is normalized
+(case, accents, whitespace, trailing punctuation). For a test row the
+matcher predicts which rules each field violates and checks that the
+message harvested from [data-testid='<field>-error'] is one of the
+messages expected for those rules, reporting mismatches per field.
+"""
+
+import re
+import unicodedata
+from datetime import date, datetime
+
+DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y']
+
+# Rules that depend on data already stored, so they cannot be predicted from the row
+UNPREDICTABLE_RULES = {'duplicate'}
+
+_matchers = {}
+
+
+def normalize_message(message):
+    """Case, accent and whitespace insensitive form of an error message"""
+    text = unicodedata.normalize('NFKD', message)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'\s+', ' ', text).strip().rstrip('.!').strip()
+    return text.casefold()
+
+
+def error_testid(field):
+    """VALIDATIONS key -> data-testid prefix: fecha_publicacion -> fechapublicacion"""
+    return field.replace('_', '')
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class FieldRules:
+    """Precompiled rules and normalized messages for one field"""
+
+    def __init__(self, field, rules):
+        self.field = field
+        self.testid = error_testid(field)
+        self.required = rules.get('required', False)
+        self.min_length = rules.get('min_length')
+        self.max_length = rules.get('max_length')
+        self.pattern = re.compile(rules['pattern']) if 'pattern' in rules else None
+        self.min_year = rules.get('min_year')
+        self.values = rules.get('values')
+        self.messages = dict(rules.get('error_messages', {}))
+        self.normalized = {rule: normalize_message(message) for rule, message in self.messages.items()}
+
+    def violations(self, value, today=None):
+        """Rules broken by value, in the order the model declares them"""
+        if not value:
+            return ['required'] if self.required else []
+        broken = []
+        if ((self.min_length is not None and len(value) < self.min_length) or
+                (self.max_length is not None and len(value) > self.max_length)):
+            broken.append('length')
+        if self.pattern is not None and not self.pattern.fullmatch(value):
+            broken.append('pattern')
+        if 'future' in self.messages or self.min_year is not None:
+            parsed = parse_date(value)
+            if parsed is not None:
+                if 'future' in self.messages and parsed > (today or date.today()):
+                    broken.append('future')
+                if self.min_year is not None and parsed.year < self.min_year:
+                    broken.append('min_year')
+        return [rule for rule in broken if rule in self.messages]
+
+    def equivalence_class(self, value, today=None):
+        """
+        'empty', the violated rules joined by '+', or 'valid'
+        A field with enumerated values has one class per allowed value ('other' for the rest)
+        """
+        if not value:
+            return 'empty'
+        broken = self.violations(value, today)
+        if broken:
+            return '+'.join(broken)
+        if self.values:
+            return value if value in self.values else 'other'
+        return 'valid'
+
+    def rule_for_message(self, message):
+        """Rule whose expected message matches message, or None"""
+        normalized = normalize_message(message)
+        for rule, expected in self.normalized.items():
+            if normalized == expected:
+                return rule
+        return None
+
+
+class ErrorMatcher:
+    """Checks harvested error messages against the expected ones for each violated rule"""
+
+    def __init__(self, validations):
+        self.fields = {field: FieldRules(field, rules) for field, rules in validations.items()}
+        self.by_testid = {rules.testid: rules for rules in self.fields.values()}
+
+    def predict(self, values, today=None):
+        """field -> list of violated rules, for the fields that break at least one"""
+        predicted = {}
+        for field, rules in self.fields.items():
+            if field not in values:
+                continue
+            broken = rules.violations(values[field], today)
+            if broken:
+                predicted[field] = broken
+        return predicted
+
+    def signature(self, values, today=None):
+        """
+        Equivalence class of each field in values, as a tuple of (field, class) pairs
+        Fields without rules in the model are classed by their value; the 'future'
+        class of a date depends on today (default: the current date)
+        """
+        return tuple((field, self.fields[field].equivalence_class(value, today) if field in self.fields
+                      else value or 'empty')
+                     for field, value in values.items())
+
+    def check(self, values, errors, today=None):
+        """
+        Compare harvested errors (testid -> message) with the rules values violate
+        values: VALIDATIONS field -> parsed input value
+        Returns: dict testid -> mismatch description (empty when everything matches)
+        """
+        mismatches = {}
+        predicted = self.predict(values, today)
+
+        for field, broken in predicted.items():
+            rules = self.fields[field]
+            expected = [rules.messages[rule] for rule in broken]
+            actual = errors.get(rules.testid)
+            if actual is None:
+                mismatches[rules.testid] = f"missing error, expected '{expected[0]}'"
+            elif rules.rule_for_message(actual) not in broken:
+                mismatches[rules.testid] = (f"expected {' or '.join(repr(m) for m in expected)}, "
+                                            f"got '{actual}'")
+
+        for testid, actual in errors.items():
+            rules = self.by_testid.get(testid)
+            if rules is None or rules.field in predicted:
+                continue
+            if rules.rule_for_message(actual) in UNPREDICTABLE_RULES:
+                continue
+            mismatches[testid] = f"unexpected error '{actual}'"
+
+        return mismatches
+
+
+def compile_matcher(validations):
+    """ErrorMatcher for a VALIDATIONS dict, compiled once per process"""
+    key = id(validations)
+    if key not in _matchers:
+        _matchers[key] = ErrorMatcher(validations)
+    return _matchers[key]
@@ -0,0 +1,162 @@
+"""
+Retry policy, flakiness tracking and quarantine for the black box runners
+
+Only infrastructure errors (timeouts, lost browser sessions, refused
+connections) are retried. An assertion mismatch - actual result different
+from the expected one - is never retried, it is a real failure.
+
+Every run records one outcome per CASO in flaky_history.json. The flakiness
+score of a case is the fraction of its recent runs that were unstable:
+the outcome flipped with respect to the previous run, or the case only
+passed after a retry. Cases listed in quarantine.txt, or whose score reaches
+the threshold, run in a separate lane whose failures do not block the run.
+"""
+
+import json
+import logging
+import os
+import socket
+import time
+import urllib.error
+
+HISTORY_FILE = 'flaky_history.json'
+QUARANTINE_FILE = 'quarantine.txt'
+HISTORY_WINDOW = 20
+FLAKY_THRESHOLD = 0.3
+MIN_RUNS_FOR_SCORE = 3
+
+# Matched by class name so this module does not need to import selenium
+INFRASTRUCTURE_ERRORS = {
+    'TimeoutException',
+    'WebDriverException',
+    'SessionNotCreatedException',
+    'InvalidSessionIdException',
+    'NoSuchWindowException',
+    'StaleElementReferenceException',
+}
+DETERMINISTIC_ERRORS = {
+    'NoSuchElementException',
+    'InvalidSelectorException',
+    'UnexpectedTagNameException',
+}
+
+
+def is_infrastructure_error(exc):
+    """Return True for errors worth retrying (not caused by the system under test)"""
+    if isinstance(exc, (ConnectionError, TimeoutError, socket.timeout, urllib.error.URLError)):
+        return True
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & DETERMINISTIC_ERRORS:
+        return False
+    return bool(names & INFRASTRUCTURE_ERRORS)
+
+
+class RetryPolicy:
+    """Number of retries and exponential backoff between attempts"""
+
+    def __init__(self, retries=2, backoff=1.0, factor=2.0, max_delay=30.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.factor = factor
+        self.max_delay = max_delay
+
+    @property
+    def max_attempts(self):
+        return self.retries + 1
+
+    def should_retry(self, exc, attempt):
+        """attempt is 1-based; True if another attempt should be made after exc"""
+        return attempt < self.max_attempts and is_infrastructure_error(exc)
+
+    def delay(self, attempt):
+        """Seconds to wait after the given failed attempt"""
+        return min(self.backoff * (self.factor ** (attempt - 1)), self.max_delay)
+
+    def wait(self, attempt):
+        delay = self.delay(attempt)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FlakeTracker:
+    """Per-CASO outcome history across runs, flakiness score and quarantine list"""
+
+    def __init__(self, entity, history_file=HISTORY_FILE, quarantine_file=QUARANTINE_FILE,
+                 threshold=FLAKY_THRESHOLD, window=HISTORY_WINDOW):
+        self.entity = entity
+        self.history_file = history_file
+        self.quarantine_file = quarantine_file
+        self.threshold = threshold
+        self.window = window
+        self.history = self._load_history()
+        self.quarantine = self._load_quarantine()
+
+    def _load_history(self):
+        if not self.history_file or not os.path.exists(self.history_file):
+            return {}
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable flake history {self.history_file}: {str(e)}")
+            return {}
+
+    def _load_quarantine(self):
+        """
+        Read the manual quarantine list
+        One CASO per line, optionally prefixed with the entity (Libro:LIB7); # starts a comment
+        """
+        cases = set()
+        if not self.quarantine_file or not os.path.exists(self.quarantine_file):
+            return cases
+        with open(self.quarantine_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                if ':' in line:
+                    entity, caso = line.split(':', 1)
+                    if entity.strip().lower() != self.entity.lower():
+                        continue
+                    line = caso.strip()
+                cases.add(line)
+        return cases
+
+    def outcomes(self, caso):
+        return self.history.get(self.entity, {}).get(caso, [])
+
+    def score(self, caso):
+        """Fraction of recent runs that were unstable, between 0 and 1"""
+        runs = self.outcomes(caso)
+        if len(runs) < MIN_RUNS_FOR_SCORE:
+            return 0.0
+        unstable = sum(1 for run in runs if run == 'retried')
+        previous = None
+        for run in runs:
+            outcome = 'pass' if run in ('pass', 'retried') else 'fail'
+            if previous is not None and outcome != previous:
+                unstable += 1
+            previous = outcome
+        return min(unstable / len(runs), 1.0)
+
+    def is_quarantined(self, caso):
+        return caso in self.quarantine or self.score(caso) >= self.threshold
+
+    def record(self, caso, passed, attempts):
+        """Append this run's outcome for caso"""
+        if passed:
+            outcome = 'retried' if attempts > 1 else 'pass'
+        else:
+            outcome = 'fail'
+        runs = self.history.setdefault(self.entity, {}).setdefault(caso, [])
+        runs.append(outcome)
+        del runs[:-self.window]
+
+    def save(self):
+        if not self.history_file:
+            return
+        # Other entities may have written the file since it was loaded
+        merged = self._load_history()
+        merged[self.entity] = self.history.get(self.entity, {})
+        with open(self.history_file, 'w', encoding='utf-8') as file:
+            json.dump(merged, file, indent=2, ensure_ascii=False)
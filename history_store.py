@@ -0,0 +1,319 @@
+"""
+Historical results store (SQLite) with pass-rate and latency trend reports
+
+Every run appends its cases to test_history.db, keyed by run ID, entity and
+CASO, with the duration of each phase (navigate, fill, submit, check) and
+the request times alone: load (GET Create until the page is ready) and
+post (submit click until the response page is loaded). The phases include
+the runner's fixed settle sleeps and warm-reset work; the request times do
+not.
+
+Every reporter of a process writing the same database file shares one
+connection (SharedWriter), so suites running at once - several base URLs,
+several entities - batch their inserts into the same transactions instead
+of locking each other out. Other processes wait up to BUSY_TIMEOUT seconds.
+
+Usage:
+    python history_store.py trends [--entity Libro] [--last 10]
+    python history_store.py slowdowns [--entity Libro] [--baseline BUILD] [--candidate BUILD]
+
+slowdowns compares the latency of the Create endpoints - GET (load) and
+POST (post) - between two builds with a one-sided Mann-Whitney U
+test and flags the ones that got significantly slower.
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+
+HISTORY_DB = 'test_history.db'
+PHASES = ['navigate', 'fill', 'submit', 'check']
+REQUEST_PHASES = ['load', 'post']
+CREATE_ENDPOINTS = {'load': 'GET Create', 'post': 'POST Create'}
+COMMIT_EVERY = 50
+BUSY_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    entity TEXT NOT NULL,
+    build TEXT,
+    started_at TEXT,
+    base_url TEXT,
+    engine TEXT
+);
+CREATE TABLE IF NOT EXISTS case_results (
+    run_id TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    caso TEXT NOT NULL,
+    expected TEXT,
+    actual TEXT,
+    passed INTEGER NOT NULL,
+    attempts INTEGER,
+    duration REAL,
+    navigate REAL,
+    fill REAL,
+    submit REAL,
+    "check" REAL,
+    load REAL,
+    post REAL,
+    PRIMARY KEY (run_id, entity, caso)
+);
+CREATE INDEX IF NOT EXISTS idx_case_results_entity_caso ON case_results (entity, caso);
+CREATE INDEX IF NOT EXISTS idx_runs_entity_started ON runs (entity, started_at);
+"""
+
+
+def connect(db_path=HISTORY_DB):
+    connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    connection.executescript(SCHEMA)
+    # Stores created before the request times were kept
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(case_results)")}
+    for phase in REQUEST_PHASES:
+        if phase not in columns:
+            connection.execute(f"ALTER TABLE case_results ADD COLUMN {phase} REAL")
+    return connection
+
+
+class SharedWriter:
+    """One connection to a history database for every reporter of the process writing it"""
+
+    writers = {}
+    writers_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self.key = os.path.abspath(db_path)
+        self.connection = connect(db_path)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.users = 0
+
+    @classmethod
+    def open(cls, db_path):
+        key = os.path.abspath(db_path)
+        with cls.writers_lock:
+            writer = cls.writers.get(key)
+            if writer is None:
+                writer = cls.writers[key] = cls(db_path)
+            writer.users += 1
+        return writer
+
+    def written(self):
+        """Count one insert, committing every COMMIT_EVERY; called with lock held"""
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.connection.commit()
+            self.pending = 0
+
+    def release(self):
+        with self.writers_lock:
+            self.users -= 1
+            last = self.users == 0
+            if last:
+                del self.writers[self.key]
+        with self.lock:
+            self.connection.commit()
+            self.pending = 0
+            if last:
+                self.connection.close()
+
+
+class HistoryReporter:
+    """Appends each finished case to the history store; same interface as the report writers"""
+
+    def __init__(self, db_path, metadata):
+        self.metadata = metadata
+        self.writer = SharedWriter.open(db_path)
+        self.lock = self.writer.lock
+        self.connection = self.writer.connection
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO runs (run_id, entity, build, started_at, base_url, engine) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (metadata['run_id'], metadata['entity'], metadata.get('build') or metadata['run_id'],
+                 metadata['started_at'], metadata.get('base_url'), metadata.get('engine')))
+            self.connection.commit()
+            self.writer.pending = 0
+
+    def case(self, result):
+        phases = result.get('phases') or {}
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO case_results (run_id, entity, caso, expected, actual, passed, '
+                'attempts, duration, navigate, fill, submit, "check", load, post) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.metadata['run_id'], self.metadata['entity'], result['caso'], result['expected'],
+                 result['actual'], int(result['passed']), result.get('attempts', 1),
+                 result.get('duration'), *(phases.get(phase) for phase in PHASES + REQUEST_PHASES)))
+            self.writer.written()
+
+    def close(self):
+        self.writer.release()
+
+
+def mann_whitney_greater(baseline, candidate):
+    """
+    One-sided Mann-Whitney U test that candidate values tend to be larger than baseline
+    Normal approximation with tie correction; returns the p-value
+    """
+    n1, n2 = len(baseline), len(candidate)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    combined = sorted([(value, 0) for value in baseline] + [(value, 1) for value in candidate])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tied = j - i + 1
+        tie_term += tied ** 3 - tied
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0
+    if variance <= 0:
+        return 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def builds(connection, entity):
+    """Builds of entity, oldest first"""
+    rows = connection.execute(
+        "SELECT build, MIN(rowid) FROM runs WHERE entity = ? GROUP BY build ORDER BY MIN(rowid)",
+        (entity,))
+    return [build for build, _ in rows]
+
+
+def entities(connection):
+    return [entity for (entity,) in connection.execute("SELECT DISTINCT entity FROM runs ORDER BY entity")]
+
+
+def phase_samples(connection, entity, build, phase):
+    rows = connection.execute(
+        f'SELECT c."{phase}" FROM case_results c JOIN runs r ON r.run_id = c.run_id '
+        f'WHERE r.entity = ? AND r.build = ? AND c."{phase}" IS NOT NULL',
+        (entity, build))
+    return [value for (value,) in rows]
+
+
+def print_trends(connection, entity_filter=None, last=10):
+    for entity in entities(connection):
+        if entity_filter and entity.lower() != entity_filter.lower():
+            continue
+        rows = connection.execute(
+            'SELECT r.run_id, r.build, r.started_at, COUNT(*), SUM(c.passed) '
+            'FROM runs r JOIN case_results c ON c.run_id = r.run_id '
+            'WHERE r.entity = ? GROUP BY r.run_id ORDER BY r.rowid DESC LIMIT ?',
+            (entity, last)).fetchall()
+        print("\n" + "="*60)
+        print(f"{entity.upper()} - last {len(rows)} runs")
+        print("="*60)
+        print(f"{'started':<20} {'build':<24} {'pass rate':>10} " +
+              ' '.join(f"{phase + ' p50':>13}" for phase in PHASES))
+        for run_id, build, started_at, total, passed in reversed(rows):
+            medians = []
+            for phase in PHASES:
+                values = [value for (value,) in connection.execute(
+                    f'SELECT "{phase}" FROM case_results WHERE run_id = ? AND "{phase}" IS NOT NULL',
+                    (run_id,))]
+                medians.append(f"{statistics.median(values):12.3f}s" if values else f"{'-':>13}")
+            print(f"{started_at:<20} {str(build)[:24]:<24} {passed / total * 100:9.1f}% " + ' '.join(medians))
+
+
+def find_slowdowns(connection, entity, baseline=None, candidate=None, alpha=0.05, min_increase=0.05):
+    """
+    Compare Create endpoint latency between two builds (default: the last two)
+    Returns: list of dicts, one per endpoint, with medians, p-value and a slower flag
+    """
+    known = builds(connection, entity)
+    if candidate is None:
+        candidate = known[-1] if known else None
+    if baseline is None:
+        earlier = [build for build in known if build != candidate]
+        baseline = earlier[-1] if earlier else None
+    if baseline is None or candidate is None:
+        return []
+
+    findings = []
+    for phase, endpoint in CREATE_ENDPOINTS.items():
+        before = phase_samples(connection, entity, baseline, phase)
+        after = phase_samples(connection, entity, candidate, phase)
+        if not before or not after:
+            continue
+        before_median = statistics.median(before)
+        after_median = statistics.median(after)
+        p_value = mann_whitney_greater(before, after)
+        increase = (after_median - before_median) / before_median if before_median else 0.0
+        findings.append({
+            'entity': entity,
+            'endpoint': endpoint,
+            'baseline': baseline,
+            'candidate': candidate,
+            'baseline_median': before_median,
+            'candidate_median': after_median,
+            'increase': increase,
+            'p_value': p_value,
+            'slower': p_value < alpha and increase >= min_increase,
+        })
+    return findings
+
+
+def print_slowdowns(connection, entity_filter=None, baseline=None, candidate=None, alpha=0.05):
+    """Print the comparison; returns True if any Create endpoint got significantly slower"""
+    any_slower = False
+    for entity in entities(connection):
+        if entity_filter and entity.lower() != entity_filter.lower():
+            continue
+        findings = find_slowdowns(connection, entity, baseline, candidate, alpha)
+        if not findings:
+            print(f"{entity}: not enough builds to compare")
+            continue
+        print(f"\n{entity}: {findings[0]['baseline']} -> {findings[0]['candidate']}")
+        for finding in findings:
+            flag = "SLOWER" if finding['slower'] else "ok"
+            print(f"  {finding['endpoint']:<12} {finding['baseline_median']:.3f}s -> "
+                  f"{finding['candidate_median']:.3f}s ({finding['increase']:+.1%}, "
+                  f"p={finding['p_value']:.4f}) {flag}")
+            any_slower = any_slower or finding['slower']
+    return any_slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the black box test history")
+    parser.add_argument('--db', default=HISTORY_DB, help=f"history database (default: {HISTORY_DB})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    trends = subparsers.add_parser('trends', help="pass rate and per-phase median latency per run")
+    trends.add_argument('-e', '--entity')
+    trends.add_argument('--last', type=int, default=10, help="number of runs to show (default: 10)")
+
+    slowdowns = subparsers.add_parser('slowdowns', help="flag significant Create endpoint slowdowns")
+    slowdowns.add_argument('-e', '--entity')
+    slowdowns.add_argument('--baseline', help="baseline build (default: previous build)")
+    slowdowns.add_argument('--candidate', help="candidate build (default: latest build)")
+    slowdowns.add_argument('--alpha', type=float, default=0.05, help="significance level (default: 0.05)")
+
+    args = parser.parse_args(argv)
+    connection = connect(args.db)
+    try:
+        if args.command == 'trends':
+            print_trends(connection, args.entity, args.last)
+            return 0
+        return 1 if print_slowdowns(connection, args.entity, args.baseline, args.candidate, args.alpha) else 0
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Browser-free HTTP engine for the Create forms
+
+HttpSession keeps cookies like a browser and does not follow redirects, so
+a successful Create is seen as the 302 to the Index page. fetch_form() reads
+a form's hidden fields (the antiforgery __RequestVerificationToken), the
+input name behind each data-testid and the options of each <select>;
+submit_form() posts the values keyed by data-testid.
+
+error_messages() reads the validation messages of a returned form page.
+
+Used where no browser behaviour is under test: bulk seeding, concurrent
+submissions and replaying recorded traffic.
+"""
+
+import http.cookiejar
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from html.parser import HTMLParser
+
+REQUEST_TIMEOUT = 30
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpResponse:
+    """Status, headers, body and timing of one request"""
+
+    def __init__(self, method, url, status, headers, body, elapsed):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def location(self):
+        return self.headers.get('Location', '')
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+
+class FormParser(HTMLParser):
+    """Collects the fields of the form holding data-testid inputs, keyed by data-testid"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hidden = {}
+        self.names = {}
+        self.types = {}
+        self.options = {}
+        self.labels = {}
+        self.action = None
+        self._select = None
+        self._option = None
+        self._form_action = None
+        self._form_hidden = {}
+        self._form_has_fields = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._form_action = attrs.get('action') or ''
+            self._form_hidden = {}
+            self._form_has_fields = False
+            return
+        if self._form_action is None:
+            return
+        name = attrs.get('name')
+        testid = attrs.get('data-testid')
+        if tag == 'input' and attrs.get('type') == 'hidden' and name:
+            self._form_hidden[name] = attrs.get('value', '')
+        elif tag in ('input', 'select', 'textarea') and name and testid:
+            self.action = self._form_action
+            self._form_has_fields = True
+            self.names[testid] = name
+            self.types[testid] = attrs.get('type', tag)
+            if tag == 'select':
+                self._select = testid
+                self.options[testid] = []
+                self.labels[testid] = []
+        elif tag == 'option' and self._select is not None:
+            self.options[self._select].append(attrs.get('value', ''))
+            self.labels[self._select].append('')
+            self._option = self._select
+
+    def handle_data(self, data):
+        if self._option is not None:
+            self.labels[self._option][-1] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'option':
+            self._option = None
+        elif tag == 'select':
+            self._select = None
+            self._option = None
+        elif tag == 'form':
+            if self._form_has_fields:
+                self.hidden = self._form_hidden
+            self._form_action = None
+
+
+class ErrorParser(HTMLParser):
+    """Collects the text of [data-testid$='-error'] elements, keyed by the test id without '-error'"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.errors = {}
+        self._testid = None
+        self._depth = 0
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._testid is not None:
+            if tag not in VOID_ELEMENTS:
+                self._depth += 1
+            return
+        testid = dict(attrs).get('data-testid') or ''
+        if testid.endswith('-error'):
+            self._testid = testid[:-len('-error')]
+            self._depth = 0
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if self._testid is None:
+            return
+        if self._depth:
+            self._depth -= 1
+            return
+        message = ' '.join(''.join(self._text).split())
+        if message:
+            self.errors[self._testid] = message
+        self._testid = None
+
+    def handle_data(self, data):
+        if self._testid is not None:
+            self._text.append(data)
+
+
+def error_messages(body):
+    """testid -> message of the non-empty validation errors on an HTML page"""
+    parser = ErrorParser()
+    parser.feed(body.decode('utf-8', errors='replace') if isinstance(body, bytes) else body)
+    return parser.errors
+
+
+class HttpForm:
+    """A parsed form: action URL, hidden fields, data-testid -> input name and select options"""
+
+    def __init__(self, url, parser):
+        self.url = urllib.parse.urljoin(url, parser.action) if parser.action else url
+        self.hidden = parser.hidden
+        self.names = parser.names
+        self.types = parser.types
+        self.options = parser.options
+        self.labels = parser.labels
+
+    def choices(self, testid):
+        """(value, text) of each option of a <select>, placeholder excluded"""
+        return [(value, text.strip()) for value, text in
+                zip(self.options.get(testid, []), self.labels.get(testid, [])) if value]
+
+    def encode(self, values):
+        """
+        Form body for values keyed by data-testid; unknown test ids are ignored
+        A <select> without a value gets its first non-empty option, like the browser runner
+        """
+        fields = dict(self.hidden)
+        for testid, value in values.items():
+            if testid in self.names:
+                fields[self.names[testid]] = value
+        for testid, options in self.options.items():
+            if not values.get(testid):
+                first = next((option for option in options if option), None)
+                if first is not None:
+                    fields[self.names[testid]] = first
+        return urllib.parse.urlencode(fields).encode('utf-8')
+
+
+class HttpSession:
+    """Cookie-keeping HTTP client that reports redirects instead of following them"""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT, proxy=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        handlers = [urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect()]
+        if proxy:
+            handlers.append(urllib.request.ProxyHandler({'http': proxy, 'https': proxy}))
+        self.opener = urllib.request.build_opener(*handlers)
+
+    def url(self, path):
+        return path if '://' in path else f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, body=None, headers=None):
+        url = self.url(path)
+        request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+        if body is not None and 'Content-Type' not in request.headers:
+            request.add_header('Content-Type', 'application/x-www-form-urlencoded')
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, response_headers, payload = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, payload = e.code, e.headers, e.read()
+        return HttpResponse(method, url, status, response_headers, payload, time.perf_counter() - started)
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, body, headers=None):
+        return self.request('POST', path, body, headers)
+
+    def fetch_form(self, path):
+        """GET a page and parse its form; returns (HttpForm, HttpResponse)"""
+        response = self.get(path)
+        parser = FormParser()
+        parser.feed(response.text)
+        return HttpForm(response.url, parser), response
+
+    def submit_form(self, form, values):
+        """POST values (data-testid -> value) with the form's hidden fields"""
+        return self.post(form.url, form.encode(values))
+
+
+def is_redirect_to_index(response, controller):
+    """A Create/Edit/Delete POST succeeded if it redirected to the controller's Index"""
+    if response.status not in (301, 302, 303, 307, 308):
+        return False
+    path = urllib.parse.urlparse(response.location).path.rstrip('/')
+    return path.endswith(f'/{controller}/Index') or path.endswith(f'/{controller}')
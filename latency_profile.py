@@ -0,0 +1,122 @@
+"""
+Adaptive wait deadlines learned from observed latency
+
+LatencyProfile keeps a decaying histogram of latencies per endpoint and
+phase, e.g. 'Libro/Create:navigate', 'Libro/Create:submit' (the form came
+back with errors) and 'Libro/Create:redirect' (the post redirected to
+Index). Buckets grow geometrically from 10 ms to about 2 minutes; on each
+sample the existing counts decay, so the histogram follows the recent
+behaviour of the server rather than its whole history.
+
+deadline(key) is a high percentile of that histogram times a margin,
+clamped between a floor and a ceiling. Until a key has MIN_SAMPLES samples
+the fixed default applies. The profile is saved to latency_profile.json at
+the end of a run and loaded at the start of the next one.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+
+PROFILE_FILE = 'latency_profile.json'
+PERCENTILE = 0.99
+MARGIN = 1.5
+FLOOR = 1.0
+CEILING = 60.0
+MIN_SAMPLES = 20
+DECAY = 0.995
+
+BUCKET_BOUNDS = [round(0.01 * 1.25 ** i, 4) for i in range(50)]
+
+
+class LatencyHistogram:
+    """Decaying bucket counts of latencies in seconds"""
+
+    def __init__(self, counts=None, samples=0):
+        self.counts = list(counts) if counts else [0.0] * (len(BUCKET_BOUNDS) + 1)
+        self.samples = samples
+
+    def add(self, seconds):
+        self.counts = [count * DECAY for count in self.counts]
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1.0
+        self.samples += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of the (decayed) samples"""
+        total = sum(self.counts)
+        if total == 0:
+            return None
+        running = 0.0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= fraction * total:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1] * 1.25
+        return BUCKET_BOUNDS[-1] * 1.25
+
+    def to_dict(self):
+        return {'counts': [round(count, 4) for count in self.counts], 'samples': self.samples}
+
+
+class LatencyProfile:
+    """Latency histograms per endpoint and phase, with the wait deadlines derived from them"""
+
+    def __init__(self, profile_file=PROFILE_FILE, default=10.0, percentile=PERCENTILE, margin=MARGIN,
+                 floor=FLOOR, ceiling=CEILING):
+        self.profile_file = profile_file
+        self.default = default
+        self.percentile = percentile
+        self.margin = margin
+        self.floor = floor
+        self.ceiling = ceiling
+        self.lock = threading.Lock()
+        self.histograms = self._load()
+
+    def _load(self):
+        if not self.profile_file or not os.path.exists(self.profile_file):
+            return {}
+        try:
+            with open(self.profile_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return {key: LatencyHistogram(entry['counts'], entry['samples']) for key, entry in data.items()
+                    if len(entry.get('counts', [])) == len(BUCKET_BOUNDS) + 1}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable latency profile {self.profile_file}: {str(e)}")
+            return {}
+
+    def record(self, key, seconds):
+        with self.lock:
+            self.histograms.setdefault(key, LatencyHistogram()).add(seconds)
+
+    def deadline(self, key):
+        """Seconds to wait for key before treating the case as hung"""
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None or histogram.samples < MIN_SAMPLES:
+                return self.default
+            observed = histogram.percentile(self.percentile)
+        return min(max(observed * self.margin, self.floor), self.ceiling)
+
+    def summary(self):
+        """key -> (samples, p50, deadline)"""
+        with self.lock:
+            keys = sorted(self.histograms)
+            stats = {key: (self.histograms[key].samples, self.histograms[key].percentile(0.5)) for key in keys}
+        return {key: (samples, p50, self.deadline(key)) for key, (samples, p50) in stats.items()}
+
+    def save(self):
+        """Write the profile, keeping keys other runners saved in the meantime"""
+        if not self.profile_file:
+            return
+        data = {}
+        if os.path.exists(self.profile_file):
+            try:
+                with open(self.profile_file, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                data = {}
+        with self.lock:
+            data.update({key: histogram.to_dict() for key, histogram in self.histograms.items()})
+        with open(self.profile_file, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
@@ -0,0 +1,55 @@
+"""
+Deferred imports of the browser stack
+
+Importing selenium and webdriver_manager takes a few hundred milliseconds,
+which browser-free commands (predicting outcomes from a CSV, seeding over
+HTTP, querying the history store) should not pay. LazyImport stands in for
+a module or one of its attributes and imports it on first use:
+
+    By = LazyImport('selenium.webdriver.common.by', 'By')
+    By.CSS_SELECTOR      # selenium is imported here
+
+Exception classes used in except clauses are imported inside the function
+instead, since an except clause needs the real class.
+"""
+
+import importlib
+import threading
+
+_lock = threading.Lock()
+
+
+class LazyImport:
+    """Placeholder for module_name (or module_name.attribute) resolved on first use"""
+
+    def __init__(self, module_name, attribute=None):
+        self.__dict__['_module_name'] = module_name
+        self.__dict__['_attribute'] = attribute
+        self.__dict__['_target'] = None
+
+    def resolve(self):
+        target = self.__dict__['_target']
+        if target is None:
+            with _lock:
+                target = self.__dict__['_target']
+                if target is None:
+                    target = importlib.import_module(self._module_name)
+                    if self._attribute:
+                        target = getattr(target, self._attribute)
+                    self.__dict__['_target'] = target
+        return target
+
+    @property
+    def loaded(self):
+        return self.__dict__['_target'] is not None
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyImport {name} ({state})>"
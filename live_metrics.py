@@ -0,0 +1,303 @@
+"""
+Live progress of a run: Prometheus metrics endpoint and terminal status line
+
+RunMetrics is shared by every runner and worker of a run. Runners report
+each finished case (outcome and phase timings), which case each worker is
+on, and the work queue of the current suite. From that it derives:
+
+    cases/sec   over the last RATE_WINDOW seconds, and since the suite began
+    ETA         cases left in the queue at the recent rate
+    latencies   p50/p95/p99 of each phase over the last WINDOW_SAMPLES cases
+    workers     active workers and the case each one is running
+
+MetricsServer serves them on http://127.0.0.1:<port>/metrics in the
+Prometheus text format, so a long generated run can be scraped or simply
+curled. StatusLine redraws a one-line summary on stderr every second (when
+stderr is a terminal; otherwise it logs the same line every LOG_EVERY
+seconds).
+"""
+
+import collections
+import http.server
+import logging
+import sys
+import threading
+import time
+
+from log_config import CONSOLE_LOCK, set_status_line
+
+RATE_WINDOW = 60
+WINDOW_SAMPLES = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+REFRESH_EVERY = 1.0
+LOG_EVERY = 30.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def quantile(ordered, fraction):
+    """Nearest-rank quantile of a sorted list"""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '--'
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class RunMetrics:
+    """Counters, rates and phase latencies of a run in progress"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.outcomes = collections.Counter()
+        self.phases = {}
+        self.phase_totals = {}
+        self.finished_at = collections.deque()
+        self.workers = {}
+        self.entity = None
+        self.suite_total = 0
+        self.suite_done = 0
+        self.suite_started = None
+        self.work = None
+
+    def start_suite(self, entity, total, work):
+        """A suite of total cases starts; work is its queue"""
+        with self.lock:
+            self.entity = entity
+            self.suite_total = total
+            self.suite_done = 0
+            self.suite_started = time.time()
+            self.work = work
+            self.finished_at.clear()
+
+    def worker_started(self, worker):
+        with self.lock:
+            self.workers[worker] = None
+
+    def worker_stopped(self, worker):
+        with self.lock:
+            self.workers.pop(worker, None)
+
+    def case_started(self, worker, caso):
+        with self.lock:
+            self.workers[worker] = (caso, time.time())
+
+    def case_finished(self, worker, result):
+        now = time.time()
+        outcome = 'passed' if result['passed'] else ('error' if result['actual'] == 'Error' else 'failed')
+        with self.lock:
+            self.outcomes[(self.entity, outcome)] += 1
+            self.suite_done += 1
+            self.finished_at.append(now)
+            for phase, seconds in (result.get('phases') or {}).items():
+                self.phases.setdefault(phase, collections.deque(maxlen=WINDOW_SAMPLES)).append(seconds)
+                totals = self.phase_totals.setdefault(phase, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+            if worker in self.workers:
+                self.workers[worker] = None
+
+    def _recent_rate(self, now):
+        while self.finished_at and self.finished_at[0] < now - RATE_WINDOW:
+            self.finished_at.popleft()
+        window = min(RATE_WINDOW, now - self.suite_started) if self.suite_started else 0
+        return len(self.finished_at) / window if window > 0 else 0.0
+
+    def snapshot(self):
+        """Point-in-time view of every metric"""
+        now = time.time()
+        with self.lock:
+            rate = self._recent_rate(now)
+            elapsed = now - self.suite_started if self.suite_started else 0
+            queued = self.work.qsize() if self.work is not None else 0
+            return {
+                'entity': self.entity,
+                'total': self.suite_total,
+                'done': self.suite_done,
+                'queued': queued,
+                'rate': rate,
+                'average_rate': self.suite_done / elapsed if elapsed > 0 else 0.0,
+                'eta': queued / rate if rate > 0 else None,
+                'outcomes': dict(self.outcomes),
+                'phases': {phase: sorted(samples) for phase, samples in self.phases.items() if samples},
+                'phase_totals': {phase: tuple(totals) for phase, totals in self.phase_totals.items()},
+                'workers': {worker: (state[0], now - state[1]) if state else None
+                            for worker, state in self.workers.items()},
+                'uptime': now - self.started,
+            }
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        view = self.snapshot()
+        entity = escape_label(view['entity'] or '')
+        lines = [
+            '# HELP blackbox_cases_total Finished cases by entity and outcome',
+            '# TYPE blackbox_cases_total counter',
+        ]
+        for (name, outcome), count in sorted(view['outcomes'].items(), key=lambda item: (str(item[0][0]), item[0][1])):
+            lines.append(f'blackbox_cases_total{{entity="{escape_label(name)}",outcome="{outcome}"}} {count}')
+        lines += [
+            '# HELP blackbox_cases_per_second Cases finished per second over the last minute',
+            '# TYPE blackbox_cases_per_second gauge',
+            f'blackbox_cases_per_second{{entity="{entity}"}} {view["rate"]:.4f}',
+            '# HELP blackbox_suite_cases Cases in the current suite',
+            '# TYPE blackbox_suite_cases gauge',
+            f'blackbox_suite_cases{{entity="{entity}"}} {view["total"]}',
+            '# HELP blackbox_suite_done Cases of the current suite finished',
+            '# TYPE blackbox_suite_done gauge',
+            f'blackbox_suite_done{{entity="{entity}"}} {view["done"]}',
+            '# HELP blackbox_queue_depth Cases waiting for a worker',
+            '# TYPE blackbox_queue_depth gauge',
+            f'blackbox_queue_depth{{entity="{entity}"}} {view["queued"]}',
+            '# HELP blackbox_eta_seconds Estimated time to finish the current suite',
+            '# TYPE blackbox_eta_seconds gauge',
+            f'blackbox_eta_seconds{{entity="{entity}"}} {view["eta"] if view["eta"] is not None else "NaN"}',
+            '# HELP blackbox_active_workers Workers with a browser',
+            '# TYPE blackbox_active_workers gauge',
+            f'blackbox_active_workers {len(view["workers"])}',
+            '# HELP blackbox_worker_case_seconds Seconds the worker has spent on its current case',
+            '# TYPE blackbox_worker_case_seconds gauge',
+        ]
+        for worker, state in sorted(view['workers'].items()):
+            if state:
+                lines.append(f'blackbox_worker_case_seconds{{worker="{escape_label(worker)}",'
+                             f'caso="{escape_label(state[0])}"}} {state[1]:.3f}')
+        lines += [
+            '# HELP blackbox_phase_seconds Phase latency (quantiles over the last cases)',
+            '# TYPE blackbox_phase_seconds summary',
+        ]
+        for phase, ordered in sorted(view['phases'].items()):
+            for fraction in QUANTILES:
+                lines.append(f'blackbox_phase_seconds{{phase="{phase}",quantile="{fraction}"}} '
+                             f'{quantile(ordered, fraction):.4f}')
+            count, total = view['phase_totals'][phase]
+            lines.append(f'blackbox_phase_seconds_sum{{phase="{phase}"}} {total:.4f}')
+            lines.append(f'blackbox_phase_seconds_count{{phase="{phase}"}} {count}')
+        lines += [
+            '# HELP blackbox_uptime_seconds Seconds since the run started',
+            '# TYPE blackbox_uptime_seconds gauge',
+            f'blackbox_uptime_seconds {view["uptime"]:.1f}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def status_line(self):
+        """Compact one-line progress summary"""
+        view = self.snapshot()
+        if view['entity'] is None:
+            return "waiting for the first suite"
+        counts = collections.Counter()
+        for (name, outcome), count in view['outcomes'].items():
+            if name == view['entity']:
+                counts[outcome] = count
+        percent = view['done'] / view['total'] * 100 if view['total'] else 0
+        busy = sum(1 for state in view['workers'].values() if state)
+        line = (f"[{view['entity']}] {view['done']}/{view['total']} {percent:.0f}% | {view['rate']:.2f} cases/s | "
+                f"ETA {format_duration(view['eta'])} | pass {counts['passed']} fail {counts['failed']} "
+                f"err {counts['error']} | workers {busy}/{len(view['workers'])} | queue {view['queued']}")
+        submit = view['phases'].get('submit')
+        if submit:
+            line += f" | submit p95 {quantile(submit, 0.95):.2f}s"
+        return line
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logging.debug("metrics: " + format, *args)
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Serves RunMetrics on 127.0.0.1:port/metrics from a daemon thread"""
+
+    def __init__(self, metrics, port=0):
+        self.metrics = metrics
+        self.port = port
+        self.server = None
+
+    def start(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = self.metrics
+        threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+        logging.info(f"Live metrics on http://127.0.0.1:{self.server.server_address[1]}/metrics")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class StatusLine:
+    """
+    Redraws RunMetrics.status_line() on stderr, or logs it periodically when stderr is not a terminal
+    On a terminal the console log handler clears the line before each record and redraws it after
+    """
+
+    def __init__(self, metrics, stream=None):
+        self.metrics = metrics
+        self.stream = stream or sys.stderr
+        self.interactive = self.stream.isatty()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.text = ''
+
+    def start(self):
+        if self.interactive:
+            set_status_line(self)
+        self.thread = threading.Thread(target=self.run, name='status-line', daemon=True)
+        self.thread.start()
+        return self
+
+    def clear(self):
+        """Erase the line; called with CONSOLE_LOCK held"""
+        if self.text:
+            self.stream.write("\r\x1b[K")
+            self.stream.flush()
+
+    def draw(self):
+        """Write the current text; called with CONSOLE_LOCK held"""
+        if self.text:
+            self.stream.write(f"\r\x1b[K{self.text}")
+            self.stream.flush()
+
+    def run(self):
+        interval = REFRESH_EVERY if self.interactive else LOG_EVERY
+        while not self.stopped.wait(interval):
+            if self.interactive:
+                text = self.metrics.status_line()
+                with CONSOLE_LOCK:
+                    self.text = text
+                    self.draw()
+            else:
+                logging.info(f"Progress: {self.metrics.status_line()}")
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        if self.interactive:
+            set_status_line(None)
+            with CONSOLE_LOCK:
+                self.clear()
+                self.text = ''
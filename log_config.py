@@ -0,0 +1,179 @@
+"""
+Logging setup for the test runners, applied when a run starts
+
+Importing a runner module no longer touches logging. configure_logging()
+puts a single QueueHandler on the root logger: the test threads only
+enqueue records, and a QueueListener thread formats them and writes the
+log file and the console. Output is either the usual text lines or JSON
+Lines with the record's structured fields (caso, expected, actual, passed,
+duration, ... passed through extra=).
+
+Levels, from chattiest:
+    DEBUG  every phase of every case (navigation, form data, submission)
+    INFO   run progress
+    CASE   one summary line per case
+Repeated DEBUG/INFO messages are rate-limited per message template; the
+next one let through carries the number suppressed. At --log-level debug
+nothing is rate-limited, so every requested record is kept.
+
+A live status line on the terminal (live_metrics.StatusLine) registers with
+set_status_line(): the console handler clears it before writing a record
+and redraws it after, both under CONSOLE_LOCK, so the two never interleave.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+CASE = 25
+logging.addLevelName(CASE, 'CASE')
+
+LOG_FORMATS = ['text', 'json']
+LOG_LEVELS = ['debug', 'info', 'case', 'warning', 'error']
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+RATE_LIMIT = 20
+RATE_WINDOW = 1.0
+
+# Attributes every LogRecord has; anything else was passed through extra=
+STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_status_line = None
+
+# Held while anything writes to the console: a log record or the status line
+CONSOLE_LOCK = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the message and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The usual text line, noting how many similar records were suppressed before it"""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} ({suppressed} similar suppressed)" if suppressed else text
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most limit records per message template per window below CASE level"""
+
+    def __init__(self, limit=RATE_LIMIT, window=RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def filter(self, record):
+        if record.levelno >= CASE:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            started, count, suppressed = self.counters.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.limit:
+                self.counters[key] = (started, count, suppressed + 1)
+                return False
+            self.counters[key] = (started, count + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Console output that steps around the registered status line"""
+
+    def emit(self, record):
+        with CONSOLE_LOCK:
+            status_line = _status_line
+            if status_line is not None:
+                status_line.clear()
+            super().emit(record)
+            if status_line is not None:
+                status_line.draw()
+
+
+def set_status_line(status_line):
+    """Register the status line the console handler clears and redraws (None to unregister)"""
+    global _status_line
+    with CONSOLE_LOCK:
+        _status_line = status_line
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted so formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def is_configured():
+    return _listener is not None
+
+
+def configure_logging(log_file=None, level='info', log_format='text', console=True):
+    """Route all logging through a background listener writing log_file and/or the console"""
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if log_format == 'json' else TextFormatter(TEXT_FORMAT)
+    handlers = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    if console:
+        handlers.append(ConsoleHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if level > logging.DEBUG:
+        queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and close the handlers"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,177 @@
+"""
+Suite minimizer: drop CSV rows that add no pairwise equivalence-class coverage
+
+Each row's signature is the equivalence class of every field after
+parse_test_value expansion, computed against the entity's VALIDATIONS
+('valid', 'empty', or the violated rules such as 'length+pattern'; fields
+with enumerated values get one class per value as posted, e.g. Disponible
+-> 'true'), plus the expected result. Whether a date is in the future is
+judged against --today (default: the current date), so pin it to minimize
+a CSV the same way on any day. Rows with a signature already seen are dropped, then
+rows are picked greedily (most new pairs first, CSV order on ties) until
+every pair of (field, class) values covered by the full suite is covered
+again. The reduced CSV keeps the original columns and cells.
+
+The report shows the coverage retained and the runtime saved. The saving
+comes from the history store when it holds durations for the dropped
+cases, and otherwise from the mean duration of the cases that have one.
+
+Usage:
+    python minimize_suite.py -e libro
+    python minimize_suite.py -e lector --csv my_cases.csv -o lector_min.csv
+    python minimize_suite.py -e ejemplar --today 2025-10-20
+
+Run the minimized CSV on every commit and the full suite nightly:
+    python run_tests.py -e libro --csv "BLACKBOX_BIBLIOTECA - LIBRO_TESTS_MIN.csv"
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import os
+import sqlite3
+import statistics
+import sys
+
+from run_tests import SUITES, load_runner_class
+
+EXPECTED_FIELD = 'expected'
+
+
+def row_signature(runner, test_case, today=None):
+    """(field, class) pairs of a row, the expected result included"""
+    values = runner.field_values(test_case)
+    posted = runner.form_values(test_case)
+    for field, rules in runner.error_matcher.fields.items():
+        # Enumerated fields are classed by the value the form posts (Disponible -> 'true')
+        if rules.values and values.get(field):
+            values[field] = posted.get(rules.testid, values[field])
+    expected = test_case.get(runner.EXPECTED_COLUMN, '').strip()
+    return runner.error_matcher.signature(values, today) + ((EXPECTED_FIELD, expected),)
+
+
+def pairs(signature):
+    return set(itertools.combinations(signature, 2))
+
+
+def minimize(signatures):
+    """
+    Indexes of the rows to keep so every pair covered by signatures stays covered
+    signatures: list of row signatures, in CSV order
+    """
+    first_of = {}
+    for index, signature in enumerate(signatures):
+        first_of.setdefault(signature, index)
+    candidates = {index: pairs(signature) for signature, index in first_of.items()}
+    uncovered = set().union(*candidates.values()) if candidates else set()
+
+    kept = []
+    while uncovered:
+        best = max(candidates, key=lambda index: (len(candidates[index] & uncovered), -index))
+        gained = candidates.pop(best) & uncovered
+        if not gained:
+            break
+        kept.append(best)
+        uncovered -= gained
+    return sorted(kept)
+
+
+def coverage(signatures):
+    """Distinct (field, class) values and pairs covered by signatures"""
+    singles = {item for signature in signatures for item in signature}
+    covered_pairs = set().union(*(pairs(signature) for signature in signatures)) if signatures else set()
+    return singles, covered_pairs
+
+
+def case_durations(history_db, entity):
+    """Median duration per CASO from the history store, {} if there is none"""
+    if not history_db or not os.path.exists(history_db):
+        return {}
+    connection = sqlite3.connect(history_db)
+    try:
+        rows = connection.execute(
+            'SELECT caso, duration FROM case_results WHERE entity = ? AND duration IS NOT NULL',
+            (entity,)).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        connection.close()
+    durations = {}
+    for caso, duration in rows:
+        durations.setdefault(caso, []).append(duration)
+    return {caso: statistics.median(values) for caso, values in durations.items()}
+
+
+def estimated_runtime(casos, durations):
+    """Sum of known durations, unknown cases counted at the mean; None without any history"""
+    if not durations:
+        return None
+    mean = statistics.fmean(durations.values())
+    return sum(durations.get(caso, mean) for caso in casos)
+
+
+def default_output(csv_file):
+    stem, extension = os.path.splitext(csv_file)
+    return f"{stem}_MIN{extension or '.csv'}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reduce a test CSV while keeping pairwise class coverage")
+    parser.add_argument('-e', '--entity', required=True, choices=sorted(SUITES))
+    parser.add_argument('--csv', help="test case CSV (default: the entity's CSV)")
+    parser.add_argument('-o', '--output', help="minimized CSV (default: <csv>_MIN.csv)")
+    parser.add_argument('--history-db', default='test_history.db',
+                        help="history store used to estimate the runtime saved (default: test_history.db)")
+    parser.add_argument('--today', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                        help="reference date for future-date classes (default: the current date)")
+    args = parser.parse_args(argv)
+
+    runner = load_runner_class(args.entity)(report_formats=[], history_db=None)
+    csv_file = args.csv or runner.DEFAULT_CSV
+    output = args.output or default_output(csv_file)
+
+    with open(csv_file, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames
+        rows = [row for row in reader if row.get('CASO')]
+
+    signatures = [row_signature(runner, row, args.today) for row in rows]
+    kept = minimize(signatures)
+    kept_rows = [rows[index] for index in kept]
+
+    with open(output, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(kept_rows)
+
+    full_singles, full_pairs = coverage(signatures)
+    kept_singles, kept_pairs = coverage([signatures[index] for index in kept])
+    durations = case_durations(args.history_db, runner.ENTITY)
+    full_time = estimated_runtime([row['CASO'] for row in rows], durations)
+    kept_time = estimated_runtime([row['CASO'] for row in kept_rows], durations)
+
+    print("="*60)
+    print(f"SUITE MINIMIZATION - {runner.ENTITY}")
+    print("="*60)
+    print(f"Rows:        {len(rows)} -> {len(kept_rows)} "
+          f"({(1 - len(kept_rows) / len(rows)) * 100 if rows else 0:.0f}% fewer)")
+    print(f"Signatures:  {len(set(signatures))} distinct in the full suite")
+    print(f"Classes:     {len(kept_singles)}/{len(full_singles)} retained")
+    print(f"Pairs:       {len(kept_pairs)}/{len(full_pairs)} retained "
+          f"({len(kept_pairs) / len(full_pairs) * 100 if full_pairs else 100:.1f}%)")
+    if full_time is not None:
+        print(f"Runtime:     ~{full_time:.1f}s -> ~{kept_time:.1f}s (saves ~{full_time - kept_time:.1f}s per run)")
+    else:
+        print("Runtime:     no history to estimate from; runtime scales with the rows kept")
+    kept_indexes = set(kept)
+    dropped = [row['CASO'] for index, row in enumerate(rows) if index not in kept_indexes]
+    if dropped:
+        print(f"Dropped:     {', '.join(dropped)}")
+    print(f"Minimized suite saved to: {output}")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Duplicate-key race test: concurrent Creates with the same unique value
+
+VALIDATIONS declares a 'duplicate' rule for ISBN (Libro) and CI (Lector).
+The CSV suites submit one form at a time, so they never show whether that
+check holds when two requests arrive together (check-then-insert without
+a unique index lets both through). For each round this test:
+
+    1. opens N HTTP sessions and fetches N Create forms (each session with
+       its own antiforgery cookie and token)
+    2. fills each form with a valid, otherwise unique seed row that shares
+       one fresh key value
+    3. releases all N posts at once from a barrier
+
+Exactly one post must redirect to Index (Aceptado); every other one must
+come back with the duplicate message. The report shows the outcome count
+and the latency spread of the round, and whether the winner was also the
+fastest response. Rounds go to race_results.csv.
+
+Usage:
+    python race_test.py --entity libro lector --contenders 8 --rounds 5
+"""
+
+import argparse
+import csv
+import logging
+import statistics
+import sys
+import threading
+import time
+
+from http_engine import HttpSession, error_messages, is_redirect_to_index
+from log_config import configure_logging
+from run_tests import DEFAULT_BASE_URL, SUITES, load_runner_class
+
+RESULT_FIELDS = ['entity', 'round', 'field', 'key', 'contenders', 'accepted', 'duplicate', 'other', 'errors',
+                 'min_ms', 'median_ms', 'max_ms', 'spread_ms', 'winner_ms', 'passed']
+BARRIER_TIMEOUT = 30
+
+
+def duplicate_field(runner):
+    """VALIDATIONS field with a 'duplicate' rule, or None"""
+    return next((field for field, rules in runner.VALIDATIONS.items()
+                 if 'duplicate' in rules.get('error_messages', {})), None)
+
+
+def classify(runner, field, response):
+    """'Aceptado', 'duplicate' (rejected by the duplicate rule), 'Rechazado' or 'Error'"""
+    if is_redirect_to_index(response, runner.CONTROLLER):
+        return 'Aceptado'
+    if response.status >= 400:
+        return 'Error'
+    message = error_messages(response.body).get(runner.error_matcher.fields[field].testid)
+    if message and runner.error_matcher.fields[field].rule_for_message(message) == 'duplicate':
+        return 'duplicate'
+    return 'Rechazado'
+
+
+class Contender:
+    """One session racing to create the record"""
+
+    def __init__(self, runner, test_case):
+        self.runner = runner
+        self.test_case = test_case
+        self.session = HttpSession(runner.base_url)
+        self.form = None
+        self.body = None
+        self.response = None
+        self.error = None
+
+    def prepare(self):
+        self.form, _ = self.session.fetch_form(self.runner.create_url)
+        self.body = self.form.encode(self.runner.form_values(self.test_case, self.form))
+
+    def post(self, barrier):
+        try:
+            barrier.wait(BARRIER_TIMEOUT)
+            self.response = self.session.post(self.form.url, self.body)
+        except (OSError, threading.BrokenBarrierError) as e:
+            self.error = e
+
+
+def race_round(runner, field, contenders, base):
+    """Fire contenders simultaneous Creates sharing one key; returns the round's row"""
+    column = runner.FIELD_COLUMNS[field]
+    key = runner.seed_case(base)[column]
+    racers = []
+    for n in range(contenders):
+        test_case = dict(runner.seed_case(base + n))
+        test_case[column] = key
+        racers.append(Contender(runner, test_case))
+    for racer in racers:
+        racer.prepare()
+
+    barrier = threading.Barrier(contenders)
+    threads = [threading.Thread(target=racer.post, args=(barrier,), name=f"race-{n}")
+               for n, racer in enumerate(racers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    outcomes = []
+    for racer in racers:
+        if racer.response is None:
+            logging.warning(f"{runner.ENTITY} race post failed: {str(racer.error)}")
+            outcomes.append(('Error', None))
+        else:
+            outcomes.append((classify(runner, field, racer.response), racer.response.elapsed * 1000))
+
+    latencies = [ms for _, ms in outcomes if ms is not None]
+    counts = {outcome: sum(1 for result, _ in outcomes if result == outcome)
+              for outcome in ('Aceptado', 'duplicate', 'Rechazado', 'Error')}
+    winners = [ms for result, ms in outcomes if result == 'Aceptado']
+    return {
+        'entity': runner.ENTITY,
+        'field': field,
+        'key': runner.parse_test_value(key),
+        'contenders': contenders,
+        'accepted': counts['Aceptado'],
+        'duplicate': counts['duplicate'],
+        'other': counts['Rechazado'],
+        'errors': counts['Error'],
+        'min_ms': round(min(latencies), 1) if latencies else None,
+        'median_ms': round(statistics.median(latencies), 1) if latencies else None,
+        'max_ms': round(max(latencies), 1) if latencies else None,
+        'spread_ms': round(max(latencies) - min(latencies), 1) if latencies else None,
+        'winner_ms': round(winners[0], 1) if len(winners) == 1 else None,
+        'passed': counts['Aceptado'] == 1 and counts['duplicate'] == contenders - 1,
+    }
+
+
+def run_race(runner, contenders, rounds):
+    field = duplicate_field(runner)
+    if field is None:
+        logging.info(f"{runner.ENTITY}: no duplicate rule in VALIDATIONS, nothing to race")
+        return []
+    base = int(time.time() * 1000) % 10**8
+    results = []
+    for number in range(1, rounds + 1):
+        row = race_round(runner, field, contenders, base)
+        row['round'] = number
+        base += contenders
+        results.append(row)
+        logging.info(f"{runner.ENTITY} round {number}: {row['accepted']} accepted, {row['duplicate']} duplicate, "
+                     f"{row['other']} other, {row['errors']} errors - spread {row['spread_ms']} ms - "
+                     f"{'PASS' if row['passed'] else 'FAIL'}")
+    return results
+
+
+def print_report(results):
+    print("\n" + "="*78)
+    print("DUPLICATE-KEY RACE (exactly one Aceptado per round)")
+    print("="*78)
+    print(f"{'entity':<10} {'round':>5} {'field':<6} {'ok':>3} {'dup':>4} {'other':>5} {'err':>4} "
+          f"{'min':>8} {'median':>8} {'max':>8} {'spread':>8}  result")
+    for row in results:
+        cells = [f"{row[key]:8.1f}" if row[key] is not None else f"{'-':>8}"
+                 for key in ('min_ms', 'median_ms', 'max_ms', 'spread_ms')]
+        print(f"{row['entity']:<10} {row['round']:>5} {row['field']:<6} {row['accepted']:>3} {row['duplicate']:>4} "
+              f"{row['other']:>5} {row['errors']:>4} {' '.join(cells)}  {'PASS' if row['passed'] else 'FAIL'}")
+    for entity in dict.fromkeys(row['entity'] for row in results):
+        rows = [row for row in results if row['entity'] == entity]
+        broken = [row for row in rows if row['accepted'] > 1]
+        if broken:
+            print(f"{entity}: duplicate check lost the race in {len(broken)}/{len(rows)} rounds "
+                  f"(up to {max(row['accepted'] for row in broken)} records with one key)")
+        won_fastest = sum(1 for row in rows if row['winner_ms'] is not None and row['winner_ms'] == row['min_ms'])
+        print(f"{entity}: winner was the fastest response in {won_fastest}/{len(rows)} rounds")
+    print("="*78)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race concurrent Creates with the same ISBN / CI")
+    parser.add_argument('-e', '--entity', nargs='+', default=['all'], choices=sorted(SUITES) + ['all'])
+    parser.add_argument('-u', '--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('-n', '--contenders', type=int, default=8, help="simultaneous posts per round (default: 8)")
+    parser.add_argument('--rounds', type=int, default=5, help="rounds per entity, each with a new key (default: 5)")
+    parser.add_argument('-o', '--output', default='race_results.csv')
+    args = parser.parse_args(argv)
+    if args.contenders < 2:
+        parser.error("--contenders must be at least 2")
+    configure_logging('race_test.log')
+
+    entities = list(SUITES) if 'all' in args.entity else list(dict.fromkeys(args.entity))
+    results = []
+    for entity in entities:
+        runner = load_runner_class(entity)(base_url=args.base_url, report_formats=[], history_db=None)
+        results.extend(run_race(runner, args.contenders, args.rounds))
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print_report(results)
+    print(f"Results saved to: {args.output}")
+    return 0 if all(row['passed'] for row in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
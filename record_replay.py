@@ -0,0 +1,260 @@
+"""
+Record a browser run's HTTP traffic per case, replay it without a browser
+
+Recording: run_tests.py --record DIR sends the browser through the asset
+proxy and keeps, for every case, the exchanges forwarded to the
+application in order: page loads, the form POST with its exact body, the
+redirect and the page it leads to. Cached static assets are left out. With
+--warm-reset the reset's background fetch of the Create page is recorded
+as the case's page load. One JSON line per case goes to DIR/<entity>.jsonl
+(the last attempt of a retried case wins). An attempt that raised is still
+written, with its error; replay reports such a case as not recorded.
+
+Replay: each case gets a fresh cookie session and its requests are
+re-issued in order over plain HTTP. The antiforgery token in a recorded
+form body is replaced by the one from the page fetched just before it, as
+the browser would have done. Each response is compared with the recording:
+
+    status     HTTP status code
+    location   redirect target (path and query)
+    errors     validation messages on the page ([data-testid$='-error'])
+    body       the page with hidden input values blanked (only with --strict)
+
+A case passes when every exchange matches. Replay never renders or runs
+scripts, so it checks the server side only, and it should run against the
+database state the recording was made on: a Create whose key already
+exists comes back with the duplicate message instead of the redirect.
+
+Usage:
+    python run_tests.py -e libro lector --record recordings
+    python record_replay.py recordings/libro.jsonl recordings/lector.jsonl -w 8
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import difflib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+from http_engine import FormParser, HttpSession, error_messages
+from log_config import configure_logging
+from run_tests import DEFAULT_BASE_URL
+
+RESULT_FIELDS = ['entity', 'caso', 'exchanges', 'recorded', 'passed', 'recorded_ms', 'replay_ms', 'mismatches']
+HIDDEN_INPUT = re.compile(r'<input\b[^>]*\btype=["\']?hidden["\']?[^>]*>', re.IGNORECASE)
+VALUE_ATTRIBUTE = re.compile(r'\bvalue=("[^"]*"|\'[^\']*\'|[^\s>]*)', re.IGNORECASE)
+
+
+class Recording:
+    """Appends one JSON line per recorded case; shared by the workers of a suite"""
+
+    def __init__(self, path, entity, controller, base_url):
+        self.path = path
+        self.entity = entity
+        self.controller = controller
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self.cases = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def add(self, caso, exchanges, seconds, navigation=None, error=None):
+        """navigation: 'full' or 'warm' (None if it failed); error: why the attempt failed"""
+        line = json.dumps({'entity': self.entity, 'controller': self.controller, 'base_url': self.base_url,
+                           'caso': caso, 'seconds': round(seconds, 4), 'navigation': navigation,
+                           'error': error, 'exchanges': exchanges},
+                          ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            self.cases += 1
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+        logging.info(f"Recorded {self.cases} {self.entity} cases to {self.path}")
+
+
+def load_recording(path):
+    """Recorded cases in file order, the last recording of each CASO winning"""
+    cases = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                cases.pop(record['caso'], None)
+                cases[record['caso']] = record
+    return list(cases.values())
+
+
+def normalize_body(text):
+    """Page text with the values of hidden inputs (tokens) blanked"""
+    return HIDDEN_INPUT.sub(lambda match: VALUE_ATTRIBUTE.sub('value=""', match.group(0)), text or '')
+
+
+def location_path(location):
+    if not location:
+        return None
+    parsed = urllib.parse.urlsplit(location)
+    return parsed.path + (f"?{parsed.query}" if parsed.query else '')
+
+
+def page_hidden_fields(response):
+    """Hidden fields of the form on an HTML response ({} for anything else)"""
+    if 'html' not in (response.headers.get('Content-Type') or ''):
+        return {}
+    parser = FormParser()
+    parser.feed(response.text)
+    return parser.hidden
+
+
+def refresh_hidden_fields(body, hidden):
+    """Recorded form body with the hidden fields (antiforgery token) of the current page"""
+    if not body or not hidden:
+        return body
+    fields = [(name, hidden.get(name, value)) for name, value in urllib.parse.parse_qsl(body, keep_blank_values=True)]
+    return urllib.parse.urlencode(fields)
+
+
+def compare(exchange, response, strict):
+    """Differences between a recorded exchange and the replayed response, as text"""
+    differences = []
+    if response.status != exchange['status']:
+        differences.append(f"status {exchange['status']} -> {response.status}")
+    recorded_location, location = location_path(exchange.get('location')), location_path(response.location)
+    if recorded_location != location:
+        differences.append(f"location {recorded_location} -> {location}")
+    recorded_errors, errors = error_messages(exchange.get('response_body') or ''), error_messages(response.body)
+    if recorded_errors != errors:
+        changed = sorted(set(recorded_errors) | set(errors))
+        differences.append('errors ' + ', '.join(
+            f"{testid}: {recorded_errors.get(testid)!r} -> {errors.get(testid)!r}" for testid in changed
+            if recorded_errors.get(testid) != errors.get(testid)))
+    if strict:
+        before = normalize_body(exchange.get('response_body')).splitlines()
+        after = normalize_body(response.text).splitlines()
+        if before != after:
+            changed = [line for line in difflib.unified_diff(before, after, lineterm='', n=0)
+                       if line[:1] in '+-' and line[:3] not in ('+++', '---')]
+            differences.append(f"body: {len(changed)} lines changed, first {changed[0].strip()[:80]!r}"
+                               if changed else "body changed")
+    return differences
+
+
+def replay_case(record, base_url, strict):
+    """Re-issue one case's requests; returns its result row"""
+    if record.get('error'):
+        return {
+            'entity': record['entity'],
+            'caso': record['caso'],
+            'exchanges': len(record['exchanges']),
+            'recorded': False,
+            'passed': False,
+            'recorded_ms': round(record['seconds'] * 1000, 1),
+            'replay_ms': 0.0,
+            'mismatches': f"not recorded: {record['error']}",
+        }
+    session = HttpSession(base_url or record['base_url'])
+    hidden = {}
+    mismatches = []
+    started = time.perf_counter()
+    for number, exchange in enumerate(record['exchanges'], 1):
+        body = exchange.get('body')
+        try:
+            if exchange['method'] == 'POST':
+                if not hidden:
+                    # No form page recorded before the POST: load one for the token, without comparing it
+                    hidden = page_hidden_fields(session.get(exchange['path']))
+                body = refresh_hidden_fields(body, hidden)
+            headers = {'Content-Type': exchange['content_type']} if exchange.get('content_type') else None
+            response = session.request(exchange['method'], exchange['path'],
+                                       body.encode('utf-8') if body is not None else None, headers)
+        except OSError as e:
+            mismatches.append(f"#{number} {exchange['method']} {exchange['path']}: {str(e)}")
+            break
+        hidden = page_hidden_fields(response) or hidden
+        differences = compare(exchange, response, strict)
+        if differences:
+            mismatches.append(f"#{number} {exchange['method']} {exchange['path']}: {'; '.join(differences)}")
+    return {
+        'entity': record['entity'],
+        'caso': record['caso'],
+        'exchanges': len(record['exchanges']),
+        'recorded': True,
+        'passed': not mismatches,
+        'recorded_ms': round(record['seconds'] * 1000, 1),
+        'replay_ms': round((time.perf_counter() - started) * 1000, 1),
+        'mismatches': ' | '.join(mismatches),
+    }
+
+
+def replay(records, base_url=None, workers=1, strict=False):
+    """Replay records on workers threads; rows in record order"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda record: replay_case(record, base_url, strict), records))
+
+
+def print_report(rows, seconds):
+    print("\n" + "="*70)
+    print("REPLAY")
+    print("="*70)
+    for entity in dict.fromkeys(row['entity'] for row in rows):
+        entity_rows = [row for row in rows if row['entity'] == entity]
+        passed = sum(1 for row in entity_rows if row['passed'])
+        missing = sum(1 for row in entity_rows if not row['recorded'])
+        print(f"  {entity:<10} {passed}/{len(entity_rows)} cases match the recording"
+              + (f" ({missing} not recorded: the browser run failed)" if missing else ""))
+    for row in rows:
+        if not row['passed']:
+            print(f"  - {row['entity']} {row['caso']}: {row['mismatches']}")
+    replayed = [row for row in rows if row['recorded']]
+    recorded = sum(row['recorded_ms'] for row in replayed) / 1000
+    print(f"\n  Replayed {len(replayed)} cases in {seconds:.2f}s; the browser run took {recorded:.1f}s for them"
+          + (f" ({recorded / seconds:.0f}x)" if seconds > 0 else ""))
+    print("="*70)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded browser traffic over HTTP and diff the responses")
+    parser.add_argument('recordings', nargs='+', help="recording files written by run_tests.py --record")
+    parser.add_argument('-u', '--base-url', help=f"application to replay against (default: the recorded one, "
+                                                 f"e.g. {DEFAULT_BASE_URL})")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="cases replayed in parallel (default: 4)")
+    parser.add_argument('--only', type=lambda value: {caso.strip() for caso in value.split(',') if caso.strip()},
+                        metavar='CASO[,CASO...]', help="replay only the listed cases")
+    parser.add_argument('--strict', action='store_true',
+                        help="also compare the page bodies (hidden input values ignored)")
+    parser.add_argument('-o', '--output', default='replay_results.csv')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    configure_logging('replay.log')
+
+    records = [record for path in args.recordings for record in load_recording(path)
+               if args.only is None or record['caso'] in args.only]
+    started = time.perf_counter()
+    rows = replay(records, args.base_url, args.workers, args.strict)
+    seconds = time.perf_counter() - started
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print_report(rows, seconds)
+    print(f"Results saved to: {args.output}")
+    return 0 if all(row['passed'] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
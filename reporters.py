@@ -0,0 +1,205 @@
+"""
+Machine-readable reports streamed to disk while a suite runs
+
+JsonLinesReporter writes one JSON object per line: a run_start record with
+the run metadata, one case record per finished test case (duration, per-field
+validation errors, attempts, lane) and a run_end record with the totals.
+
+JUnitReporter writes a JUnit XML testsuite. Test cases are appended as they
+finish; the counters in the <testsuite> tag are written as fixed-width
+placeholders and filled in when the report is closed, so the file is usable
+by CI dashboards without holding the results in memory.
+"""
+
+import json
+import os
+import platform
+import socket
+import threading
+import uuid
+from datetime import datetime
+
+REPORT_FORMATS = ['junit', 'jsonl']
+REPORT_EXTENSIONS = {'junit': '.xml', 'jsonl': '.jsonl'}
+
+# Width of the zero-padded counters patched into the <testsuite> tag on close
+COUNTER_WIDTH = 12
+
+
+# xml.sax.saxutils pulls in urllib.request; these two helpers are all the JUnit writer needs
+def escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def quoteattr(text):
+    text = escape(text).replace('"', '&quot;')
+    return '"' + text.replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;') + '"'
+
+
+def new_run_id():
+    return datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+
+
+def run_metadata(entity, **extra):
+    """Metadata shared by every report of a run"""
+    metadata = {
+        'run_id': new_run_id(),
+        'entity': entity,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+    }
+    metadata.update(extra)
+    return metadata
+
+
+def report_path(results_file, report_format):
+    """Report file next to the results CSV: libro_test_results.csv -> libro_test_results.xml"""
+    return os.path.splitext(results_file)[0] + REPORT_EXTENSIONS[report_format]
+
+
+def case_status(result):
+    if result['passed']:
+        return 'passed'
+    if result['actual'] == 'Error':
+        return 'error'
+    return 'failed'
+
+
+class JsonLinesReporter:
+    """Newline-delimited JSON report"""
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = metadata
+        self.lock = threading.Lock()
+        self.counts = {'passed': 0, 'failed': 0, 'error': 0}
+        self.duration = 0.0
+        self.file = open(path, 'w', encoding='utf-8')
+        self._write({'type': 'run_start', **metadata})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def case(self, result):
+        status = case_status(result)
+        with self.lock:
+            self.counts[status] += 1
+            self.duration += result.get('duration', 0.0)
+            self._write({
+                'type': 'case',
+                'run_id': self.metadata['run_id'],
+                'entity': self.metadata['entity'],
+                'caso': result['caso'],
+                'expected': result['expected'],
+                'actual': result['actual'],
+                'status': status,
+                'passed': result['passed'],
+                'duration': round(result.get('duration', 0.0), 4),
+                'started_at': result.get('started_at'),
+                'attempts': result.get('attempts', 1),
+                'lane': result.get('lane', 'fast'),
+                'phases': {phase: round(seconds, 4) for phase, seconds in (result.get('phases') or {}).items()},
+                'errors': result['errors'] or {},
+                'message_mismatches': result.get('message_mismatches') or {},
+                'transfer': result.get('transfer'),
+                'notes': result['notes'],
+            })
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self._write({
+                'type': 'run_end',
+                'run_id': self.metadata['run_id'],
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'tests': sum(self.counts.values()),
+                **self.counts,
+                'duration': round(self.duration, 4),
+            })
+            self.file.close()
+
+
+class JUnitReporter:
+    """JUnit XML report, one <testsuite> per entity run"""
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = metadata
+        self.lock = threading.Lock()
+        self.counts = {'tests': 0, 'failures': 0, 'errors': 0}
+        self.duration = 0.0
+        self.file = open(path, 'w', encoding='utf-8')
+        self._write_header()
+
+    def _placeholder(self, name):
+        return f'{name}="{"0" * COUNTER_WIDTH}"'
+
+    def _write_header(self):
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write('<testsuites>\n')
+        self.file.write(f'  <testsuite name={quoteattr(self.metadata["entity"])} '
+                        f'timestamp={quoteattr(self.metadata["started_at"])} '
+                        f'hostname={quoteattr(self.metadata["hostname"])} ')
+        self.counter_offset = self.file.tell()
+        self.file.write(' '.join(self._placeholder(name) for name in ('tests', 'failures', 'errors', 'time')))
+        self.file.write('>\n    <properties>\n')
+        for key, value in self.metadata.items():
+            self.file.write(f'      <property name={quoteattr(str(key))} value={quoteattr(str(value))}/>\n')
+        self.file.write('    </properties>\n')
+        self.file.flush()
+
+    def case(self, result):
+        status = case_status(result)
+        duration = result.get('duration', 0.0)
+        lines = [f'    <testcase classname={quoteattr(self.metadata["entity"] + ".Create")} '
+                 f'name={quoteattr(result["caso"])} time="{duration:.3f}">']
+        message = f"Expected {result['expected']}, got {result['actual']}"
+        details = result['notes']
+        if result['errors']:
+            details += '\n' + '\n'.join(f"{field}: {msg}" for field, msg in result['errors'].items())
+        mismatches = result.get('message_mismatches') or {}
+        if mismatches and result['actual'] == result['expected']:
+            message = f"Rejected with unexpected messages: {', '.join(mismatches)}"
+        if status == 'failed':
+            lines.append(f'      <failure message={quoteattr(message)} type="ResultMismatch">'
+                         f'{escape(details)}</failure>')
+        elif status == 'error':
+            lines.append(f'      <error message={quoteattr(result["notes"])} type="Exception"/>')
+        attempts = result.get('attempts', 1)
+        lane = result.get('lane', 'fast')
+        lines.append(f'      <system-out>attempts={attempts} lane={escape(lane)}</system-out>')
+        lines.append('    </testcase>\n')
+        with self.lock:
+            self.counts['tests'] += 1
+            if status == 'failed':
+                self.counts['failures'] += 1
+            elif status == 'error':
+                self.counts['errors'] += 1
+            self.duration += duration
+            self.file.write('\n'.join(lines))
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write('  </testsuite>\n</testsuites>\n')
+            counters = [str(self.counts['tests']), str(self.counts['failures']),
+                        str(self.counts['errors']), f"{self.duration:.3f}"]
+            self.file.seek(self.counter_offset)
+            self.file.write(' '.join(f'{name}="{value.zfill(COUNTER_WIDTH)}"'
+                                     for name, value in zip(('tests', 'failures', 'errors', 'time'), counters)))
+            self.file.close()
+
+
+REPORTERS = {'junit': JUnitReporter, 'jsonl': JsonLinesReporter}
+
+
+def open_reporters(results_file, formats, metadata):
+    """Create one streaming reporter per requested format next to results_file"""
+    return [REPORTERS[report_format](report_path(results_file, report_format), metadata)
+            for report_format in formats]
@@ -0,0 +1,181 @@
+"""
+Compact case results with bounded memory
+
+CaseResult holds one case in __slots__ instead of a dict; outcome, lane,
+notes and error message strings are interned, so the few distinct values a
+suite produces are stored once. Results still read like the old dicts
+(result['notes'], result.get('phases')), so reporters need no changes.
+
+ResultStore keeps the summary counters up to date as results arrive and
+spools finished rows to <results file>.part every FLUSH_EVERY results.
+Only the unflushed chunk, the first MAX_LISTED failures and the MAX_LISTED
+flakiest cases are held in memory, whatever the size of the suite.
+"""
+
+import csv
+import heapq
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime
+
+RESULT_FIELDS = ['caso', 'expected', 'actual', 'passed', 'notes']
+FLUSH_EVERY = 500
+MAX_LISTED = 100
+
+INTERNED_FIELDS = frozenset({'expected', 'actual', 'lane', 'notes'})
+
+
+def intern_text(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_messages(messages):
+    """Copy of a field -> message dict with interned keys and messages"""
+    if not messages:
+        return messages
+    return {intern_text(field): intern_text(message) for field, message in messages.items()}
+
+
+class CaseResult:
+    """Result of one case; supports result['field'] access like the dicts it replaces"""
+
+    __slots__ = ('caso', 'expected', 'actual', 'passed', 'errors', 'notes', 'attempts', 'lane',
+                 'started_at', 'duration', 'phases', 'message_mismatches', 'transfer')
+
+    def __init__(self, caso, expected, lane='fast'):
+        self.caso = caso
+        self.expected = intern_text(expected)
+        self.actual = ''
+        self.passed = False
+        self.errors = {}
+        self.notes = ''
+        self.attempts = 0
+        self.lane = intern_text(lane)
+        self.started_at = datetime.now().isoformat(timespec='milliseconds')
+        self.duration = 0.0
+        self.phases = {}
+        self.message_mismatches = {}
+        self.transfer = None
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __setitem__(self, field, value):
+        if field in INTERNED_FIELDS:
+            value = intern_text(value)
+        elif field in ('errors', 'message_mismatches'):
+            value = intern_messages(value)
+        try:
+            setattr(self, field, value)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def row(self):
+        """Row of the results CSV"""
+        return {
+            'caso': self.caso,
+            'expected': self.expected,
+            'actual': self.actual,
+            'passed': 'PASS' if self.passed else 'FAIL',
+            'notes': self.notes,
+        }
+
+
+class ResultStore:
+    """Incremental summary of a run plus a chunked spool of its result rows"""
+
+    def __init__(self, spool_file, flush_every=FLUSH_EVERY, max_listed=MAX_LISTED):
+        self.spool_file = spool_file
+        self.flush_every = flush_every
+        self.max_listed = max_listed
+        self.lock = threading.Lock()
+        self.pending = []
+        self.file = None
+        self.writer = None
+        self.saved_file = None
+        self.total = 0
+        self.passed = 0
+        self.blocking_failed = 0
+        self.failures = []
+        self.failures_omitted = 0
+        self._flaky = []
+
+    def __len__(self):
+        return self.total
+
+    def add(self, result, flake_score=0.0):
+        """Count a finished result and queue its row for the next flush"""
+        with self.lock:
+            self.total += 1
+            if result['passed']:
+                self.passed += 1
+            else:
+                if result.get('lane') != 'quarantine':
+                    self.blocking_failed += 1
+                if len(self.failures) < self.max_listed:
+                    self.failures.append((result['caso'], result['expected'], result['actual'], result['notes']))
+                else:
+                    self.failures_omitted += 1
+            if flake_score > 0:
+                entry = (flake_score, result['caso'])
+                if len(self._flaky) < self.max_listed:
+                    heapq.heappush(self._flaky, entry)
+                elif entry > self._flaky[0]:
+                    heapq.heapreplace(self._flaky, entry)
+            self.pending.append(result.row())
+            if len(self.pending) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if self.writer is None:
+            self.file = open(self.spool_file, 'w', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+        self.writer.writerows(self.pending)
+        self.pending = []
+        self.file.flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    @property
+    def flaky(self):
+        """(caso, score) of the flakiest cases seen, highest score first"""
+        return [(caso, score) for score, caso in sorted(self._flaky, reverse=True)]
+
+    def stats(self):
+        failed = self.total - self.passed
+        return {
+            'total': self.total,
+            'passed': self.passed,
+            'failed': failed,
+            'blocking_failed': self.blocking_failed,
+            'pass_rate': (self.passed / self.total * 100) if self.total > 0 else 0
+        }
+
+    def save(self, output_file):
+        """Write every row recorded so far to output_file"""
+        with self.lock:
+            if self.writer is not None or self.pending:
+                self._flush()
+                self.file.close()
+                self.writer = None
+                os.replace(self.spool_file, output_file)
+            elif self.saved_file and self.saved_file != output_file:
+                shutil.copyfile(self.saved_file, output_file)
+            elif self.saved_file is None:
+                with open(output_file, 'w', newline='', encoding='utf-8') as file:
+                    csv.DictWriter(file, fieldnames=RESULT_FIELDS).writeheader()
+            self.saved_file = output_file
@@ -0,0 +1,493 @@
+"""
+Non-interactive entry point for the Libro, Ejemplar and Lector black box suites
+
+Examples:
+    python run_tests.py
+    python run_tests.py --entity libro lector --base-url http://localhost:5183
+    python run_tests.py -e ejemplar --csv my_ejemplar_cases.csv --engine firefox-headless
+    python run_tests.py --csv libro=libro.csv --csv lector=lector.csv --workers 4 --fail-fast
+    python run_tests.py -e libro --autoscale --workers 8 --memory-budget 3000
+    python run_tests.py --compare-engines firefox-headless chromium-headless
+    python run_tests.py -e libro -u http://localhost:5183 http://localhost:5184 --engine firefox-headless
+    python run_tests.py -e libro --csv "BLACKBOX_BIBLIOTECA - LIBRO_TESTS.csv.plan" --only LIB7,LIB23
+
+The exit code is 0 only when no suite has a blocking failure.
+
+--compare-engines runs the same CSVs once per engine, each into its own
+subdirectory of --output, then prints cases/sec per engine and the cases
+whose outcome differs between engines. The engines run one after another
+against the same database, so after each suite the records its accepted
+cases created are deleted again (as --crud does); otherwise the next
+engine's unique keys (ISBN, CI) would be rejected as duplicates.
+
+Several --base-url values (e.g. two local builds of the application) run
+the same CSVs against every URL at once, each into its own subdirectory of
+--output named after the URL's host and port, which also holds that URL's
+row fingerprints, flake history and latency profile. In the history store
+each URL's runs are tagged with the build "<--build>@<label>" (or just the
+label), so history_store.py can compare them. The first URL is the
+baseline: the report lists the cases whose outcome differs and the cases
+whose duration changed most against it, and build_comparison.csv holds the
+outcome, duration and delta of every case under every URL.
+
+--csv also accepts a plan compiled with case_plan.py.
+
+--metrics-port and --status-line show the progress of long runs as it
+happens: throughput, ETA, pass/fail counts, phase latency percentiles,
+active workers and queue depth (see live_metrics.py). With several
+--base-url values they follow the first (baseline) URL only.
+
+--record DIR keeps the HTTP traffic of every case (through the asset
+proxy) in DIR/<entity>.jsonl, for replay without a browser with
+record_replay.py.
+
+While editing the CSVs, watch_cases.py keeps a browser open and reruns only
+the rows added or modified since the file was last saved.
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+
+from browsers import ENGINES
+from log_config import LOG_FORMATS, LOG_LEVELS, configure_logging
+
+SUITES = {
+    'libro': ('libro_selenium_tests', 'LibroTestRunner'),
+    'ejemplar': ('ejemplar_selenium_tests', 'EjemplarTestRunner'),
+    'lector': ('lector_selenium_tests', 'LectorTestRunner'),
+}
+DEFAULT_BASE_URL = "http://localhost:5183"
+COMPARISON_FILE = 'build_comparison.csv'
+# Cases listed under "largest duration changes" in the build comparison
+LATENCY_LISTED = 10
+ENGINE_CHOICES = ENGINES
+
+
+def load_runner_class(entity):
+    """Import the runner module for entity only when it is selected"""
+    module_name, class_name = SUITES[entity]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def parse_csv_args(values, entities, parser):
+    """Map --csv values (PATH or ENTITY=PATH) to entities"""
+    csv_files = {}
+    for value in values or []:
+        entity, sep, path = value.partition('=')
+        if sep and entity.lower() in SUITES:
+            csv_files[entity.lower()] = path
+        elif len(entities) == 1:
+            csv_files[entities[0]] = value
+        else:
+            parser.error(f"--csv {value}: use ENTITY=PATH when running several entities")
+    return csv_files
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run the Biblioteca black box Selenium suites without prompts")
+    parser.add_argument('-e', '--entity', nargs='+', default=['all'],
+                        choices=sorted(SUITES) + ['all'],
+                        help="entities to test (default: all)")
+    parser.add_argument('--csv', action='append', metavar='[ENTITY=]PATH',
+                        help="test case CSV; repeat as ENTITY=PATH for several entities")
+    parser.add_argument('-u', '--base-url', nargs='+', default=[DEFAULT_BASE_URL], metavar='URL',
+                        help=f"application URL (default: {DEFAULT_BASE_URL}); several URLs run the suites "
+                             "against each of them concurrently and compare outcomes and durations")
+    parser.add_argument('--engine', default='firefox', choices=ENGINE_CHOICES,
+                        help="browser engine (default: firefox)")
+    parser.add_argument('--compare-engines', nargs='+', choices=ENGINE_CHOICES, metavar='ENGINE',
+                        help="run the suites under each of these engines and compare throughput and outcomes; "
+                             "records created by accepted cases are deleted after each suite")
+    parser.add_argument('-w', '--workers', type=int,
+                        help="parallel browsers per suite (default: 1; with --autoscale, the number of CPUs)")
+    parser.add_argument('-o', '--output', default='.',
+                        help="directory for the results files (default: current directory)")
+    parser.add_argument('--report-format', nargs='*', default=['junit', 'jsonl'],
+                        choices=['junit', 'jsonl'],
+                        help="machine-readable reports written next to each results CSV "
+                             "(default: junit jsonl; pass no value to disable)")
+    parser.add_argument('--history-db', default='test_history.db',
+                        help="SQLite history store; empty string to disable (default: test_history.db)")
+    parser.add_argument('--build', help="build identifier recorded in the history store "
+                                        "(default: $BUILD_ID, $GITHUB_SHA or the run ID)")
+    parser.add_argument('--no-message-check', action='store_true',
+                        help="do not compare error messages with the VALIDATIONS model")
+    parser.add_argument('--crud', action='store_true',
+                        help="also run Index, Details, Edit and Delete on the records created by accepted cases")
+    parser.add_argument('--warm-reset', action='store_true',
+                        help="reset the Create form in place after rejected cases instead of reloading the page")
+    parser.add_argument('--asset-proxy', action='store_true',
+                        help="send browser traffic through a local proxy that caches static assets, "
+                             "blocks third-party requests and counts bytes per case")
+    parser.add_argument('--asset-cache', default='.asset_cache',
+                        help="on-disk static asset cache for --asset-proxy (default: .asset_cache)")
+    parser.add_argument('--record', metavar='DIR',
+                        help="record each case's HTTP requests and responses to DIR/<entity>.jsonl "
+                             "for record_replay.py (implies --asset-proxy)")
+    parser.add_argument('--adaptive-timeouts', action='store_true',
+                        help="wait for pages and submissions with deadlines learned from past latency "
+                             "(latency_profile.json) instead of fixed sleeps and a flat timeout")
+    parser.add_argument('--only', type=lambda value: [caso.strip() for caso in value.split(',') if caso.strip()],
+                        metavar='CASO[,CASO...]',
+                        help="run only the listed cases, e.g. LIB7,LIB23 (fastest on a compiled .plan)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve live Prometheus metrics on http://127.0.0.1:PORT/metrics (0: any free port); "
+                             "with several --base-url values, for the first URL only")
+    parser.add_argument('--status-line', action='store_true',
+                        help="show a live progress line (cases/s, ETA, pass/fail, workers, queue) on stderr; "
+                             "with several --base-url values, for the first URL only")
+    parser.add_argument('--autoscale', action='store_true',
+                        help="add and retire browser workers at run time from CPU and browser memory; "
+                             "-w is the maximum")
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="memory all browsers together may use with --autoscale "
+                             "(default: half the memory available at start)")
+    parser.add_argument('--fail-fast', action='store_true',
+                        help="stop at the first blocking failure")
+    parser.add_argument('--no-prioritize', action='store_true',
+                        help="run cases in CSV order instead of failing/changed first")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="retries for infrastructure errors (default: 2)")
+    parser.add_argument('--backoff', type=float, default=1.0,
+                        help="initial retry backoff in seconds (default: 1.0)")
+    parser.add_argument('--log-level', default='info', choices=LOG_LEVELS,
+                        help="debug: every phase (not rate-limited), info: run progress, "
+                             "case: one line per case (default: info)")
+    parser.add_argument('--log-format', default='text', choices=LOG_FORMATS,
+                        help="text lines or JSON Lines records (default: text)")
+    parser.add_argument('--log-file', default='run_tests.log',
+                        help="log file; empty string for console only (default: run_tests.log)")
+    return parser
+
+
+def run_suites(args, entities, csv_files, engine, output_dir, metrics=None, base_url=None, label=None,
+               state_dir=None, build=None):
+    """
+    Run the selected suites under one engine, reporting progress to metrics (a RunMetrics) if given
+    base_url defaults to the first --base-url; label names this run's subdirectory of --record;
+    state_dir keeps this run's row fingerprints, flake history and latency profile apart from other runs;
+    build replaces --build in the history store
+    Returns: dict entity -> (stats or None on error, seconds); entities not run are absent
+    """
+    from asset_proxy import AssetProxy
+    from autoscale import MB, AutoScaler
+    from base_runner import create_driver
+    from flaky import RetryPolicy
+    from record_replay import Recording
+
+    base_url = base_url or args.base_url[0]
+    retry_policy = RetryPolicy(retries=args.retries, backoff=args.backoff)
+    runner_classes = {entity: load_runner_class(entity) for entity in entities}
+    os.makedirs(output_dir, exist_ok=True)
+
+    proxy = AssetProxy(base_url, args.asset_cache).start() if args.asset_proxy or args.record else None
+    if args.record:
+        proxy.recording = True
+        record_dir = os.path.join(args.record, label) if label else args.record
+    workers = args.workers or 1
+    summary = {}
+    driver = None
+    try:
+        # One browser shared by every suite when running sequentially
+        if workers == 1 and not args.autoscale:
+            driver = create_driver(engine, proxy=proxy.address if proxy else None)
+        for entity in entities:
+            runner_class = runner_classes[entity]
+            csv_file = csv_files.get(entity, runner_class.DEFAULT_CSV)
+            results_file = os.path.join(output_dir, runner_class.RESULTS_FILE)
+            autoscaler = recording = None
+            if args.record:
+                recording = Recording(os.path.join(record_dir, f"{entity}.jsonl"), runner_class.ENTITY,
+                                      runner_class.CONTROLLER, base_url)
+            if args.autoscale:
+                autoscaler = AutoScaler(args.workers if args.workers is not None else os.cpu_count() or 1,
+                                        args.memory_budget * MB if args.memory_budget else None)
+            runner = runner_class(base_url=base_url, retry_policy=retry_policy,
+                                  fail_fast=args.fail_fast, prioritize=not args.no_prioritize,
+                                  results_file=results_file, engine=engine, driver=driver,
+                                  report_formats=args.report_format,
+                                  history_db=args.history_db or None, build=build or args.build,
+                                  check_messages=not args.no_message_check, crud_flows=args.crud,
+                                  warm_reset=args.warm_reset, asset_proxy=proxy,
+                                  adaptive_timeouts=args.adaptive_timeouts, metrics=metrics,
+                                  autoscaler=autoscaler, recording=recording, state_dir=state_dir,
+                                  cleanup=bool(args.compare_engines))
+            logging.info(f"Running {runner_class.ENTITY} suite: {csv_file} against {base_url} ({engine})")
+            started = time.perf_counter()
+            try:
+                runner.run_all_tests(csv_file, workers=workers, only=args.only)
+            except Exception as e:
+                logging.error(f"{runner_class.ENTITY} suite failed to run: {str(e)}")
+                stats = None
+            else:
+                stats = runner.generate_report()
+            finally:
+                if recording is not None:
+                    recording.close()
+            summary[entity] = (stats, time.perf_counter() - started)
+            driver = runner.driver if driver is not None else None
+            if args.fail_fast and (stats is None or stats['blocking_failed']):
+                break
+    finally:
+        if driver is not None:
+            driver.quit()
+        if proxy is not None:
+            proxy.stop()
+    return summary
+
+
+def print_summary(entities, summary, title="COMBINED SUMMARY"):
+    """Print one line per entity; returns True if every suite ran without blocking failures"""
+    print("\n" + "="*60)
+    print(title)
+    print("="*60)
+    success = len(summary) == len(entities)
+    for entity in entities:
+        stats, _ = summary.get(entity, ('skipped', 0))
+        if stats == 'skipped':
+            print(f"  {entity:<10} skipped")
+        elif stats is None:
+            print(f"  {entity:<10} ERROR")
+            success = False
+        else:
+            print(f"  {entity:<10} {stats['passed']}/{stats['total']} passed, "
+                  f"{stats['blocking_failed']} blocking failures")
+            navigation = stats.get('navigation')
+            if navigation and navigation['saved_per_case'] is not None:
+                print(f"  {'':<10} {navigation['warm_resets']} warm resets saved "
+                      f"{navigation['saved_per_case']:.3f}s per case ({navigation['saved_total']:.1f}s)")
+            success = success and stats['blocking_failed'] == 0
+    print("="*60)
+    return success
+
+
+def read_outcomes(results_file):
+    """CASO -> PASS/FAIL from a results CSV, or {} if the suite wrote none"""
+    if not os.path.exists(results_file):
+        return {}
+    with open(results_file, 'r', encoding='utf-8', newline='') as file:
+        return {row['caso']: row['passed'] for row in csv.DictReader(file)}
+
+
+def print_engine_comparison(entities, runs, output_dir):
+    """Throughput per engine and the cases whose outcome differs between engines"""
+    print("\n" + "="*60)
+    print("ENGINE COMPARISON")
+    print("="*60)
+    print(f"  {'engine':<20} {'cases':>7} {'seconds':>9} {'cases/s':>9} {'failed':>7}")
+    throughput, failures = {}, {}
+    for engine, summary in runs.items():
+        ran = [stats for stats, _ in summary.values() if stats]
+        total = sum(stats['total'] for stats in ran)
+        failed = sum(stats['failed'] for stats in ran)
+        seconds = sum(elapsed for _, elapsed in summary.values())
+        throughput[engine] = total / seconds if seconds else 0.0
+        failures[engine] = failed
+        print(f"  {engine:<20} {total:>7} {seconds:>9.1f} {throughput[engine]:>9.2f} {failed:>7}")
+
+    differences = 0
+    for entity in entities:
+        runner_class = load_runner_class(entity)
+        outcomes = {engine: read_outcomes(os.path.join(output_dir, engine, runner_class.RESULTS_FILE))
+                    for engine in runs}
+        casos = dict.fromkeys(caso for results in outcomes.values() for caso in results)
+        for caso in casos:
+            seen = {engine: results.get(caso, '-') for engine, results in outcomes.items()}
+            if len(set(seen.values())) > 1:
+                if differences == 0:
+                    print("\n  Outcome differences:")
+                differences += 1
+                print(f"    {entity}/{caso}: " + ', '.join(f"{engine} {outcome}" for engine, outcome in seen.items()))
+    if differences == 0:
+        print("\n  Same outcome for every case under every engine")
+    complete = [engine for engine in runs if all(stats for stats, _ in runs[engine].values())]
+    if complete:
+        fastest = min(complete, key=lambda engine: (failures[engine], -throughput[engine]))
+        print(f"\n  Fastest with fewest failures: {fastest} ({throughput[fastest]:.2f} cases/s)")
+    print("="*60)
+    return differences == 0
+
+
+def url_labels(base_urls):
+    """Directory-safe label per base URL: http://localhost:5183 -> localhost_5183"""
+    labels = {}
+    for base_url in base_urls:
+        parsed = urllib.parse.urlsplit(base_url)
+        label = re.sub(r'[^A-Za-z0-9.-]+', '_', f"{parsed.netloc}{parsed.path}".rstrip('/')) or 'app'
+        if label in labels.values():
+            label = f"{label}_{len(labels) + 1}"
+        labels[base_url] = label
+    return labels
+
+
+def read_case_timings(results_file):
+    """CASO -> (actual, duration in seconds) from the JSON Lines report next to a results CSV"""
+    from reporters import report_path
+
+    path = report_path(results_file, 'jsonl')
+    timings = {}
+    if not os.path.exists(path):
+        return timings
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            record = json.loads(line)
+            if record.get('type') == 'case':
+                timings[record['caso']] = (record['actual'], record['duration'])
+    return timings
+
+
+def print_build_comparison(entities, runs, labels, output_dir):
+    """
+    Outcome differences and duration deltas per case between base URLs, the first being the baseline
+    Writes every case side by side to COMPARISON_FILE in output_dir; returns True if no outcome differs
+    """
+    baseline = next(iter(runs))
+    print("\n" + "="*78)
+    print(f"BUILD COMPARISON (baseline {baseline})")
+    print("="*78)
+
+    rows, differences, deltas = [], [], []
+    for entity in entities:
+        runner_class = load_runner_class(entity)
+        timings = {base_url: read_case_timings(os.path.join(output_dir, labels[base_url], runner_class.RESULTS_FILE))
+                   for base_url in runs}
+        for caso in dict.fromkeys(caso for results in timings.values() for caso in results):
+            row = {'entity': entity, 'caso': caso}
+            base_actual, base_seconds = timings[baseline].get(caso, ('-', None))
+            for base_url in runs:
+                actual, seconds = timings[base_url].get(caso, ('-', None))
+                label = labels[base_url]
+                row[f"{label}_actual"] = actual
+                row[f"{label}_ms"] = round(seconds * 1000, 1) if seconds is not None else None
+                if base_url != baseline:
+                    delta = (seconds - base_seconds) * 1000 if None not in (seconds, base_seconds) else None
+                    row[f"{label}_delta_ms"] = round(delta, 1) if delta is not None else None
+                    if delta is not None:
+                        deltas.append((abs(delta), entity, caso, base_url, base_seconds, seconds))
+            if len({row[f"{labels[base_url]}_actual"] for base_url in runs}) > 1:
+                differences.append(row)
+            rows.append(row)
+
+    print(f"  {'base URL':<32} {'cases':>6} {'seconds':>8} {'cases/s':>8} {'failed':>7} {'median delta':>13}")
+    for base_url, summary in runs.items():
+        ran = [stats for stats, _ in summary.values() if stats]
+        total = sum(stats['total'] for stats in ran)
+        seconds = sum(elapsed for _, elapsed in summary.values())
+        ratios = [seconds_now / seconds_before - 1 for _, _, _, url, seconds_before, seconds_now in deltas
+                  if url == base_url and seconds_before]
+        median = f"{statistics.median(ratios):+.1%}" if ratios else '-'
+        print(f"  {base_url:<32} {total:>6} {seconds:>8.1f} {total / seconds if seconds else 0.0:>8.2f} "
+              f"{sum(stats['failed'] for stats in ran):>7} {median:>13}")
+
+    if differences:
+        print("\n  Outcome differences:")
+        for row in differences:
+            print(f"    {row['entity']}/{row['caso']}: "
+                  + ', '.join(f"{labels[base_url]} {row[f'{labels[base_url]}_actual']}" for base_url in runs))
+    else:
+        print("\n  Same outcome for every case at every base URL")
+    if deltas:
+        print("\n  Largest duration changes against the baseline:")
+        for _, entity, caso, base_url, before, after in sorted(deltas, reverse=True)[:LATENCY_LISTED]:
+            change = f" ({after / before - 1:+.0%})" if before else ''
+            print(f"    {entity}/{caso}: {before * 1000:.0f} -> {after * 1000:.0f} ms{change} at {labels[base_url]}")
+
+    comparison_file = os.path.join(output_dir, COMPARISON_FILE)
+    fields = ['entity', 'caso'] + [f"{labels[base_url]}_{column}" for base_url in runs
+                                   for column in (('actual', 'ms') if base_url == baseline
+                                                  else ('actual', 'ms', 'delta_ms'))]
+    with open(comparison_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n  Side by side: {comparison_file}")
+    print("="*78)
+    return not differences
+
+
+def run_builds(args, entities, csv_files, base_urls, metrics=None):
+    """Run the suites against every base URL at once; returns base URL -> run_suites summary"""
+    labels = url_labels(base_urls)
+    runs = {base_url: {} for base_url in base_urls}
+
+    def run(base_url, run_metrics):
+        label = labels[base_url]
+        output_dir = os.path.join(args.output, label)
+        # Each URL keeps its own run state, and its history store rows are tagged with its own build
+        runs[base_url] = run_suites(args, entities, csv_files, args.engine, output_dir, run_metrics,
+                                    base_url=base_url, label=label, state_dir=output_dir,
+                                    build=f"{args.build}@{label}" if args.build else label)
+
+    # Live metrics follow one run at a time: they report the baseline URL only
+    threads = [threading.Thread(target=run, args=(base_url, metrics if n == 0 else None), name=labels[base_url])
+               for n, base_url in enumerate(base_urls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return runs, labels
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    entities = list(SUITES) if 'all' in args.entity else list(dict.fromkeys(args.entity))
+    csv_files = parse_csv_args(args.csv, entities, parser)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    base_urls = list(dict.fromkeys(args.base_url))
+    if len(base_urls) > 1 and args.compare_engines:
+        parser.error("compare either several --base-url values or --compare-engines, not both")
+    if len(base_urls) > 1 and 'jsonl' not in args.report_format:
+        # Case durations for the comparison come from the JSON Lines reports
+        args.report_format = args.report_format + ['jsonl']
+    os.makedirs(args.output, exist_ok=True)
+    configure_logging(args.log_file or None, args.log_level, args.log_format)
+
+    metrics, services = None, []
+    if args.metrics_port is not None or args.status_line:
+        from live_metrics import MetricsServer, RunMetrics, StatusLine
+        metrics = RunMetrics()
+        if args.metrics_port is not None:
+            services.append(MetricsServer(metrics, args.metrics_port).start())
+        if args.status_line:
+            services.append(StatusLine(metrics).start())
+    try:
+        if args.compare_engines:
+            runs = {}
+            for engine in dict.fromkeys(args.compare_engines):
+                runs[engine] = run_suites(args, entities, csv_files, engine, os.path.join(args.output, engine),
+                                          metrics, label=engine)
+            success = all([print_summary(entities, summary, f"SUMMARY ({engine})")
+                           for engine, summary in runs.items()])
+            consistent = print_engine_comparison(entities, runs, args.output)
+            return 0 if success and consistent else 1
+
+        if len(base_urls) > 1:
+            runs, labels = run_builds(args, entities, csv_files, base_urls, metrics)
+            success = all([print_summary(entities, summary, f"SUMMARY ({base_url})")
+                           for base_url, summary in runs.items()])
+            consistent = print_build_comparison(entities, runs, labels, args.output)
+            return 0 if success and consistent else 1
+
+        summary = run_suites(args, entities, csv_files, args.engine, args.output, metrics)
+        return 0 if print_summary(entities, summary) else 1
+    finally:
+        for service in services:
+            service.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
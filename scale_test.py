@@ -0,0 +1,224 @@
+"""
+Index page scale test: seed N records, measure how the Index pages respond as N grows
+
+For each entity and each cumulative step (e.g. 100, 1000, 5000 records) the
+Create endpoint is fed valid, unique rows through the fastest engine that
+works - direct HTTP posts with the antiforgery token, falling back to the
+browser form - and the Index page is then sampled:
+
+    server   GET /<Controller>/Index over HTTP (response fully read)
+    render   browser navigation until the load event (Navigation Timing)
+    search   GET Index?<search-param>=<key of the last seeded record>
+    page     GET Index?<page-param>=2
+
+The latency curve is printed and written to scale_results.csv.
+
+Usage:
+    python scale_test.py --entity libro lector --steps 100 1000 5000 --samples 5
+"""
+
+import argparse
+import csv
+import logging
+import statistics
+import sys
+import time
+import urllib.parse
+
+from http_engine import HttpSession, is_redirect_to_index
+from log_config import configure_logging
+from run_tests import DEFAULT_BASE_URL, ENGINE_CHOICES, SUITES, load_runner_class
+
+NAVIGATION_TIMING_SCRIPT = """
+const n = performance.getEntriesByType('navigation')[0];
+return [n.responseEnd - n.requestStart, n.loadEventEnd - n.startTime,
+        document.querySelectorAll('tbody tr').length];
+"""
+
+
+class Seeder:
+    """Creates records over HTTP when possible, otherwise through the browser form"""
+
+    def __init__(self, runner, mode='auto'):
+        self.runner = runner
+        self.mode = mode
+        self.session = HttpSession(runner.base_url)
+        self.created = 0
+        self.offset = int(time.time() * 1000) % 10**8
+
+    def seed_http(self, test_case):
+        form, _ = self.session.fetch_form(self.runner.create_url)
+        response = self.session.submit_form(form, self.runner.form_values(test_case, form))
+        return is_redirect_to_index(response, self.runner.CONTROLLER)
+
+    def seed_browser(self, test_case):
+        if self.runner.driver is None:
+            self.runner.setup()
+        self.runner.navigate_to_create_page()
+        self.runner.fill_form(test_case)
+        self.runner.submit_form()
+        return self.runner.is_on_index_page()
+
+    def seed(self, count):
+        """Create count more records; returns (created, seconds)"""
+        started = time.perf_counter()
+        created = 0
+        for _ in range(count):
+            test_case = self.runner.seed_case(self.offset + self.created)
+            self.created += 1
+            if self.mode != 'browser':
+                try:
+                    ok = self.seed_http(test_case)
+                except OSError as e:
+                    logging.warning(f"HTTP seeding failed: {str(e)}")
+                    ok = False
+                if not ok and self.mode == 'auto' and created == 0:
+                    logging.info(f"HTTP seeding of {self.runner.ENTITY} not accepted, using the browser")
+                    self.mode = 'browser'
+                    ok = self.seed_browser(test_case)
+                elif ok and self.mode == 'auto':
+                    self.mode = 'http'
+            else:
+                ok = self.seed_browser(test_case)
+            created += int(bool(ok))
+        return created, time.perf_counter() - started
+
+    def last_key(self):
+        """Key value of the most recently seeded record, for the search query"""
+        test_case = self.runner.seed_case(self.offset + self.created - 1)
+        values = self.runner.field_values(test_case)
+        return next((values[field] for field in self.runner.KEY_FIELDS if values.get(field)), '')
+
+
+def body_rows(body):
+    """Rows in the Index table body of an HTML response"""
+    _, _, table = body.partition(b'<tbody')
+    return table.partition(b'</tbody>')[0].count(b'<tr')
+
+
+def measure(runner, session, samples, search_param, page_param, search_key):
+    """Median latencies (ms) of the Index page for the current number of records"""
+    server, render, search, page, sizes, rows = [], [], [], [], [], 0
+    query = urllib.parse.urlencode({search_param: search_key}) if search_param and search_key else None
+    for _ in range(samples):
+        response = session.get(runner.index_url)
+        server.append(response.elapsed * 1000)
+        sizes.append(len(response.body))
+        rows = body_rows(response.body)
+        if query:
+            search.append(session.get(f"{runner.index_url}?{query}").elapsed * 1000)
+        if page_param:
+            page.append(session.get(f"{runner.index_url}?{page_param}=2").elapsed * 1000)
+        if runner.driver is not None:
+            runner.driver.get(runner.index_url)
+            _, load_ms, rows = runner.driver.execute_script(NAVIGATION_TIMING_SCRIPT)
+            render.append(load_ms)
+
+    def median(values):
+        return round(statistics.median(values), 1) if values else None
+
+    return {
+        'server_ms': median(server),
+        'render_ms': median(render),
+        'search_ms': median(search),
+        'page_ms': median(page),
+        'bytes': int(statistics.median(sizes)),
+        'rows': rows,
+    }
+
+
+def slope_per_thousand(points, key):
+    """Least-squares growth of key in ms per 1000 records"""
+    data = [(point['records'], point[key]) for point in points if point[key] is not None]
+    if len(data) < 2:
+        return None
+    mean_x = statistics.fmean(x for x, _ in data)
+    mean_y = statistics.fmean(y for _, y in data)
+    variance = sum((x - mean_x) ** 2 for x, _ in data)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in data) / variance * 1000
+
+
+def run_scale(runner, steps, samples, seed_mode, browser, search_param, page_param):
+    seeder = Seeder(runner, seed_mode)
+    session = HttpSession(runner.base_url)
+    points = []
+    if browser and runner.driver is None:
+        runner.setup()
+    seeded = 0
+    for target in steps:
+        if target > seeded:
+            created, seconds = seeder.seed(target - seeded)
+            seeded = target
+            rate = created / seconds if seconds else 0
+            logging.info(f"{runner.ENTITY}: seeded {created} records via {seeder.mode} ({rate:.1f}/s)")
+        point = {'entity': runner.ENTITY, 'records': seeded}
+        point.update(measure(runner, session, samples, search_param, page_param,
+                             seeder.last_key() if seeder.created else ''))
+        points.append(point)
+        logging.info(f"{runner.ENTITY} @ {seeded}: {point}")
+    return points
+
+
+def print_curve(points):
+    print("\n" + "="*78)
+    print("INDEX PAGE LATENCY CURVE (medians, ms)")
+    print("="*78)
+    print(f"{'entity':<10} {'records':>8} {'server':>9} {'render':>9} {'search':>9} {'page 2':>9} "
+          f"{'rows':>6} {'bytes':>10}")
+    for point in points:
+        cells = [f"{point[key]:9.1f}" if point[key] is not None else f"{'-':>9}"
+                 for key in ('server_ms', 'render_ms', 'search_ms', 'page_ms')]
+        print(f"{point['entity']:<10} {point['records']:>8} {' '.join(cells)} {point['rows']:>6} {point['bytes']:>10}")
+    for entity in dict.fromkeys(point['entity'] for point in points):
+        entity_points = [point for point in points if point['entity'] == entity]
+        growth = slope_per_thousand(entity_points, 'server_ms')
+        if growth is not None:
+            print(f"{entity}: server latency grows {growth:+.1f} ms per 1000 records")
+    print("="*78)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed records and measure Index page latency as they grow")
+    parser.add_argument('-e', '--entity', nargs='+', default=['all'], choices=sorted(SUITES) + ['all'])
+    parser.add_argument('-u', '--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--steps', nargs='+', type=int, default=[0, 100, 1000],
+                        help="cumulative numbers of records to seed before each measurement")
+    parser.add_argument('--samples', type=int, default=5, help="measurements per step (default: 5)")
+    parser.add_argument('--seed-engine', default='auto', choices=['auto', 'http', 'browser'])
+    parser.add_argument('--engine', default='firefox-headless', choices=ENGINE_CHOICES,
+                        help="browser used for render timing and browser seeding")
+    parser.add_argument('--no-browser', action='store_true', help="measure server latency only")
+    parser.add_argument('--search-param', default='searchString',
+                        help="Index query parameter for search (default: searchString; empty to skip)")
+    parser.add_argument('--page-param', default='pageNumber',
+                        help="Index query parameter for pagination (default: pageNumber; empty to skip)")
+    parser.add_argument('-o', '--output', default='scale_results.csv')
+    args = parser.parse_args(argv)
+    configure_logging('scale_test.log')
+
+    entities = list(SUITES) if 'all' in args.entity else list(dict.fromkeys(args.entity))
+    points = []
+    for entity in entities:
+        runner = load_runner_class(entity)(base_url=args.base_url, engine=args.engine,
+                                           report_formats=[], history_db=None)
+        try:
+            points.extend(run_scale(runner, sorted(args.steps), args.samples, args.seed_engine,
+                                    not args.no_browser, args.search_param, args.page_param))
+        finally:
+            runner.teardown()
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as file:
+        fieldnames = ['entity', 'records', 'server_ms', 'render_ms', 'search_ms', 'page_ms', 'rows', 'bytes']
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(points)
+
+    print_curve(points)
+    print(f"Results saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Prioritized scheduling of test cases
+
+Cases that failed in the previous results file run first, then cases whose
+CSV row is new or changed since the last run, then everything else in CSV
+order. Row fingerprints are kept per entity in case_hashes.json.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+
+STATE_FILE = 'case_hashes.json'
+
+# Columns filled in by hand after a run; editing them does not change the case
+IGNORED_COLUMNS = {'resultado obtenido'}
+
+
+def row_hash(test_case, normalize=None):
+    """Stable fingerprint of a CSV row, ignoring the observed-result column; normalize maps each cell"""
+    parts = [f"{key}={normalize(value) if normalize else value}"
+             for key, value in sorted(test_case.items(), key=lambda item: str(item[0]))
+             if key and key.strip().lower() not in IGNORED_COLUMNS]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def load_previous_failures(results_file):
+    """CASO values marked FAIL in a results CSV written by generate_report"""
+    failures = set()
+    if not results_file or not os.path.exists(results_file):
+        return failures
+    with open(results_file, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if row.get('passed') == 'FAIL' and row.get('caso'):
+                failures.add(row['caso'])
+    return failures
+
+
+class CaseScheduler:
+    """Orders test cases so likely failures surface first"""
+
+    def __init__(self, entity, results_file, state_file=STATE_FILE, normalize=None):
+        self.entity = entity
+        self.results_file = results_file
+        self.state_file = state_file
+        self.normalize = normalize
+        self.previous_failures = load_previous_failures(results_file)
+        self.known_hashes = self._load_state().get(entity, {})
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable schedule state {self.state_file}: {str(e)}")
+            return {}
+
+    def is_changed(self, test_case):
+        return self.known_hashes.get(test_case.get('CASO')) != self.row_hash(test_case)
+
+    def row_hash(self, test_case):
+        # A compiled plan row carries the fingerprint taken at compile time, read without decoding the row
+        fingerprint = getattr(test_case, 'fingerprint', None)
+        return fingerprint() if fingerprint is not None else row_hash(test_case, self.normalize)
+
+    def priority(self, test_case):
+        """0 = failed last run, 1 = new or edited row, 2 = unchanged"""
+        if test_case.get('CASO') in self.previous_failures:
+            return 0
+        if self.is_changed(test_case):
+            return 1
+        return 2
+
+    def order(self, test_cases):
+        """Return test_cases sorted by priority, keeping CSV order within each group"""
+        ranked = [(self.priority(tc), tc) for tc in test_cases]
+        ordered = [tc for _, tc in sorted(ranked, key=lambda item: item[0])]
+        failing = sum(1 for priority, _ in ranked if priority == 0)
+        changed = sum(1 for priority, _ in ranked if priority == 1)
+        logging.info(f"Scheduling {failing} previously failing and {changed} new/changed cases first")
+        return ordered
+
+    def save(self, test_cases):
+        """Remember the fingerprints of the rows that were run"""
+        if not self.state_file:
+            return
+        state = self._load_state()
+        hashes = state.setdefault(self.entity, {})
+        for test_case in test_cases:
+            hashes[test_case['CASO']] = self.row_hash(test_case)
+        with open(self.state_file, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark for the browser-free commands
+
+Each command runs in a fresh interpreter several times. The report shows
+the median and best wall time, and whether selenium was imported. None of
+these commands starts a browser, so none of them should load selenium. The
+first row is the cost of importing the browser stack on its own, which is
+what the lazy imports save.
+
+Usage:
+    python startup_benchmark.py [--repeat 7]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs a command in the child interpreter, then reports whether selenium was loaded
+WRAPPER = """
+import runpy, sys
+argv = {argv!r}
+try:
+    if argv[0] == '-c':
+        exec(argv[1])
+    else:
+        sys.argv = argv
+        runpy.run_path(argv[0], run_name='__main__')
+except SystemExit:
+    pass
+sys.stderr.write('\\nSELENIUM_LOADED=%s\\n' % any(m.split('.')[0] in ('selenium', 'webdriver_manager') for m in sys.modules))
+"""
+
+PREDICT = """
+from run_tests import SUITES, load_runner_class
+for entity in SUITES:
+    runner_class = load_runner_class(entity)
+    runner = runner_class.__new__(runner_class)
+    from error_matcher import compile_matcher
+    matcher = compile_matcher(runner_class.VALIDATIONS)
+    for test_case in BaseTestRunner.load_test_cases(runner, runner_class.DEFAULT_CSV):
+        matcher.predict(runner.field_values(test_case))
+"""
+
+COMMANDS = [
+    ('selenium + webdriver_manager (reference)',
+     ['-c', 'import selenium.webdriver, selenium.webdriver.support.ui, webdriver_manager.firefox']),
+    ('import runner modules',
+     ['-c', 'import libro_selenium_tests, ejemplar_selenium_tests, lector_selenium_tests']),
+    ('predict outcomes of every CSV row',
+     ['-c', 'from base_runner import BaseTestRunner\n' + PREDICT]),
+    ('run_tests.py --help', ['run_tests.py', '--help']),
+    ('scale_test.py --help', ['scale_test.py', '--help']),
+    ('history_store.py trends', ['history_store.py', '--db', ':memory:', 'trends']),
+]
+
+
+def time_command(argv):
+    """Wall time (s) of one cold run and whether it loaded selenium"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', WRAPPER.format(argv=argv)],
+                               capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{completed.stderr}")
+    return elapsed, 'SELENIUM_LOADED=True' in completed.stderr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the browser-free commands")
+    parser.add_argument('--repeat', type=int, default=7, help="runs per command (default: 7)")
+    args = parser.parse_args(argv)
+
+    baseline, _ = time_command(['-c', 'pass'])
+    print("="*76)
+    print(f"COLD START (median of {args.repeat}, interpreter start {baseline * 1000:.0f} ms included)")
+    print("="*76)
+    print(f"{'command':<42} {'median':>9} {'best':>9}  selenium")
+    unexpected = False
+    for name, command in COMMANDS:
+        runs = [time_command(command) for _ in range(args.repeat)]
+        times = [elapsed * 1000 for elapsed, _ in runs]
+        loaded = any(selenium for _, selenium in runs)
+        print(f"{name:<42} {statistics.median(times):7.0f}ms {min(times):7.0f}ms  {'loaded' if loaded else '-'}")
+        unexpected = unexpected or (loaded and '(reference)' not in name)
+    print("="*76)
+    if unexpected:
+        print("A browser-free command imported selenium")
+    return 1 if unexpected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
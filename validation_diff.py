@@ -0,0 +1,243 @@
+"""
+Client-side vs server-side validation differential
+
+Every row runs twice, in two browsers of the same engine:
+
+    js      scripts enabled. The submit click is watched: if unobtrusive
+            validation cancels the submit event the row was rejected by the
+            client layer (no POST); otherwise the verdict came back from the
+            server after a round trip
+    no-js   scripts disabled, so every submit is a POST and the server
+            alone decides
+
+Timing starts at the submit click and ends at the verdict: error messages
+shown in place (client) or the response page loaded (server). Each row is
+classified as:
+
+    client    rejected in the browser, no round trip
+    server    rejected by the server (a rule the client does not check)
+    accepted  accepted by both layers
+
+and each VALIDATIONS rule by the layer that reported it. A row the client
+rejects but the server accepts without scripts is a validation gap: the
+rule is only enforced in the browser. Rows whose js and no-js outcomes match
+are safe for the HTTP-only path (http_engine), which never runs scripts.
+
+Both passes create the same record, so the record an accepted pass creates
+is deleted (through the CRUD flows' Delete, in the scripted browser) before
+the next pass. A pass rejected only by a 'duplicate' rule met a record that
+was already in the database: such rows are listed apart and left out of the
+layer, rule and safety verdicts.
+
+Usage:
+    python validation_diff.py -e libro --engine firefox-headless
+    python validation_diff.py -e lector --only LEC3,LEC12 -o lector_layers.csv
+"""
+
+import argparse
+import collections
+import csv
+import logging
+import statistics
+import sys
+import time
+
+from base_runner import ARM_SUBMIT_SCRIPT, POLL_INTERVAL, WAIT_TIMEOUT, By, WebDriverWait
+from browsers import create_driver
+from crud_flows import CrudFlows
+from log_config import configure_logging
+from run_tests import DEFAULT_BASE_URL, ENGINE_CHOICES, SUITES, load_runner_class
+
+RESULT_FIELDS = ['caso', 'expected', 'js_actual', 'layer', 'js_ms', 'nojs_actual', 'nojs_ms',
+                 'client_rules', 'server_rules', 'http_safe', 'gap']
+SUBMIT_BUTTON = "[data-testid='submit-button']"
+
+
+def rules_of(runner, errors):
+    """'field:rule' of each harvested error message (field:? when the message matches no rule)"""
+    rules = []
+    for testid, message in errors.items():
+        field_rules = runner.error_matcher.by_testid.get(testid)
+        if field_rules is None or field_rules.rule_for_message(message) == 'duplicate':
+            continue
+        rules.append(f"{field_rules.field}:{field_rules.rule_for_message(message) or '?'}")
+    return sorted(rules)
+
+
+def duplicate_only(runner, errors):
+    """True if every error message is a 'duplicate' rule (the record was already in the database)"""
+    if not errors:
+        return False
+    for testid, message in errors.items():
+        field_rules = runner.error_matcher.by_testid.get(testid)
+        if field_rules is None or field_rules.rule_for_message(message) != 'duplicate':
+            return False
+    return True
+
+
+def delete_created(runner, test_case):
+    """Delete the record an accepted pass of test_case created; runner must drive a browser with scripts"""
+    if not runner.is_on_index_page():
+        runner.driver.get(runner.index_url)
+    flows = CrudFlows(runner)
+    flows.capture(test_case)
+    if not flows.fixtures:
+        logging.warning(f"{test_case['CASO']}: created record not found, the next pass may meet a duplicate")
+        return
+    result = runner.new_result(f"{test_case['CASO']}/Delete", 'Aceptado')
+    if not flows.check_delete(flows.fixtures[0], result):
+        logging.warning(f"{test_case['CASO']}: {result['notes']}")
+
+
+def load_create_page(runner):
+    runner.driver.get(runner.create_url)
+    WebDriverWait(runner.driver, WAIT_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+        lambda driver: driver.find_elements(By.CSS_SELECTOR, SUBMIT_BUTTON))
+
+
+def submit_with_scripts(runner, test_case):
+    """(actual, layer, seconds, errors) with scripts enabled"""
+    load_create_page(runner)
+    runner.fill_form(test_case)
+    button = runner.driver.find_element(By.CSS_SELECTOR, SUBMIT_BUTTON)
+    runner.driver.execute_script(ARM_SUBMIT_SCRIPT)
+    started = time.perf_counter()
+    button.click()
+    settled = WebDriverWait(runner.driver, WAIT_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+        runner.submission_settled(button, started))
+    seconds = time.perf_counter() - started
+    errors = runner.check_validation_errors()
+    actual = runner.determine_actual_result(bool(errors), runner.is_on_index_page())
+    if settled == 'client':
+        layer = 'client'
+    else:
+        layer = 'accepted' if actual == 'Aceptado' else 'server'
+    return actual, layer, seconds, errors
+
+
+def submit_without_scripts(runner, test_case):
+    """(actual, seconds, errors) with scripts disabled: always a POST"""
+    from selenium.webdriver.support import expected_conditions
+
+    load_create_page(runner)
+    runner.fill_form(test_case)
+    button = runner.driver.find_element(By.CSS_SELECTOR, SUBMIT_BUTTON)
+    started = time.perf_counter()
+    button.click()
+    WebDriverWait(runner.driver, WAIT_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+        expected_conditions.staleness_of(button))
+    WebDriverWait(runner.driver, WAIT_TIMEOUT, poll_frequency=POLL_INTERVAL).until(
+        lambda driver: driver.find_elements(By.CSS_SELECTOR, 'body'))
+    seconds = time.perf_counter() - started
+    errors = runner.check_validation_errors()
+    return runner.determine_actual_result(bool(errors), runner.is_on_index_page()), seconds, errors
+
+
+def compare_case(js_runner, nojs_runner, test_case):
+    js_actual, layer, js_seconds, js_errors = submit_with_scripts(js_runner, test_case)
+    if js_actual == 'Aceptado':
+        delete_created(js_runner, test_case)
+    nojs_actual, nojs_seconds, nojs_errors = submit_without_scripts(nojs_runner, test_case)
+    if nojs_actual == 'Aceptado':
+        delete_created(js_runner, test_case)
+    duplicate = duplicate_only(js_runner, js_errors) or duplicate_only(nojs_runner, nojs_errors)
+    if duplicate:
+        layer = 'duplicate'
+    return {
+        'caso': test_case['CASO'],
+        'expected': test_case.get(js_runner.EXPECTED_COLUMN, '').strip(),
+        'js_actual': js_actual,
+        'layer': layer,
+        'js_ms': round(js_seconds * 1000, 1),
+        'nojs_actual': nojs_actual,
+        'nojs_ms': round(nojs_seconds * 1000, 1),
+        'client_rules': ' '.join(rules_of(js_runner, js_errors)) if layer == 'client' else '',
+        'server_rules': ' '.join(rules_of(nojs_runner, nojs_errors)),
+        'http_safe': js_actual == nojs_actual if not duplicate else None,
+        'gap': layer == 'client' and nojs_actual == 'Aceptado',
+    }
+
+
+def print_report(entity, rows):
+    print("\n" + "="*70)
+    print(f"VALIDATION LAYERS - {entity}")
+    print("="*70)
+    for layer in ('client', 'server', 'accepted'):
+        layer_rows = [row for row in rows if row['layer'] == layer]
+        if layer_rows:
+            js = statistics.median(row['js_ms'] for row in layer_rows)
+            nojs = statistics.median(row['nojs_ms'] for row in layer_rows)
+            print(f"  {layer:<9} {len(layer_rows):>4} cases   verdict in {js:8.1f} ms (scripts on), "
+                  f"{nojs:8.1f} ms (server only)")
+
+    layers = collections.defaultdict(collections.Counter)
+    for row in rows:
+        for rule in row['client_rules'].split():
+            layers[rule]['client'] += 1
+        for rule in row['server_rules'].split():
+            layers[rule]['server'] += 1
+    if layers:
+        print("\n  Rules (cases caught in the browser / reported by the server):")
+        for rule, counts in sorted(layers.items()):
+            note = '' if counts['client'] else '  <- always needs a server round trip'
+            print(f"    {rule:<32} {counts['client']:>4} / {counts['server']:<4}{note}".rstrip())
+
+    gaps = [row['caso'] for row in rows if row['gap']]
+    duplicates = [row['caso'] for row in rows if row['layer'] == 'duplicate']
+    unsafe = [row['caso'] for row in rows if row['http_safe'] is False]
+    print(f"\n  Safe for the HTTP-only path: {len(rows) - len(duplicates) - len(unsafe)}/"
+          f"{len(rows) - len(duplicates)} cases")
+    if duplicates:
+        print(f"  Not compared (key already in the database): {', '.join(duplicates)}")
+    if unsafe:
+        print(f"  Outcome depends on scripts: {', '.join(unsafe)}")
+    if gaps:
+        print(f"  Validation gaps (rejected in the browser, accepted by the server): {', '.join(gaps)}")
+    print("="*70)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run each row with scripts on and off and compare the layers")
+    parser.add_argument('-e', '--entity', required=True, choices=sorted(SUITES))
+    parser.add_argument('--csv', help="test case CSV or compiled plan (default: the entity's CSV)")
+    parser.add_argument('-u', '--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--engine', default='firefox-headless', choices=ENGINE_CHOICES)
+    parser.add_argument('--only', type=lambda value: [caso.strip() for caso in value.split(',') if caso.strip()],
+                        metavar='CASO[,CASO...]', help="run only the listed cases")
+    parser.add_argument('-o', '--output', default='validation_layers.csv')
+    args = parser.parse_args(argv)
+    configure_logging('validation_diff.log')
+
+    runner_class = load_runner_class(args.entity)
+    settings = dict(base_url=args.base_url, engine=args.engine, report_formats=[], history_db=None)
+    js_runner = runner_class(driver=create_driver(args.engine), **settings)
+    nojs_runner = runner_class(driver=create_driver(args.engine, javascript=False), javascript=False, **settings)
+    test_cases = js_runner.load_test_cases(args.csv or runner_class.DEFAULT_CSV, args.only)
+
+    rows = []
+    try:
+        for test_case in test_cases:
+            try:
+                row = compare_case(js_runner, nojs_runner, test_case)
+            except Exception as e:
+                logging.error(f"{test_case['CASO']}: {str(e)}")
+                continue
+            rows.append(row)
+            logging.info(f"{row['caso']}: {row['layer']} ({row['js_ms']} ms), without scripts "
+                         f"{row['nojs_actual']} ({row['nojs_ms']} ms){' - GAP' if row['gap'] else ''}")
+    finally:
+        js_runner.driver.quit()
+        nojs_runner.driver.quit()
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print_report(runner_class.ENTITY, rows)
+    print(f"Results saved to: {args.output}")
+    return 1 if any(row['gap'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Warm Create page: reset the form in place instead of reloading the page
+
+After a rejected case the browser is still on the Create page with the
+submitted values and error messages. Instead of driver.get(create_url),
+which reloads every stylesheet, script and font, RESET_FORM_SCRIPT fetches
+a fresh copy of the Create page in the background (which also renews the
+antiforgery cookie) and copies its state into the live form: every field
+value, the new __RequestVerificationToken, the validation CSS classes and
+the (empty) error messages.
+
+A full navigation is still used for the first case, after a redirect to
+Index (an accepted case) and whenever the reset fails. Both kinds of
+navigation are timed so the report can show the time saved per case.
+"""
+
+import logging
+import threading
+import time
+import urllib.parse
+
+# arguments: fresh Create page URL, async callback; reports 'ok' or why the reset was not possible
+RESET_FORM_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const formOf = (doc) => { const field = doc.querySelector('form [data-testid]'); return field && field.closest('form'); };
+const form = formOf(document);
+if (!form) { done('no form on the page'); return; }
+fetch(arguments[0], {credentials: 'same-origin', cache: 'no-store'})
+    .then(response => response.ok ? response.text() : Promise.reject('HTTP ' + response.status))
+    .then(html => {
+        const fresh = new DOMParser().parseFromString(html, 'text/html');
+        const freshForm = formOf(fresh);
+        if (!freshForm || freshForm.elements.length !== form.elements.length) {
+            done('fresh form does not match'); return;
+        }
+        for (let i = 0; i < form.elements.length; i++) {
+            const field = form.elements[i], source = freshForm.elements[i];
+            if (field.name !== source.name) { done('field ' + field.name + ' does not match'); return; }
+            if (field.type === 'checkbox' || field.type === 'radio') { field.checked = source.checked; }
+            else if (field.tagName === 'SELECT') { field.selectedIndex = source.selectedIndex; }
+            else { field.value = source.value; }
+            field.className = source.className;
+        }
+        const messages = "[data-testid$='-error'], [data-valmsg-for], [data-valmsg-summary]";
+        for (const message of document.querySelectorAll(messages)) {
+            let source = null;
+            if (message.dataset.testid) {
+                source = fresh.querySelector("[data-testid='" + message.dataset.testid + "']");
+            } else if (message.dataset.valmsgFor) {
+                source = fresh.querySelector("[data-valmsg-for='" + message.dataset.valmsgFor + "']");
+            } else {
+                source = fresh.querySelector('[data-valmsg-summary]');
+            }
+            message.innerHTML = source ? source.innerHTML : '';
+            if (source) { message.className = source.className; }
+        }
+        if (window.jQuery && jQuery.fn.validate) {
+            try { jQuery(form).validate().resetForm(); } catch (e) { }
+        }
+        done('ok');
+    })
+    .catch(error => done('fetch failed: ' + error));
+"""
+
+
+class NavigationStats:
+    """Count and total seconds of full navigations and warm resets, shared by parallel workers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {'full': 0, 'warm': 0}
+        self.seconds = {'full': 0.0, 'warm': 0.0}
+
+    def record(self, kind, seconds):
+        with self.lock:
+            self.counts[kind] += 1
+            self.seconds[kind] += seconds
+
+    def average(self, kind):
+        return self.seconds[kind] / self.counts[kind] if self.counts[kind] else None
+
+    def summary(self):
+        """Averages and the estimated time saved by the warm resets (None without both kinds)"""
+        full, warm = self.average('full'), self.average('warm')
+        saved_per_case = full - warm if full is not None and warm is not None else None
+        return {
+            'full_navigations': self.counts['full'],
+            'warm_resets': self.counts['warm'],
+            'full_avg': full,
+            'warm_avg': warm,
+            'saved_per_case': saved_per_case,
+            'saved_total': saved_per_case * self.counts['warm'] if saved_per_case is not None else None,
+        }
+
+
+class WarmPage:
+    """Keeps the runner's Create page warm between cases"""
+
+    def __init__(self, runner, stats=None):
+        self.runner = runner
+        self.stats = stats if stats is not None else NavigationStats()
+
+    def on_create_page(self):
+        path = urllib.parse.urlparse(self.runner.driver.current_url).path.rstrip('/')
+        return path.lower().endswith(f'/{self.runner.CONTROLLER}/create'.lower())
+
+    def reset(self):
+        """Reset the form in place; False if a full navigation is needed instead"""
+        started = time.perf_counter()
+        try:
+            if not self.on_create_page():
+                return False
+            outcome = self.runner.driver.execute_async_script(RESET_FORM_SCRIPT, self.runner.create_url)
+        except Exception as e:
+            logging.debug("Warm reset failed: %s", e)
+            return False
+        if outcome != 'ok':
+            logging.debug("Warm reset not possible: %s", outcome)
+            return False
+        self.stats.record('warm', time.perf_counter() - started)
+        return True
+
+    def log_summary(self):
+        summary = self.stats.summary()
+        logging.info(f"\nNAVIGATION: {summary['warm_resets']} warm resets, "
+                     f"{summary['full_navigations']} full navigations")
+        if summary['saved_per_case'] is not None:
+            logging.info(f"  full navigation {summary['full_avg']:.3f}s, warm reset {summary['warm_avg']:.3f}s: "
+                         f"saved {summary['saved_per_case']:.3f}s per reset case, "
+                         f"{summary['saved_total']:.1f}s in total")
+        return summary
@@ -0,0 +1,199 @@
+"""
+Watch mode: rerun the CSV rows being edited in a warm browser
+
+Keeps one browser open on the application and polls the suites' CSV files.
+When a file changes (and has stopped changing for SETTLE seconds, so an
+editor's save is read once) its rows are diffed against the previous read
+by CASO and row fingerprint (CaseScheduler.row_hash, which ignores the
+hand-filled 'Resultado obtenido' column):
+
+    added     CASO not in the previous read   -> run
+    modified  same CASO, different content    -> run
+    removed   CASO no longer in the file      -> reported
+
+Only added and modified rows run, one after another on the warm browser,
+so an edited row gets its verdict in seconds instead of a full suite run.
+At startup the rows changed since the last full run (case_hashes.json) run
+first; --initial all or none overrides that. The fingerprints of every row
+run are saved to case_hashes.json like a normal run does. Stop with Ctrl+C.
+
+Usage:
+    python watch_cases.py
+    python watch_cases.py -e libro --csv my_libro_cases.csv --engine firefox-headless
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+
+from browsers import create_driver
+from log_config import configure_logging, stop_logging
+from run_tests import DEFAULT_BASE_URL, ENGINE_CHOICES, SUITES, load_runner_class, parse_csv_args
+from scheduler import CaseScheduler
+
+POLL_INTERVAL = 0.5
+SETTLE = 0.3
+
+
+def file_signature(path):
+    """(mtime, size) of path, or None while it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def diff_rows(before, after):
+    """(added, modified, removed) CASO lists between two CASO -> row_hash maps"""
+    added = [caso for caso in after if caso not in before]
+    modified = [caso for caso in after if caso in before and before[caso] != after[caso]]
+    removed = [caso for caso in before if caso not in after]
+    return added, modified, removed
+
+
+class WatchedSuite:
+    """One entity's runner and the last read of its CSV"""
+
+    def __init__(self, runner, path):
+        self.runner = runner
+        self.path = path
+        self.scheduler = CaseScheduler(runner.ENTITY, runner.results_file, normalize=runner.parse_test_value)
+        self.signature = file_signature(path)
+        self.cases = {}
+        self.hashes = {}
+
+    def read(self):
+        """Re-read the CSV; False (previous read kept) if it cannot be parsed right now"""
+        try:
+            test_cases = self.runner.load_test_cases(self.path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read {self.path}: {str(e)}")
+            return False
+        self.cases = {test_case['CASO']: test_case for test_case in test_cases}
+        self.hashes = {caso: self.scheduler.row_hash(test_case) for caso, test_case in self.cases.items()}
+        return True
+
+    def changed(self):
+        """True once the file has changed and then stayed the same for SETTLE seconds"""
+        signature = file_signature(self.path)
+        if signature == self.signature or signature is None:
+            return False
+        while True:
+            time.sleep(SETTLE)
+            settled = file_signature(self.path)
+            if settled == signature:
+                break
+            signature = settled
+        self.signature = signature
+        return True
+
+
+class Watcher:
+    """Runs the added and modified rows of the watched CSVs on one shared browser"""
+
+    def __init__(self, suites, engine):
+        self.suites = suites
+        self.engine = engine
+        self.driver = None
+
+    def start(self, initial='changed'):
+        self.driver = create_driver(self.engine)
+        for suite in self.suites:
+            if not suite.read():
+                continue
+            if initial == 'all':
+                casos = list(suite.cases)
+            elif initial == 'changed':
+                casos = [caso for caso, test_case in suite.cases.items() if suite.scheduler.is_changed(test_case)]
+            else:
+                casos = []
+            print(f"Watching {suite.path} ({len(suite.cases)} cases)")
+            if casos:
+                self.report(suite, f"{len(casos)} changed since the last run" if initial == 'changed'
+                            else f"all {len(casos)} cases")
+                self.run(suite, casos)
+
+    def poll(self):
+        for suite in self.suites:
+            if not suite.changed():
+                continue
+            before = suite.hashes
+            if not suite.read():
+                continue
+            added, modified, removed = diff_rows(before, suite.hashes)
+            self.report(suite, f"{len(added)} added, {len(modified)} modified, {len(removed)} removed"
+                        + (f" ({', '.join(removed)})" if removed else ''))
+            if added or modified:
+                self.run(suite, added + modified)
+
+    @staticmethod
+    def report(suite, message):
+        print(f"[{datetime.datetime.now():%H:%M:%S}] {os.path.basename(suite.path)}: {message}")
+
+    def run(self, suite, casos):
+        runner = suite.runner
+        if runner.driver is not self.driver:
+            runner.driver, runner.owns_driver = self.driver, False
+            runner.setup()
+        started = time.perf_counter()
+        results = [runner.run_test_case(suite.cases[caso]) for caso in casos]
+        # recover() may have replaced a lost browser; the other suites share the new one
+        self.driver = runner.driver
+        suite.scheduler.save([suite.cases[caso] for caso in casos])
+        failed = [result['caso'] for result in results if not result['passed']]
+        print(f"  {len(results) - len(failed)}/{len(results)} passed in {time.perf_counter() - started:.1f}s"
+              + (f" - failed: {', '.join(failed)}" if failed else ''))
+
+    def watch(self, stop, interval=POLL_INTERVAL):
+        while not stop.wait(interval):
+            self.poll()
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rerun added and modified CSV rows as the files are edited")
+    parser.add_argument('-e', '--entity', nargs='+', default=['all'], choices=sorted(SUITES) + ['all'])
+    parser.add_argument('--csv', action='append', metavar='[ENTITY=]PATH',
+                        help="test case CSV to watch; repeat as ENTITY=PATH for several entities")
+    parser.add_argument('-u', '--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--engine', default='firefox', choices=ENGINE_CHOICES)
+    parser.add_argument('--initial', default='changed', choices=['changed', 'all', 'none'],
+                        help="rows to run at startup: changed since the last run (default), all or none")
+    parser.add_argument('--no-message-check', action='store_true',
+                        help="do not compare error messages with the VALIDATIONS model")
+    args = parser.parse_args(argv)
+    configure_logging('watch_cases.log', 'case')
+
+    entities = list(SUITES) if 'all' in args.entity else list(dict.fromkeys(args.entity))
+    csv_files = parse_csv_args(args.csv, entities, parser)
+    suites = []
+    for entity in entities:
+        runner_class = load_runner_class(entity)
+        runner = runner_class(base_url=args.base_url, engine=args.engine, prioritize=False,
+                              report_formats=[], history_db=None, check_messages=not args.no_message_check)
+        suites.append(WatchedSuite(runner, csv_files.get(entity, runner_class.DEFAULT_CSV)))
+
+    watcher = Watcher(suites, args.engine)
+    try:
+        watcher.start(args.initial)
+        print("Waiting for changes (Ctrl+C to stop)...")
+        watcher.watch(threading.Event())
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()
+        stop_logging()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())